@@ -1,4 +1,4 @@
-from flask import Flask
+from flask import Flask, request
 from flask_cors import CORS
 from app.config import Config
 
@@ -6,21 +6,89 @@ def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
     
+    # Request/SQL metrics at /api/metrics; registered first so every request is timed
+    from app.utils.metrics import init_metrics
+    init_metrics(app)
+    
+    # Statements over SLOW_QUERY_MS are EXPLAINed and kept at /api/admin/slow-queries
+    from app.utils.slow_queries import init_slow_query_log
+    init_slow_query_log(app)
+    
+    # Opt-in profiling (PROFILE_SAMPLE_RATE or an admin's X-Profile header):
+    # Server-Timing header and folded stacks per endpoint under PROFILE_DIR
+    from app.utils.profiling import init_profiling
+    init_profiling(app)
+    
+    # Development/test: flag duplicate and N+1 statements per request
+    from app.utils.query_budget import init_query_detector
+    init_query_detector(app)
+    
+    # Answer CORS preflights before auth, the DB session or any blueprint runs;
+    # flask-cors adds the Access-Control-* headers (incl. Max-Age) on the way out
+    @app.before_request
+    def preflight():
+        if request.method == 'OPTIONS' and 'Access-Control-Request-Method' in request.headers:
+            return app.make_default_options_response()
+    
     # Enable CORS
-    CORS(app, origins=app.config['CORS_ORIGINS'].split(','))
+    # X-Last-Write: read-your-writes marker the client echoes (see utils/replicas.py)
+    CORS(app, origins=app.config['CORS_ORIGINS'].split(','), max_age=app.config['CORS_MAX_AGE'],
+         expose_headers=['X-Last-Write'])
     
     # Register blueprints
-    from app.routes import auth, mothers, children, visits, vaccinations
+    from app.routes import auth, mothers, children, visits, vaccinations, search, dashboard, sync, reports, admin
     
     app.register_blueprint(auth.bp, url_prefix='/api/auth')
     app.register_blueprint(mothers.bp, url_prefix='/api/mothers')
     app.register_blueprint(children.bp, url_prefix='/api/children')
     app.register_blueprint(visits.bp, url_prefix='/api/visits')
     app.register_blueprint(vaccinations.bp, url_prefix='/api/vaccinations')
+    app.register_blueprint(search.bp, url_prefix='/api/search')
+    app.register_blueprint(dashboard.bp, url_prefix='/api/dashboard')
+    app.register_blueprint(sync.bp, url_prefix='/api/sync')
+    app.register_blueprint(reports.bp, url_prefix='/api/reports')
+    app.register_blueprint(admin.bp, url_prefix='/api/admin')
+    
+    # Open the minimum number of pooled DB connections up front
+    from app.utils.db_pool import init_pool, get_pool
+    init_pool(app)
+    
+    # Request-scoped DB session: commit/rollback and release on teardown
+    from app.utils.db import init_db
+    init_db(app)
+    
+    # GET requests read from DB_REPLICAS; writers stay on the primary briefly
+    from app.utils.replicas import init_replicas, get_replicas
+    init_replicas(app)
+    
+    # Re-run response cache invalidations once writes are committed
+    from app.utils.response_cache import init_response_cache
+    init_response_cache(app)
+    
+    # gzip/brotli for larger buffered responses
+    from app.utils.compression import init_compression
+    init_compression(app)
+    
+    # flask due-doses rebuild, ...
+    from app.commands import register_commands
+    register_commands(app)
     
     # Health check endpoint
     @app.route('/api/health')
     def health():
         return {'status': 'ok', 'message': 'MaternalCare+ API is running'}
     
+    # Connection pool statistics (admins only: includes replica hosts and errors)
+    from app.utils.auth import token_required, role_required
+    
+    @app.route('/api/health/pool')
+    @token_required
+    @role_required(['admin'])
+    def pool_stats():
+        stats = {'status': 'ok', 'pool': get_pool().stats()}
+        replicas = get_replicas()
+        if replicas is not None:
+            stats['replicas'] = replicas.stats()
+        return stats
+    
     return app
@@ -0,0 +1,84 @@
+import time
+
+import click
+from flask.cli import AppGroup
+
+from app.config import Config
+from app.utils.db import get_db
+from app.utils.defaulters import build_defaulter_reports
+from app.utils.due_doses import rebuild_due_doses
+from app.utils.migrations import MigrationError, migrate, migration_status
+
+due_doses_cli = AppGroup('due-doses', help='Maintain the due_doses queue.')
+defaulters_cli = AppGroup('defaulters', help='Defaulter tracing reports.')
+db_cli = AppGroup('db', help='Schema migrations (database/migrations).')
+
+
+@due_doses_cli.command('rebuild')
+@click.option('--batch-size', type=int, default=None, help='Children per transaction (default: DUE_DOSES_REBUILD_BATCH)')
+def rebuild_due_doses_command(batch_size):
+    """Recompute due_doses for every child (backfill, or nightly so expired doses roll over)"""
+    started = time.perf_counter()
+
+    def progress(done, total, written):
+        click.echo(f'  children up to id {done}/{total}: {written} rows')
+
+    written = rebuild_due_doses(get_db(), batch_size, progress=progress)
+    click.echo(f'Wrote {written} due_doses rows in {time.perf_counter() - started:.1f}s')
+
+
+@defaulters_cli.command('build')
+@click.option('--workers', type=int, default=None, help='Worker processes (default: DEFAULTER_WORKERS)')
+def build_defaulters_command(workers):
+    """Build this week's defaulter reports for every clinic in parallel (e.g. weekly from cron)"""
+    started = time.perf_counter()
+    results = build_defaulter_reports(workers)
+    for result in results:
+        clinic = result['clinic_id'] if result['clinic_id'] is not None else 'none'
+        if result['status'] == 'complete':
+            click.echo(f"  clinic {clinic}: {result['missed_visits']} missed visits, "
+                       f"{result['missed_doses']} missed doses ({result['seconds']}s)")
+        else:
+            click.echo(f"  clinic {clinic}: failed: {result['error']}", err=True)
+    click.echo(f'Built {len(results)} reports in {time.perf_counter() - started:.1f}s')
+
+
+@db_cli.command('migrate')
+@click.option('--to', 'target', type=int, default=None, help='Stop after this version')
+@click.option('--dry-run', is_flag=True, help='List pending migrations without applying them')
+def migrate_command(target, dry_run):
+    """Apply pending schema migrations in order (forward only)"""
+    # DDL commits implicitly, so migrations get their own connection
+    conn = Config.create_db_connection()
+    try:
+        applied = migrate(conn, target=target, dry_run=dry_run, log=click.echo)
+    except MigrationError as e:
+        raise click.ClickException(str(e))
+    finally:
+        conn.close()
+
+    if dry_run:
+        for migration in applied:
+            click.echo(f'  pending {migration.version:04d}_{migration.name}')
+    click.echo(f"{len(applied)} migration(s) {'pending' if dry_run else 'applied'}")
+
+
+@db_cli.command('status')
+def migration_status_command():
+    """Show applied and pending schema migrations"""
+    conn = Config.create_db_connection()
+    try:
+        for row in migration_status(conn):
+            state = f"applied {row['applied_at']}" if row['applied_at'] else 'pending'
+            if row['modified']:
+                state += ' (file changed since)'
+            click.echo(f"  {row['version']:04d}_{row['name']}: {state}")
+    finally:
+        conn.close()
+
+
+def register_commands(app):
+    """Attach the flask CLI commands (run with FLASK_APP=run.py)"""
+    app.cli.add_command(due_doses_cli)
+    app.cli.add_command(defaulters_cli)
+    app.cli.add_command(db_cli)
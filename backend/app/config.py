@@ -19,31 +19,159 @@ class Config:
     DB_PASSWORD = os.getenv('DB_PASSWORD', '')
     DB_NAME = os.getenv('DB_NAME', 'mcht_db')
 
+    # Connection Pool Config
+    DB_POOL_MIN_SIZE = int(os.getenv('DB_POOL_MIN_SIZE', 2))
+    DB_POOL_MAX_SIZE = int(os.getenv('DB_POOL_MAX_SIZE', 10))
+    DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 10))
+    DB_POOL_MAX_LIFETIME = int(os.getenv('DB_POOL_MAX_LIFETIME', 1800))
+    DB_POOL_PING_INTERVAL = int(os.getenv('DB_POOL_PING_INTERVAL', 30))
+    DB_POOL_PREWARM = os.getenv('DB_POOL_PREWARM', 'true').lower() == 'true'
+
+    # Read Replica Config (DB_REPLICAS=host[:port],...; same user, password and database)
+    DB_REPLICAS = os.getenv('DB_REPLICAS', '')
+    DB_REPLICA_TIMEOUT = float(os.getenv('DB_REPLICA_TIMEOUT', 2))
+    DB_REPLICA_CONNECT_TIMEOUT = int(os.getenv('DB_REPLICA_CONNECT_TIMEOUT', 2))
+    REPLICA_MAX_LAG_SECONDS = int(os.getenv('REPLICA_MAX_LAG_SECONDS', 10))
+    REPLICA_CHECK_INTERVAL = int(os.getenv('REPLICA_CHECK_INTERVAL', 5))
+    REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', 15))
+
+    # Pagination Config
+    PAGE_DEFAULT_LIMIT = int(os.getenv('PAGE_DEFAULT_LIMIT', 50))
+    PAGE_MAX_LIMIT = int(os.getenv('PAGE_MAX_LIMIT', 200))
+
+    # Search Config
+    SEARCH_DEFAULT_LIMIT = int(os.getenv('SEARCH_DEFAULT_LIMIT', 20))
+    SEARCH_MAX_RESULTS = int(os.getenv('SEARCH_MAX_RESULTS', 500))
+
+    # Worker Dashboard Config
+    DASHBOARD_CACHE_TTL = int(os.getenv('DASHBOARD_CACHE_TTL', 30))
+    DASHBOARD_TOP_N = int(os.getenv('DASHBOARD_TOP_N', 6))
+
+    # Batch Vaccination Config
+    VACCINATION_BATCH_MAX = int(os.getenv('VACCINATION_BATCH_MAX', 1000))
+    VACCINATION_INSERT_CHUNK = int(os.getenv('VACCINATION_INSERT_CHUNK', 200))
+
+    # Delta Sync Config
+    SYNC_PAGE_SIZE = int(os.getenv('SYNC_PAGE_SIZE', 500))
+    SYNC_MAX_PAGE_SIZE = int(os.getenv('SYNC_MAX_PAGE_SIZE', 2000))
+    SYNC_SAFETY_SECONDS = int(os.getenv('SYNC_SAFETY_SECONDS', 5))
+    SYNC_TOMBSTONE_RETENTION_DAYS = int(os.getenv('SYNC_TOMBSTONE_RETENTION_DAYS', 90))
+
+    # Vaccination Alerts Config
+    VACCINE_SCHEDULE = os.getenv('VACCINE_SCHEDULE', 'KE')
+    ALERT_GRACE_DAYS = int(os.getenv('ALERT_GRACE_DAYS', 14))
+    ALERT_WINDOW_DAYS = int(os.getenv('ALERT_WINDOW_DAYS', 14))
+    ALERTS_CACHE_TTL = int(os.getenv('ALERTS_CACHE_TTL', 300))
+    DUE_DOSES_REBUILD_BATCH = int(os.getenv('DUE_DOSES_REBUILD_BATCH', 5000))
+
+    # Defaulter Report Job Config
+    DEFAULTER_WORKERS = int(os.getenv('DEFAULTER_WORKERS', 4))
+    DEFAULTER_FETCH_SIZE = int(os.getenv('DEFAULTER_FETCH_SIZE', 2000))
+
+    # Bulk Import Config
+    IMPORT_CHUNK_SIZE = int(os.getenv('IMPORT_CHUNK_SIZE', 1000))
+    IMPORT_MAX_ERRORS = int(os.getenv('IMPORT_MAX_ERRORS', 1000))
+    IMPORT_READ_BUFFER = int(os.getenv('IMPORT_READ_BUFFER', 65536))
+
+    # Rows fetched per round trip when streaming full-table exports
+    STREAM_BATCH_SIZE = int(os.getenv('STREAM_BATCH_SIZE', 500))
+
     # JWT Config
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-jwt-secret')
     JWT_EXPIRATION_HOURS = int(os.getenv('JWT_EXPIRATION_HOURS', 24))
 
+    # Token Cache / Revocation Config
+    TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', 10000))
+    REVOCATION_REFRESH_SECONDS = int(os.getenv('REVOCATION_REFRESH_SECONDS', 30))
+
+    # Password Hashing Config
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', 12))
+    BCRYPT_WORKERS = int(os.getenv('BCRYPT_WORKERS', 2))
+    BCRYPT_QUEUE_DEPTH = int(os.getenv('BCRYPT_QUEUE_DEPTH', 16))
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', 10))
+    BCRYPT_RETRY_AFTER = int(os.getenv('BCRYPT_RETRY_AFTER', 1))
+
     # CORS Config
     CORS_ORIGINS = os.getenv('CORS_ORIGINS', 'http://localhost:3000')
+    CORS_MAX_AGE = int(os.getenv('CORS_MAX_AGE', 7200))
+
+    # Metrics Config (/api/metrics answers 404 until METRICS_TOKEN is set; scrapes send it as a bearer token)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+    METRICS_MAX_STATEMENTS = int(os.getenv('METRICS_MAX_STATEMENTS', 500))
+
+    # Slow-Query Log Config (statements over SLOW_QUERY_MS, sampled and capped per minute)
+    SLOW_QUERY_ENABLED = os.getenv('SLOW_QUERY_ENABLED', 'true').lower() == 'true'
+    SLOW_QUERY_MS = float(os.getenv('SLOW_QUERY_MS', 200))
+    SLOW_QUERY_SAMPLE_RATE = float(os.getenv('SLOW_QUERY_SAMPLE_RATE', 1.0))
+    SLOW_QUERY_MAX_PER_MINUTE = int(os.getenv('SLOW_QUERY_MAX_PER_MINUTE', 30))
+    SLOW_QUERY_EXPLAIN = os.getenv('SLOW_QUERY_EXPLAIN', 'true').lower() == 'true'
+    SLOW_QUERY_BUFFER_SIZE = int(os.getenv('SLOW_QUERY_BUFFER_SIZE', 200))
+    SLOW_QUERY_LOG_FILE = os.getenv('SLOW_QUERY_LOG_FILE', 'logs/slow_queries.log')
+    SLOW_QUERY_LOG_MAX_BYTES = int(os.getenv('SLOW_QUERY_LOG_MAX_BYTES', 10 * 1024 * 1024))
+    SLOW_QUERY_LOG_BACKUPS = int(os.getenv('SLOW_QUERY_LOG_BACKUPS', 5))
+
+    # Query Detector Config (duplicate/N+1 statement reports; always on in debug and testing)
+    QUERY_DETECTOR = os.getenv('QUERY_DETECTOR', 'false').lower() == 'true'
+    QUERY_REPEAT_THRESHOLD = int(os.getenv('QUERY_REPEAT_THRESHOLD', 5))
+    QUERY_BUDGET_ENFORCE = os.getenv('QUERY_BUDGET_ENFORCE', 'false').lower() == 'true'
+
+    # Profiling Config (admins can also profile one request with `X-Profile: 1`)
+    PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+    PROFILE_INTERVAL_MS = float(os.getenv('PROFILE_INTERVAL_MS', 5))
+    PROFILE_MAX_DEPTH = int(os.getenv('PROFILE_MAX_DEPTH', 100))
+    PROFILE_DIR = os.getenv('PROFILE_DIR', 'logs/profiles')
+
+    # Response Cache Config (backend: 'memory' or 'package.module:ClassName')
+    RESPONSE_CACHE_ENABLED = os.getenv('RESPONSE_CACHE_ENABLED', 'true').lower() == 'true'
+    RESPONSE_CACHE_BACKEND = os.getenv('RESPONSE_CACHE_BACKEND', 'memory')
+    RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 60))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', 10000))
+    RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 32 * 1024 * 1024))
+
+    # Response Compression / Conditional GET Config
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))
+    COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', 6))
+    COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', 5))
+    ETAG_SETTLE_SECONDS = int(os.getenv('ETAG_SETTLE_SECONDS', 2))
 
     @staticmethod
     def get_db_connection():
         """
-        Returns a PyMySQL connection.
+        Returns a connection borrowed from the shared pool, or from a read
+        replica's pool for GET requests when DB_REPLICAS is set.
+        Calling close() on it hands it back to its pool.
+        """
+        from app.utils.replicas import route_connection
+        return route_connection()
+
+    @staticmethod
+    def create_db_connection(host=None, port=None, connect_timeout=None):
+        """
+        Opens a new PyMySQL connection (used by the pool) to the primary,
+        or to `host`/`port` (a read replica).
+        - connect_timeout: seconds to wait for the server (PyMySQL's 10 by default)
         - Localhost: no SSL
         - Remote (Aiven): SSL enabled using system CA
         """
+        from app.utils.instrumentation import instrumented
+        from pymysql.constants import CLIENT
+
+        host = host or Config.DB_HOST
         ssl_config = None
-        if Config.DB_HOST not in ("localhost", "127.0.0.1"):
+        if host not in ("localhost", "127.0.0.1"):
             # Enable SSL for remote hosts
             ssl_config = {"ssl": {}}
 
         return pymysql.connect(
-            host=Config.DB_HOST,
-            port=Config.DB_PORT,
+            host=host,
+            port=port or Config.DB_PORT,
             user=Config.DB_USER,
             password=Config.DB_PASSWORD,
             database=Config.DB_NAME,
-            cursorclass=pymysql.cursors.DictCursor,
+            cursorclass=instrumented(pymysql.cursors.DictCursor),
+            # rowcount of UPDATE is rows matched, not rows changed, so it
+            # doubles as an existence check
+            client_flag=CLIENT.FOUND_ROWS,
+            connect_timeout=connect_timeout or 10,
             ssl=ssl_config
         )
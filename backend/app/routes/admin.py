@@ -0,0 +1,63 @@
+from flask import Blueprint, request, jsonify
+from app.utils.auth import token_required, role_required
+from app.utils.pagination import parse_limit
+from app.utils.response_cache import get_cache
+from app.utils.slow_queries import get_slow_query_log
+
+bp = Blueprint('admin', __name__)
+
+
+@bp.route('/cache', methods=['GET'])
+@token_required
+@role_required(['admin'])
+def cache_stats():
+    """Response cache hit/miss counters and size"""
+    try:
+        return jsonify({
+            'success': True,
+            'data': get_cache().stats()
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/cache', methods=['DELETE'])
+@token_required
+@role_required(['admin'])
+def clear_cache():
+    """Drop every cached response in this process"""
+    try:
+        get_cache().clear()
+        return jsonify({
+            'success': True,
+            'message': 'Response cache cleared'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/slow-queries', methods=['GET'])
+@token_required
+@role_required(['admin'])
+def slow_queries():
+    """Recently captured slow statements with their plans, newest first (?limit=N)"""
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    log = get_slow_query_log()
+    if log is None:
+        return jsonify({'success': False, 'message': 'Slow-query log is disabled'}), 404
+    
+    try:
+        return jsonify({
+            'success': True,
+            'stats': log.stats(),
+            'data': log.entries(limit)
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -1,6 +1,8 @@
 from flask import Blueprint, request, jsonify
-from app.config import Config
-from app.utils.auth import hash_password, verify_password, create_token
+from app.utils.db import get_db
+from app.utils.auth import (hash_password, verify_password, needs_rehash, create_token, hashing_busy_response,
+                            token_required, role_required, revocation_list)
+from app.utils.hashing import HashingBusyError
 from app.utils.validators import validate_email, validate_required_fields
 
 bp = Blueprint('auth', __name__)
@@ -29,8 +31,7 @@ def register():
         return jsonify({'success': False, 'message': 'Password must be at least 6 characters'}), 400
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         # Check if email already exists
         cursor.execute("SELECT user_id FROM users WHERE email = %s", (data['email'],))
@@ -46,15 +47,11 @@ def register():
             VALUES (%s, %s, %s, %s, %s)
         """, (data['full_name'], data['email'], data.get('phone'), password_hash, data['role']))
         
-        conn.commit()
         user_id = cursor.lastrowid
         
         # Create token
         token = create_token(user_id, data['role'])
         
-        cursor.close()
-        conn.close()
-        
         return jsonify({
             'success': True,
             'message': 'User registered successfully',
@@ -67,6 +64,8 @@ def register():
             }
         }), 201
         
+    except HashingBusyError:
+        return hashing_busy_response()
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
@@ -89,8 +88,7 @@ def login():
         return jsonify({'success': False, 'message': 'Email or phone number is required'}), 400
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         # Try to find user by email or phone
         if data.get('email'):
@@ -105,8 +103,6 @@ def login():
             """, (data['phone'],))
         
         user = cursor.fetchone()
-        cursor.close()
-        conn.close()
         
         if not user:
             return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
@@ -115,6 +111,16 @@ def login():
         if not verify_password(data['password'], user['password_hash']):
             return jsonify({'success': False, 'message': 'Invalid credentials'}), 401
         
+        # Upgrade the stored hash if BCRYPT_ROUNDS changed since it was made
+        if needs_rehash(user['password_hash']):
+            try:
+                cursor.execute(
+                    "UPDATE users SET password_hash = %s WHERE user_id = %s",
+                    (hash_password(data['password']), user['user_id'])
+                )
+            except HashingBusyError:
+                pass  # Try again on a later login
+        
         # Create token
         token = create_token(user['user_id'], user['role'])
         
@@ -131,5 +137,48 @@ def login():
             }
         }), 200
         
+    except HashingBusyError:
+        return hashing_busy_response()
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/logout', methods=['POST'])
+@token_required
+def logout():
+    """Revoke the token used for this request"""
+    try:
+        cursor = get_db().cursor()
+        
+        payload = request.token_payload
+        if payload.get('jti'):
+            revocation_list.revoke_token(cursor, payload)
+        else:
+            # Tokens issued before jti existed can only be revoked per user
+            revocation_list.revoke_user(cursor, payload['user_id'])
+        
+        return jsonify({
+            'success': True,
+            'message': 'Logged out successfully'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/revoke/<int:user_id>', methods=['POST'])
+@token_required
+@role_required(['admin'])
+def revoke_user_tokens(user_id):
+    """Revoke every token issued to a user so far (e.g. after a role change)"""
+    try:
+        cursor = get_db().cursor()
+        revocation_list.revoke_user(cursor, user_id)
+        
+        return jsonify({
+            'success': True,
+            'message': 'User tokens revoked'
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -1,47 +1,92 @@
 from flask import Blueprint, request, jsonify
-from app.config import Config
-from app.utils.auth import token_required
+from app.utils.db import get_db
+from app.utils.due_doses import refresh_children
+from app.utils.etag import conditional
+from app.utils.response_cache import cached, cache_tags, invalidate
+from app.utils.query_budget import query_budget
+from app.utils.auth import token_required, role_required
 from app.utils.validators import validate_required_fields, validate_date
+from app.utils.pagination import keyset_page, parse_limit, InvalidCursorError
+from app.utils.streaming import stream_query, wants_stream
+from app.utils.bulk_import import BulkImporter, ImportFormatError, iter_records, request_format
 
 bp = Blueprint('children', __name__)
 
+CHILD_REQUIRED_FIELDS = ['mother_id', 'full_name', 'dob', 'gender']
+CHILD_COLUMNS = ['mother_id', 'full_name', 'dob', 'gender', 'birth_weight', 'birth_height']
+
+
+def validate_child(data):
+    """Return an error message for an invalid child payload, else None"""
+    is_valid, error_message = validate_required_fields(data, CHILD_REQUIRED_FIELDS)
+    if not is_valid:
+        return error_message
+    
+    if not validate_date(data['dob']):
+        return 'Invalid date format. Use YYYY-MM-DD'
+    
+    if data['gender'] not in ['male', 'female']:
+        return 'Gender must be male or female'
+    
+    return None
+
+
 @bp.route('', methods=['GET'])
 @token_required
+@conditional('children')
 def get_children():
-    """Get all children"""
+    """Get children, one keyset page at a time (ordered by child_id)"""
+    # Full-table export: stream rows instead of paging
+    if wants_stream():
+        if request.user_role not in ['admin', 'health_worker']:
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        try:
+            return stream_query("SELECT * FROM children ORDER BY child_id")
+        except Exception as e:
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("SELECT * FROM children")
-        children = cursor.fetchall()
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
         
-        cursor.close()
-        conn.close()
+        children, next_cursor = keyset_page(
+            cursor,
+            "SELECT * FROM children",
+            [],
+            keys=[('child_id', 'child_id')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit
+        )
         
         return jsonify({
             'success': True,
-            'data': children
+            'data': children,
+            'next_cursor': next_cursor
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
 @bp.route('/<int:child_id>', methods=['GET'])
 @token_required
+@cached('child:{child_id}')
+@query_budget(2)
+@conditional('children')
 def get_child(child_id):
     """Get single child by ID"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("SELECT * FROM children WHERE child_id = %s", (child_id,))
         child = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
-        
         if not child:
             return jsonify({'success': False, 'message': 'Child not found'}), 404
         
@@ -56,17 +101,17 @@ def get_child(child_id):
 
 @bp.route('/mother/<int:mother_id>', methods=['GET'])
 @token_required
+@cached('children', 'mother:{mother_id}:children')
+@query_budget(2)
+@conditional('children')
 def get_mother_children(mother_id):
     """Get all children for a specific mother"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("SELECT * FROM children WHERE mother_id = %s", (mother_id,))
         children = cursor.fetchall()
-        
-        cursor.close()
-        conn.close()
+        cache_tags(*[f"child:{child['child_id']}" for child in children])
         
         return jsonify({
             'success': True,
@@ -83,23 +128,12 @@ def create_child():
     """Create child profile"""
     data = request.get_json()
     
-    # Validate required fields
-    required_fields = ['mother_id', 'full_name', 'dob', 'gender']
-    is_valid, error_message = validate_required_fields(data, required_fields)
-    if not is_valid:
+    error_message = validate_child(data)
+    if error_message:
         return jsonify({'success': False, 'message': error_message}), 400
     
-    # Validate date
-    if not validate_date(data['dob']):
-        return jsonify({'success': False, 'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
-    
-    # Validate gender
-    if data['gender'] not in ['male', 'female']:
-        return jsonify({'success': False, 'message': 'Gender must be male or female'}), 400
-    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             INSERT INTO children (mother_id, full_name, dob, gender, birth_weight, birth_height)
@@ -113,11 +147,11 @@ def create_child():
             data.get('birth_height')
         ))
         
-        conn.commit()
         child_id = cursor.lastrowid
         
-        cursor.close()
-        conn.close()
+        # Birth doses go straight into the due-dose queue
+        refresh_children(get_db(), [child_id])
+        invalidate(f"mother:{data['mother_id']}:children")
         
         return jsonify({
             'success': True,
@@ -131,13 +165,13 @@ def create_child():
 
 @bp.route('/<int:child_id>', methods=['PUT'])
 @token_required
+@query_budget(6)
 def update_child(child_id):
     """Update child profile"""
     data = request.get_json()
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         # Build update query
         update_fields = []
@@ -157,13 +191,13 @@ def update_child(child_id):
         query = f"UPDATE children SET {', '.join(update_fields)} WHERE child_id = %s"
         
         cursor.execute(query, values)
-        conn.commit()
         
         if cursor.rowcount == 0:
             return jsonify({'success': False, 'message': 'Child not found'}), 404
         
-        cursor.close()
-        conn.close()
+        if 'dob' in data:
+            refresh_children(get_db(), [child_id])
+        invalidate(f'child:{child_id}')
         
         return jsonify({
             'success': True,
@@ -172,3 +206,39 @@ def update_child(child_id):
         
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/import', methods=['POST'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def import_children():
+    """Bulk import child profiles from a CSV or NDJSON upload, committed in chunks"""
+    try:
+        fmt = request_format()
+    except ImportFormatError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    importer = BulkImporter(
+        get_db(),
+        'children',
+        CHILD_COLUMNS,
+        validate_child,
+        reference=('mother_id', 'mothers', 'mother_id', 'Mother not found'),
+        numeric_fields=['birth_weight', 'birth_height'],
+        after_insert=refresh_children
+    )
+    
+    try:
+        summary = importer.run(iter_records(request.stream, fmt, CHILD_REQUIRED_FIELDS))
+        invalidate('children')
+        
+        return jsonify({
+            'success': True,
+            'message': f"{summary['imported']} children imported, {summary['failed']} rows rejected",
+            **summary
+        }), 200
+        
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'message': str(e), **importer.summary()}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e), **importer.summary()}), 500
@@ -0,0 +1,159 @@
+from datetime import date, datetime
+from flask import Blueprint, g, request, jsonify
+from app.config import Config
+from app.utils.db import get_db
+from app.utils.auth import token_required, role_required
+from app.utils.cache import TTLCache
+
+bp = Blueprint('dashboard', __name__)
+
+# Dashboard payloads per (clinic, day); every nurse in a clinic shares one entry
+_worker_cache = TTLCache(ttl=Config.DASHBOARD_CACHE_TTL, maxsize=512)
+
+
+def invalidate_dashboards():
+    """
+    Drop every cached dashboard after a write to visits, vaccinations or
+    mothers (working out which clinics it touched would cost a query).
+    Done now and again once the request's transaction has finished.
+    """
+    _worker_cache.clear()
+    g.dashboards_stale = True
+
+
+@bp.teardown_app_request
+def clear_stale_dashboards(exc):
+    """Drop dashboards rebuilt from pre-commit data while the write was in flight"""
+    if g.pop('dashboards_stale', False):
+        _worker_cache.clear()
+
+
+def _scope_filters(clinic_id):
+    """
+    SQL fragments restricting visits and vaccinations to a clinic.
+    Records are attributed to a clinic through the health worker (hw_id)
+    who handled them; without a clinic the dashboard covers everything.
+    """
+    if clinic_id is None:
+        return '', '', []
+    visit_join = " JOIN health_workers hw ON v.hw_id = hw.hw_id AND hw.clinic_id = %s"
+    vaccination_join = " JOIN health_workers hw ON vac.hw_id = hw.hw_id AND hw.clinic_id = %s"
+    return visit_join, vaccination_join, [clinic_id]
+
+
+def build_worker_dashboard(cursor, clinic_id, today):
+    """Compute dashboard counts, every visit due today (or the next few) and the recent patients"""
+    visit_join, vaccination_join, scope = _scope_filters(clinic_id)
+    limit = Config.DASHBOARD_TOP_N
+
+    # Both counts are range scans on idx_visit_date
+    cursor.execute(
+        "SELECT COUNT(*) AS total FROM visits v" + visit_join +
+        " WHERE v.visit_date = %s AND v.status <> 'completed'",
+        tuple(scope + [today])
+    )
+    todays_visits = cursor.fetchone()['total']
+
+    cursor.execute(
+        "SELECT COUNT(*) AS total FROM visits v" + visit_join +
+        " WHERE v.visit_date > %s AND v.status <> 'completed'",
+        tuple(scope + [today])
+    )
+    upcoming_visits = cursor.fetchone()['total']
+
+    if clinic_id is None:
+        cursor.execute("SELECT COUNT(*) AS total FROM mothers")
+    else:
+        cursor.execute(
+            "SELECT COUNT(DISTINCT v.mother_id) AS total FROM visits v" + visit_join,
+            tuple(scope)
+        )
+    total_patients = cursor.fetchone()['total']
+
+    cursor.execute(
+        "SELECT COUNT(*) AS total FROM vaccinations vac" + vaccination_join,
+        tuple(scope)
+    )
+    total_vaccinations = cursor.fetchone()['total']
+
+    # All of today's appointments (the worker goes through every one) if there
+    # are any, otherwise the nearest DASHBOARD_TOP_N upcoming ones
+    visit_query = """
+        SELECT v.*, m.user_id, u.full_name as mother_name
+        FROM visits v
+        JOIN mothers m ON v.mother_id = m.mother_id
+        JOIN users u ON m.user_id = u.user_id
+    """ + visit_join
+    if todays_visits:
+        cursor.execute(
+            visit_query + " WHERE v.visit_date = %s AND v.status <> 'completed'"
+            " ORDER BY v.visit_id",
+            tuple(scope + [today])
+        )
+    else:
+        cursor.execute(
+            visit_query + " WHERE v.visit_date > %s AND v.status <> 'completed'"
+            " ORDER BY v.visit_date, v.visit_id LIMIT %s",
+            tuple(scope + [today, limit])
+        )
+    visits = cursor.fetchall()
+
+    patient_query = """
+        SELECT m.*, u.full_name, u.email, u.phone
+        FROM mothers m
+        JOIN users u ON m.user_id = u.user_id
+    """
+    if clinic_id is None:
+        cursor.execute(patient_query + " ORDER BY m.mother_id DESC LIMIT %s", (limit,))
+    else:
+        cursor.execute(
+            patient_query + " WHERE m.mother_id IN (SELECT v.mother_id FROM visits v" + visit_join + ")"
+            " ORDER BY m.mother_id DESC LIMIT %s",
+            tuple(scope + [limit])
+        )
+    recent_patients = cursor.fetchall()
+
+    return {
+        'clinic_id': clinic_id,
+        'date': today.isoformat(),
+        'stats': {
+            'todays_visits': todays_visits,
+            'upcoming_visits': upcoming_visits,
+            'total_patients': total_patients,
+            'total_vaccinations': total_vaccinations,
+        },
+        'visits': visits,
+        'recent_patients': recent_patients,
+        'generated_at': datetime.utcnow().isoformat() + 'Z',
+    }
+
+
+@bp.route('/worker', methods=['GET'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def worker_dashboard():
+    """Aggregated health worker dashboard, cached per clinic for DASHBOARD_CACHE_TTL seconds"""
+    try:
+        cursor = get_db().cursor()
+
+        if request.user_role == 'admin':
+            clinic_id = request.args.get('clinic_id', type=int)
+        else:
+            cursor.execute("SELECT clinic_id FROM health_workers WHERE user_id = %s", (request.user_id,))
+            worker = cursor.fetchone()
+            clinic_id = worker['clinic_id'] if worker else None
+
+        today = date.today()
+        cache_key = (clinic_id, today)
+        dashboard = _worker_cache.get(cache_key)
+        if dashboard is None:
+            dashboard = build_worker_dashboard(cursor, clinic_id, today)
+            _worker_cache.set(cache_key, dashboard)
+
+        return jsonify({
+            'success': True,
+            'data': dashboard
+        }), 200
+
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
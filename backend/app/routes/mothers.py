@@ -1,31 +1,120 @@
 from flask import Blueprint, request, jsonify
-from app.config import Config
-from app.utils.auth import token_required
+from app.utils.db import get_db
+from app.utils.etag import conditional
+from app.utils.response_cache import cached, invalidate
+from app.utils.query_budget import query_budget
+from app.utils.auth import token_required, role_required
 from app.utils.validators import validate_required_fields, validate_date
+from app.utils.pagination import keyset_page, parse_limit, InvalidCursorError
+from app.utils.streaming import stream_query, wants_stream
+from app.routes.dashboard import invalidate_dashboards
 
 bp = Blueprint('mothers', __name__)
 
 @bp.route('', methods=['GET'])
 @token_required
+@conditional('mothers', 'users')
 def get_mothers():
-    """Get all mothers"""
+    """Get mothers, one keyset page at a time (ordered by mother_id)"""
+    query = """
+        SELECT m.*, u.full_name, u.email, u.phone
+        FROM mothers m
+        JOIN users u ON m.user_id = u.user_id
+    """
+    
+    # Full-table export: stream rows instead of paging
+    if wants_stream():
+        if request.user_role not in ['admin', 'health_worker']:
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        try:
+            return stream_query(query + " ORDER BY m.mother_id")
+        except Exception as e:
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
+        
+        mothers, next_cursor = keyset_page(
+            cursor,
+            query,
+            [],
+            keys=[('m.mother_id', 'mother_id')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': mothers,
+            'next_cursor': next_cursor
+        }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+# Related records that GET /me can embed via ?include=
+ME_INCLUDES = {
+    'children': """
+        SELECT * FROM children
+        WHERE mother_id = %s
+    """,
+    'visits': """
+        SELECT * FROM visits
+        WHERE mother_id = %s
+        ORDER BY visit_date DESC
+    """,
+    'vaccinations': """
+        SELECT v.*, c.full_name as child_name
+        FROM vaccinations v
+        JOIN children c ON v.child_id = c.child_id
+        WHERE c.mother_id = %s
+        ORDER BY v.date_given DESC
+    """,
+}
+
+
+@bp.route('/me', methods=['GET'])
+@token_required
+@role_required(['mother'])
+@conditional('mothers', 'users', 'children', 'visits', 'vaccinations')
+def get_my_profile():
+    """Get the logged-in mother's profile, optionally with ?include=children,visits,vaccinations"""
+    includes = [name.strip() for name in request.args.get('include', '').split(',') if name.strip()]
+    unknown = [name for name in includes if name not in ME_INCLUDES]
+    if unknown:
+        return jsonify({'success': False, 'message': f"Unknown include: {', '.join(unknown)}"}), 400
+    
+    try:
+        cursor = get_db().cursor()
+        
+        # Resolved through idx_mother_user rather than scanning all mothers
         cursor.execute("""
             SELECT m.*, u.full_name, u.email, u.phone
             FROM mothers m
             JOIN users u ON m.user_id = u.user_id
-        """)
+            WHERE m.user_id = %s
+        """, (request.user_id,))
         
-        mothers = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        mother = cursor.fetchone()
+        
+        if not mother:
+            return jsonify({'success': False, 'message': 'Mother profile not found'}), 404
+        
+        for name in includes:
+            cursor.execute(ME_INCLUDES[name], (mother['mother_id'],))
+            mother[name] = cursor.fetchall()
         
         return jsonify({
             'success': True,
-            'data': mothers
+            'data': mother
         }), 200
         
     except Exception as e:
@@ -34,11 +123,13 @@ def get_mothers():
 
 @bp.route('/<int:mother_id>', methods=['GET'])
 @token_required
+@cached('mother:{mother_id}')
+@query_budget(2)
+@conditional('mothers', 'users')
 def get_mother(mother_id):
     """Get single mother by ID"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             SELECT m.*, u.full_name, u.email, u.phone
@@ -48,8 +139,6 @@ def get_mother(mother_id):
         """, (mother_id,))
         
         mother = cursor.fetchone()
-        cursor.close()
-        conn.close()
         
         if not mother:
             return jsonify({'success': False, 'message': 'Mother not found'}), 404
@@ -80,8 +169,7 @@ def create_mother():
         return jsonify({'success': False, 'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             INSERT INTO mothers (user_id, age, blood_group, pregnancy_stage, 
@@ -98,10 +186,8 @@ def create_mother():
             data.get('emergency_contact')
         ))
         
-        conn.commit()
         mother_id = cursor.lastrowid
-        cursor.close()
-        conn.close()
+        invalidate_dashboards()
         
         return jsonify({
             'success': True,
@@ -115,20 +201,13 @@ def create_mother():
 
 @bp.route('/<int:mother_id>', methods=['PUT'])
 @token_required
+@query_budget(1)
 def update_mother(mother_id):
     """Update mother profile"""
     data = request.get_json()
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
-        
-        # First, check if the mother exists
-        cursor.execute("SELECT mother_id FROM mothers WHERE mother_id = %s", (mother_id,))
-        if not cursor.fetchone():
-            cursor.close()
-            conn.close()
-            return jsonify({'success': False, 'message': 'Mother not found'}), 404
+        cursor = get_db().cursor()
         
         # Build update query dynamically
         update_fields = []
@@ -143,8 +222,6 @@ def update_mother(mother_id):
                 # Validate date fields if they have non-null values
                 if field == 'expected_delivery' and data[field]:
                     if not validate_date(data[field]):
-                        cursor.close()
-                        conn.close()
                         return jsonify({'success': False, 'message': 'Invalid expected_delivery date format. Use YYYY-MM-DD'}), 400
                 
                 update_fields.append(f"{field} = %s")
@@ -152,18 +229,19 @@ def update_mother(mother_id):
                 values.append(data[field] if data[field] != '' else None)
         
         if not update_fields:
-            cursor.close()
-            conn.close()
             return jsonify({'success': False, 'message': 'No fields to update'}), 400
         
         values.append(mother_id)
         query = f"UPDATE mothers SET {', '.join(update_fields)} WHERE mother_id = %s"
         
         cursor.execute(query, values)
-        conn.commit()
         
-        cursor.close()
-        conn.close()
+        # rowcount counts matched rows (CLIENT.FOUND_ROWS), so 0 means no such mother
+        if cursor.rowcount == 0:
+            return jsonify({'success': False, 'message': 'Mother not found'}), 404
+        
+        invalidate(f'mother:{mother_id}')
+        invalidate_dashboards()
         
         return jsonify({
             'success': True,
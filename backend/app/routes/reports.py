@@ -0,0 +1,159 @@
+import threading
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from app.utils.db import get_db
+from app.utils.auth import token_required, role_required
+from app.utils.validators import validate_date
+from app.utils.pagination import keyset_page, parse_limit, InvalidCursorError
+from app.utils.defaulters import build_defaulter_reports, week_start
+
+bp = Blueprint('reports', __name__)
+
+# The one background run of the defaulter job this process may have going
+_job_lock = threading.Lock()
+_job = {'running': False, 'started_at': None, 'finished_at': None, 'results': None, 'error': None}
+
+
+def _worker_clinic(cursor):
+    """Clinic of the calling health worker (None for admins)"""
+    if request.user_role == 'admin':
+        return None
+    cursor.execute("SELECT clinic_id FROM health_workers WHERE user_id = %s", (request.user_id,))
+    worker = cursor.fetchone()
+    return worker['clinic_id'] if worker else None
+
+
+def _run_job():
+    try:
+        results = build_defaulter_reports()
+        error = None
+    except Exception as e:
+        results, error = None, str(e)
+    with _job_lock:
+        _job.update({'running': False, 'finished_at': datetime.utcnow().isoformat(), 'results': results, 'error': error})
+
+
+@bp.route('/defaulters', methods=['GET'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def list_defaulter_reports():
+    """Latest completed defaulter reports (one per clinic), optionally for ?week=YYYY-MM-DD"""
+    week = request.args.get('week')
+    if week and not validate_date(week):
+        return jsonify({'success': False, 'message': 'Invalid week format. Use YYYY-MM-DD'}), 400
+    
+    try:
+        cursor = get_db().cursor()
+        
+        where = ["r.status = 'complete'"]
+        params = []
+        if week:
+            where.append("r.week_start = %s")
+            params.append(week_start(datetime.strptime(week, '%Y-%m-%d').date()))
+        else:
+            where.append("r.week_start = (SELECT MAX(week_start) FROM defaulter_reports WHERE status = 'complete')")
+        
+        if request.user_role != 'admin':
+            where.append("r.clinic_id <=> %s")
+            params.append(_worker_clinic(cursor))
+        
+        cursor.execute(f"""
+            SELECT r.*, c.name AS clinic_name, c.location AS clinic_location
+            FROM defaulter_reports r
+            LEFT JOIN clinics c ON r.clinic_id = c.clinic_id
+            WHERE {' AND '.join(where)}
+            ORDER BY r.clinic_id IS NULL, r.clinic_id
+        """, params)
+        reports = cursor.fetchall()
+        
+        return jsonify({
+            'success': True,
+            'data': reports
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/defaulters/<int:report_id>', methods=['GET'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def get_defaulter_report(report_id):
+    """One report's defaulters, grouped by location (keyset paginated, optional ?kind=visit|dose)"""
+    kind = request.args.get('kind')
+    if kind is not None and kind not in ['visit', 'dose']:
+        return jsonify({'success': False, 'message': 'kind must be visit or dose'}), 400
+    
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
+        
+        cursor.execute("SELECT * FROM defaulter_reports WHERE report_id = %s", (report_id,))
+        report = cursor.fetchone()
+        if not report:
+            return jsonify({'success': False, 'message': 'Report not found'}), 404
+        
+        if request.user_role != 'admin' and report['clinic_id'] != _worker_clinic(cursor):
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        
+        where = ["d.report_id = %s"]
+        params = [report_id]
+        if kind:
+            where.append("d.kind = %s")
+            params.append(kind)
+        
+        # Rows were written in location order, so defaulter_id order keeps locations together
+        defaulters, next_cursor = keyset_page(
+            cursor,
+            "SELECT d.* FROM defaulters d",
+            params,
+            keys=[('d.defaulter_id', 'defaulter_id')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit,
+            where=where
+        )
+        
+        return jsonify({
+            'success': True,
+            'report': report,
+            'data': defaulters,
+            'next_cursor': next_cursor
+        }), 200
+        
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/defaulters/run', methods=['POST'])
+@token_required
+@role_required(['admin'])
+def run_defaulter_reports():
+    """Start building this week's reports for all clinics in the background"""
+    with _job_lock:
+        if _job['running']:
+            return jsonify({'success': False, 'message': 'Defaulter report job already running', 'job': dict(_job)}), 409
+        _job.update({'running': True, 'started_at': datetime.utcnow().isoformat(),
+                     'finished_at': None, 'results': None, 'error': None})
+    
+    threading.Thread(target=_run_job, name='defaulter-reports', daemon=True).start()
+    
+    return jsonify({
+        'success': True,
+        'message': 'Defaulter report job started',
+        'week_start': week_start().isoformat()
+    }), 202
+
+
+@bp.route('/defaulters/run', methods=['GET'])
+@token_required
+@role_required(['admin'])
+def defaulter_job_status():
+    """State of the last background run started from this process"""
+    with _job_lock:
+        return jsonify({'success': True, 'data': dict(_job)}), 200
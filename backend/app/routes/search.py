@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from app.config import Config
+from app.utils.db import get_db
+from app.utils.auth import token_required, role_required
+from app.utils.pagination import encode_cursor, decode_cursor, parse_limit, InvalidCursorError
+from app.utils.search import SEARCH_TYPES, build_boolean_query, search_records
+
+bp = Blueprint('search', __name__)
+
+@bp.route('', methods=['GET'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def search():
+    """Ranked full-text search across mothers, children, visits and vaccinations"""
+    boolean_query = build_boolean_query(request.args.get('q', ''))
+    if not boolean_query:
+        return jsonify({'success': False, 'message': 'Search term must be at least 2 characters'}), 400
+    
+    record_type = request.args.get('type')
+    if record_type and record_type not in SEARCH_TYPES:
+        return jsonify({'success': False, 'message': f"type must be one of: {', '.join(SEARCH_TYPES)}"}), 400
+    types = [record_type] if record_type else SEARCH_TYPES
+    
+    try:
+        limit = parse_limit(request.args.get('limit'), default=Config.SEARCH_DEFAULT_LIMIT)
+        offset = 0
+        if request.args.get('cursor'):
+            offset = decode_cursor(request.args['cursor'], 1)[0]
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError('Invalid cursor')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    # Ranked results are only useful near the top; cap how deep clients can page
+    limit = max(min(limit, Config.SEARCH_MAX_RESULTS - offset), 0)
+    if limit == 0:
+        return jsonify({'success': True, 'data': [], 'next_cursor': None}), 200
+    
+    try:
+        cursor = get_db().cursor()
+        hits = search_records(cursor, boolean_query, types, limit, offset)
+        
+        next_cursor = None
+        if len(hits) > limit:
+            hits = hits[:limit]
+            if offset + limit < Config.SEARCH_MAX_RESULTS:
+                next_cursor = encode_cursor([offset + limit])
+        
+        return jsonify({
+            'success': True,
+            'data': hits,
+            'next_cursor': next_cursor
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta
+from flask import Blueprint, request, jsonify
+from app.config import Config
+from app.utils.db import get_db
+from app.utils.auth import token_required
+from app.utils.pagination import parse_limit, InvalidCursorError
+from app.utils.replicas import primary_reads
+from app.utils.sync import collect_changes, decode_watermark, encode_watermark, sync_cutoff
+
+bp = Blueprint('sync', __name__)
+
+@bp.route('', methods=['GET'])
+@primary_reads
+@token_required
+def sync():
+    """Records changed (and deleted) since a watermark, in compact batches"""
+    try:
+        state = decode_watermark(request.args.get('since'))
+        limit = parse_limit(request.args.get('limit'), default=Config.SYNC_PAGE_SIZE, maximum=Config.SYNC_MAX_PAGE_SIZE)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
+        
+        # Mothers sync their own records; staff sync everything
+        mother_id = None
+        if request.user_role == 'mother':
+            cursor.execute("SELECT mother_id FROM mothers WHERE user_id = %s", (request.user_id,))
+            mother = cursor.fetchone()
+            if not mother:
+                return jsonify({'success': False, 'message': 'Mother profile not found'}), 404
+            mother_id = mother['mother_id']
+        
+        cutoff = sync_cutoff(cursor)
+        
+        # Deletions are only remembered for SYNC_TOMBSTONE_RETENTION_DAYS
+        if state['cutoff']:
+            last_sync = datetime.strptime(state['cutoff'], '%Y-%m-%d %H:%M:%S')
+            if cutoff - last_sync > timedelta(days=Config.SYNC_TOMBSTONE_RETENTION_DAYS):
+                return jsonify({
+                    'success': False,
+                    'message': 'Watermark has expired, start a full sync without since'
+                }), 410
+        
+        changes, deleted, state, has_more = collect_changes(cursor, state, cutoff, limit, mother_id)
+        state['cutoff'] = str(cutoff)
+        
+        return jsonify({
+            'success': True,
+            'data': changes,
+            'deleted': deleted,
+            'watermark': encode_watermark(state),
+            'has_more': has_more
+        }), 200
+        
+    except (InvalidCursorError, ValueError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
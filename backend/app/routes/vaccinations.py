@@ -1,52 +1,121 @@
+from datetime import date, timedelta
 from flask import Blueprint, request, jsonify
 from app.config import Config
-from app.utils.auth import token_required
+from app.utils.db import get_db
+from app.utils.due_doses import refresh_children
+from app.utils.etag import conditional
+from app.utils.response_cache import invalidate
+from app.utils.query_budget import query_budget
+from app.utils.auth import token_required, role_required
 from app.utils.validators import validate_required_fields, validate_date
+from app.utils.cache import TTLCache
+from app.utils.pagination import keyset_page, parse_limit, encode_cursor, decode_cursor, InvalidCursorError
+from app.utils.streaming import stream_query, wants_stream
+from app.utils.vaccine_schedule import STATUSES, get_engine, tuple_cursor
+from app.routes.dashboard import invalidate_dashboards
 
 bp = Blueprint('vaccinations', __name__)
 
+# Computed alerts for all children, shared by staff for ALERTS_CACHE_TTL seconds
+_alerts_cache = TTLCache(ttl=Config.ALERTS_CACHE_TTL, maxsize=4)
+
+# visit_type of the appointment booked for a vaccination's next_due_date
+FOLLOW_UP_VISIT_TYPE = 'postnatal'
+
+VACCINATION_COLUMNS = ['child_id', 'hw_id', 'vaccine_name', 'date_given',
+                       'next_due_date', 'administered_by', 'batch_number', 'notes']
+
+
+def validate_vaccination(data):
+    """Return an error message for an invalid vaccination payload, else None"""
+    if not isinstance(data, dict):
+        return 'Each vaccination must be an object'
+    
+    required_fields = ['child_id', 'vaccine_name', 'date_given']
+    is_valid, error_message = validate_required_fields(data, required_fields)
+    if not is_valid:
+        return error_message
+    
+    if not validate_date(data['date_given']):
+        return 'Invalid date_given format. Use YYYY-MM-DD'
+    
+    if 'next_due_date' in data and data['next_due_date']:
+        if not validate_date(data['next_due_date']):
+            return 'Invalid next_due_date format. Use YYYY-MM-DD'
+    
+    return None
+
+
+def follow_up_notes(child_name, data):
+    """Notes for the visit booked for the next dose"""
+    visit_notes = f"Next vaccination appointment for {child_name}: {data['vaccine_name']}"
+    if data.get('notes'):
+        visit_notes += f" | Vaccine notes: {data['notes']}"
+    return visit_notes
+
+
 @bp.route('', methods=['GET'])
 @token_required
+@conditional('vaccinations', 'children')
 def get_vaccinations():
-    """Get all vaccinations"""
+    """Get vaccinations (most recent first, keyset paginated)"""
+    query = """
+        SELECT v.*, c.full_name as child_name
+        FROM vaccinations v
+        JOIN children c ON v.child_id = c.child_id
+    """
+    
+    # Full-table export: stream rows instead of paging
+    if wants_stream():
+        if request.user_role not in ['admin', 'health_worker']:
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        try:
+            return stream_query(query + " ORDER BY v.vaccine_id")
+        except Exception as e:
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT v.*, c.full_name as child_name
-            FROM vaccinations v
-            JOIN children c ON v.child_id = c.child_id
-            ORDER BY v.date_given DESC
-        """)
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
         
-        vaccinations = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        # vaccine_id breaks ties between doses given on the same date
+        vaccinations, next_cursor = keyset_page(
+            cursor,
+            query,
+            [],
+            keys=[('v.date_given', 'date_given'), ('v.vaccine_id', 'vaccine_id')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit,
+            descending=True
+        )
         
         return jsonify({
             'success': True,
-            'data': vaccinations
+            'data': vaccinations,
+            'next_cursor': next_cursor
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
 @bp.route('/<int:vaccine_id>', methods=['GET'])
 @token_required
+@conditional('vaccinations')
 def get_vaccination(vaccine_id):
     """Get single vaccination"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("SELECT * FROM vaccinations WHERE vaccine_id = %s", (vaccine_id,))
         vaccination = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
-        
         if not vaccination:
             return jsonify({'success': False, 'message': 'Vaccination not found'}), 404
         
@@ -61,11 +130,11 @@ def get_vaccination(vaccine_id):
 
 @bp.route('/child/<int:child_id>', methods=['GET'])
 @token_required
+@conditional('vaccinations')
 def get_child_vaccinations(child_id):
     """Get all vaccinations for a specific child"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             SELECT * FROM vaccinations 
@@ -74,8 +143,6 @@ def get_child_vaccinations(child_id):
         """, (child_id,))
         
         vaccinations = cursor.fetchall()
-        cursor.close()
-        conn.close()
         
         return jsonify({
             'success': True,
@@ -86,40 +153,171 @@ def get_child_vaccinations(child_id):
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@bp.route('/alerts', methods=['GET'])
+@token_required
+def get_vaccination_alerts():
+    """Overdue, due and upcoming doses from the vaccine schedule (keyset paginated)"""
+    status = request.args.get('status')
+    if status is not None and status not in STATUSES:
+        return jsonify({'success': False, 'message': f"status must be one of: {', '.join(STATUSES)}"}), 400
+    
+    try:
+        limit = parse_limit(request.args.get('limit'))
+        after = None
+        if request.args.get('cursor'):
+            after = decode_cursor(request.args.get('cursor'), 1)[0]
+            if not isinstance(after, int):
+                raise InvalidCursorError('Invalid cursor')
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        db = get_db()
+        cursor = db.cursor()
+        engine = get_engine(Config.VACCINE_SCHEDULE)
+        today = date.today()
+        
+        if request.user_role == 'mother':
+            cursor.execute("SELECT mother_id FROM mothers WHERE user_id = %s", (request.user_id,))
+            mother = cursor.fetchone()
+            if not mother:
+                return jsonify({'success': False, 'message': 'Mother profile not found'}), 404
+            alerts = engine.load(tuple_cursor(db), today, mother['mother_id'],
+                                 Config.ALERT_GRACE_DAYS, Config.ALERT_WINDOW_DAYS)
+        else:
+            cache_key = (Config.VACCINE_SCHEDULE, today)
+            alerts = _alerts_cache.get(cache_key)
+            if alerts is None:
+                alerts = engine.load(tuple_cursor(db), today, None,
+                                     Config.ALERT_GRACE_DAYS, Config.ALERT_WINDOW_DAYS)
+                _alerts_cache.set(cache_key, alerts)
+        
+        rows, last_key = alerts.page(limit, after, status)
+        
+        # Names and contacts for this page only
+        child_ids = sorted({row['child_id'] for row in rows})
+        details = {}
+        if child_ids:
+            placeholders = ', '.join(['%s'] * len(child_ids))
+            cursor.execute(f"""
+                SELECT c.child_id, c.full_name AS child_name, c.mother_id,
+                       u.full_name AS mother_name, u.phone AS mother_phone
+                FROM children c
+                JOIN mothers m ON c.mother_id = m.mother_id
+                JOIN users u ON m.user_id = u.user_id
+                WHERE c.child_id IN ({placeholders})
+            """, child_ids)
+            details = {row['child_id']: row for row in cursor.fetchall()}
+        
+        data = []
+        for row in rows:
+            # Children deleted since the alerts were computed are skipped
+            if row['child_id'] in details:
+                data.append(dict(details[row['child_id']], **row))
+        
+        return jsonify({
+            'success': True,
+            'data': data,
+            'counts': alerts.counts(),
+            'next_cursor': encode_cursor([last_key]) if last_key is not None else None
+        }), 200
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/due', methods=['GET'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def get_due_doses():
+    """Overdue/due/upcoming doses from the due_doses queue, for one clinic (keyset paginated)"""
+    status = request.args.get('status', 'overdue')
+    if status not in STATUSES:
+        return jsonify({'success': False, 'message': f"status must be one of: {', '.join(STATUSES)}"}), 400
+    
+    try:
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
+        
+        if request.user_role == 'admin':
+            clinic_id = request.args.get('clinic_id', type=int)
+        else:
+            cursor.execute("SELECT clinic_id FROM health_workers WHERE user_id = %s", (request.user_id,))
+            worker = cursor.fetchone()
+            clinic_id = worker['clinic_id'] if worker else None
+        
+        # Each status is a due_date range on idx_due_clinic_status_date / idx_due_status_date
+        today = date.today()
+        grace_start = today - timedelta(days=Config.ALERT_GRACE_DAYS)
+        if status == 'overdue':
+            due_range, due_params = "d.due_date < %s", [grace_start]
+        elif status == 'due':
+            due_range, due_params = "d.due_date BETWEEN %s AND %s", [grace_start, today]
+        else:
+            due_range, due_params = "d.due_date > %s AND d.due_date <= %s", [
+                today, today + timedelta(days=Config.ALERT_WINDOW_DAYS)]
+        
+        where = ["d.status = 'pending'", due_range, "(d.expires_on IS NULL OR d.expires_on >= %s)"]
+        params = due_params + [today]
+        if clinic_id is not None:
+            where.insert(0, "d.clinic_id = %s")
+            params.insert(0, clinic_id)
+        
+        doses, next_cursor = keyset_page(
+            cursor,
+            """
+            SELECT d.child_id, d.antigen, d.vaccine_name, d.clinic_id, d.due_date,
+                   DATEDIFF(CURDATE(), d.due_date) AS days_late,
+                   c.full_name AS child_name, c.mother_id
+            FROM due_doses d
+            JOIN children c ON d.child_id = c.child_id
+            """,
+            params,
+            keys=[('d.due_date', 'due_date'), ('d.child_id', 'child_id'), ('d.antigen', 'antigen')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit,
+            where=where
+        )
+        
+        return jsonify({
+            'success': True,
+            'data': doses,
+            'clinic_id': clinic_id,
+            'next_cursor': next_cursor
+        }), 200
+        
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @bp.route('', methods=['POST'])
 @token_required
+@query_budget(8)
 def create_vaccination():
     """Record vaccination and automatically create next appointment visit"""
     data = request.get_json()
     
-    # Validate required fields
-    required_fields = ['child_id', 'vaccine_name', 'date_given']
-    is_valid, error_message = validate_required_fields(data, required_fields)
-    if not is_valid:
+    error_message = validate_vaccination(data)
+    if error_message:
         return jsonify({'success': False, 'message': error_message}), 400
     
-    # Validate dates
-    if not validate_date(data['date_given']):
-        return jsonify({'success': False, 'message': 'Invalid date_given format. Use YYYY-MM-DD'}), 400
-    
-    if 'next_due_date' in data and data['next_due_date']:
-        if not validate_date(data['next_due_date']):
-            return jsonify({'success': False, 'message': 'Invalid next_due_date format. Use YYYY-MM-DD'}), 400
-    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
-        # First, get the mother_id for this child
+        # Mother and name of the child (the name goes in follow-up visit notes)
         cursor.execute("""
-            SELECT mother_id FROM children WHERE child_id = %s
+            SELECT mother_id, full_name FROM children WHERE child_id = %s
         """, (data['child_id'],))
         
         child_result = cursor.fetchone()
         
         if not child_result:
-            cursor.close()
-            conn.close()
             return jsonify({'success': False, 'message': 'Child not found'}), 404
         
         mother_id = child_result['mother_id']
@@ -142,20 +340,17 @@ def create_vaccination():
         
         vaccine_id = cursor.lastrowid
         
+        # Move the child's due-dose queue on in the same transaction
+        refresh_children(get_db(), [data['child_id']])
+        invalidate_dashboards()
+        
         # If next_due_date is provided, automatically create a visit appointment
         visit_id = None
         if data.get('next_due_date'):
-            # Get child's name for the visit notes
-            cursor.execute("""
-                SELECT full_name FROM children WHERE child_id = %s
-            """, (data['child_id'],))
-            child_info = cursor.fetchone()
-            child_name = child_info['full_name'] if child_info else "Child"
+            child_name = child_result['full_name'] or "Child"
             
             # Create automatic visit appointment for next vaccination
-            visit_notes = f"Next vaccination appointment for {child_name}: {data['vaccine_name']}"
-            if data.get('notes'):
-                visit_notes += f" | Vaccine notes: {data['notes']}"
+            visit_notes = follow_up_notes(child_name, data)
             
             cursor.execute("""
                 INSERT INTO visits (mother_id, hw_id, visit_date, visit_type, notes)
@@ -164,15 +359,12 @@ def create_vaccination():
                 mother_id,
                 data.get('hw_id'),
                 data['next_due_date'],
-                'Postnatal',  # Using 'general' for vaccination follow-ups
+                FOLLOW_UP_VISIT_TYPE,
                 visit_notes
             ))
             
             visit_id = cursor.lastrowid
-        
-        conn.commit()
-        cursor.close()
-        conn.close()
+            invalidate(f'mother:{mother_id}:visits')
         
         response_data = {
             'success': True,
@@ -188,4 +380,129 @@ def create_vaccination():
         return jsonify(response_data), 201
         
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/batch', methods=['POST'])
+@token_required
+def create_vaccinations_batch():
+    """Record many doses (e.g. an outreach campaign) in one request and one transaction"""
+    data = request.get_json(silent=True) or {}
+    items = data.get('vaccinations') if isinstance(data, dict) else None
+    
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'vaccinations must be a non-empty list'}), 400
+    
+    if len(items) > Config.VACCINATION_BATCH_MAX:
+        return jsonify({
+            'success': False,
+            'message': f'A batch may contain at most {Config.VACCINATION_BATCH_MAX} vaccinations'
+        }), 400
+    
+    # Validate everything before touching the database
+    results = [{'index': index, 'success': False} for index in range(len(items))]
+    valid = []
+    for index, item in enumerate(items):
+        error_message = validate_vaccination(item)
+        if error_message:
+            results[index]['message'] = error_message
+        else:
+            valid.append(index)
+    
+    try:
+        cursor = get_db().cursor()
+        
+        # Mother and name of every child in one round trip
+        children = {}
+        child_ids = sorted({str(items[index]['child_id']) for index in valid})
+        if child_ids:
+            placeholders = ', '.join(['%s'] * len(child_ids))
+            cursor.execute(f"""
+                SELECT child_id, mother_id, full_name FROM children
+                WHERE child_id IN ({placeholders})
+            """, child_ids)
+            children = {str(row['child_id']): row for row in cursor.fetchall()}
+        
+        doses = []
+        for index in valid:
+            if str(items[index]['child_id']) in children:
+                doses.append(index)
+            else:
+                results[index]['message'] = 'Child not found'
+        
+        if doses:
+            vaccine_ids = _insert_rows(
+                cursor,
+                'vaccinations',
+                VACCINATION_COLUMNS,
+                [tuple(items[index].get(column) for column in VACCINATION_COLUMNS) for index in doses]
+            )
+            for index, vaccine_id in zip(doses, vaccine_ids):
+                results[index].update({'success': True, 'vaccine_id': vaccine_id})
+            
+            refresh_children(get_db(), [items[index]['child_id'] for index in doses])
+            invalidate_dashboards()
+            
+            # Follow-up appointments for doses with a next_due_date
+            follow_ups = [index for index in doses if items[index].get('next_due_date')]
+            if follow_ups:
+                visit_ids = _insert_rows(
+                    cursor,
+                    'visits',
+                    ['mother_id', 'hw_id', 'visit_date', 'visit_type', 'notes'],
+                    [(
+                        children[str(items[index]['child_id'])]['mother_id'],
+                        items[index].get('hw_id'),
+                        items[index]['next_due_date'],
+                        FOLLOW_UP_VISIT_TYPE,
+                        follow_up_notes(children[str(items[index]['child_id'])]['full_name'], items[index])
+                    ) for index in follow_ups]
+                )
+                for index, visit_id in zip(follow_ups, visit_ids):
+                    results[index]['visit_id'] = visit_id
+                invalidate(*{f"mother:{children[str(items[index]['child_id'])]['mother_id']}:visits"
+                             for index in follow_ups})
+        
+        recorded = len(doses)
+        failed = len(items) - recorded
+        if not recorded:
+            status_code = 400
+        elif failed:
+            status_code = 207
+        else:
+            status_code = 201
+        
+        return jsonify({
+            'success': recorded > 0,
+            'message': f'{recorded} vaccinations recorded, {failed} rejected',
+            'recorded': recorded,
+            'failed': failed,
+            'results': results
+        }), status_code
+        
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+def _insert_rows(cursor, table, columns, rows):
+    """
+    Insert rows with multi-row INSERTs and return their new ids in order.
+
+    Each chunk is sent as a single statement, for which InnoDB allocates a
+    consecutive id range, so a chunk's ids are lastrowid, lastrowid + step,
+    ... where step is auto_increment_increment.
+    """
+    cursor.execute("SELECT @@auto_increment_increment AS step")
+    step = cursor.fetchone()['step']
+    
+    placeholders = '(' + ', '.join(['%s'] * len(columns)) + ')'
+    query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES "
+    
+    ids = []
+    chunk_size = Config.VACCINATION_INSERT_CHUNK
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        cursor.execute(query + ', '.join([placeholders] * len(chunk)),
+                       [value for row in chunk for value in row])
+        ids.extend(cursor.lastrowid + i * step for i in range(len(chunk)))
+    return ids
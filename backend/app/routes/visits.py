@@ -1,63 +1,116 @@
 from flask import Blueprint, request, jsonify
-from app.config import Config
-from app.utils.auth import token_required
+from app.utils.db import get_db
+from app.utils.etag import conditional
+from app.utils.response_cache import cached, cache_tags, invalidate
+from app.utils.query_budget import query_budget
+from app.utils.auth import token_required, role_required
 from app.utils.validators import validate_required_fields, validate_date
+from app.utils.pagination import keyset_page, parse_limit, InvalidCursorError
+from app.utils.streaming import stream_query, wants_stream
+from app.utils.bulk_import import BulkImporter, ImportFormatError, iter_records, request_format
+from app.routes.dashboard import invalidate_dashboards
 
 bp = Blueprint('visits', __name__)
 
+VISIT_REQUIRED_FIELDS = ['mother_id', 'visit_date', 'visit_type']
+VISIT_COLUMNS = ['mother_id', 'hw_id', 'visit_date', 'visit_type', 'status', 'weight', 'blood_pressure', 'notes']
+
+
+def validate_visit(data):
+    """Return an error message for an invalid visit payload, else None"""
+    is_valid, error_message = validate_required_fields(data, VISIT_REQUIRED_FIELDS)
+    if not is_valid:
+        return error_message
+    
+    if not validate_date(data['visit_date']):
+        return 'Invalid date format. Use YYYY-MM-DD'
+    
+    if data['visit_type'] not in ['antenatal', 'postnatal', 'general']:
+        return 'Invalid visit type'
+    
+    if data.get('status') and data['status'] not in ['scheduled', 'completed', 'cancelled']:
+        return 'Invalid status'
+    
+    return None
+
+
 @bp.route('', methods=['GET'])
 @token_required
+@conditional('visits', 'users')
 def get_visits():
-    """Get all visits with optional status filter"""
+    """Get visits (newest first, keyset paginated) with optional status filter"""
+    status_filter = request.args.get('status')
+    
+    query = """
+        SELECT v.*, m.user_id, u.full_name as mother_name
+        FROM visits v
+        JOIN mothers m ON v.mother_id = m.mother_id
+        JOIN users u ON m.user_id = u.user_id
+    """
+    
+    where = []
+    params = []
+    if status_filter and status_filter in ['scheduled', 'completed', 'cancelled']:
+        where.append("v.status = %s")
+        params.append(status_filter)
+    
+    # Full-table export: stream rows instead of paging
+    if wants_stream():
+        if request.user_role not in ['admin', 'health_worker']:
+            return jsonify({'success': False, 'message': 'Insufficient permissions'}), 403
+        try:
+            export_query = query
+            if where:
+                export_query += " WHERE " + " AND ".join(where)
+            return stream_query(export_query + " ORDER BY v.visit_id", tuple(params))
+        except Exception as e:
+            return jsonify({'success': False, 'message': str(e)}), 500
+    
     try:
-        status_filter = request.args.get('status')
-        
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
-        
-        query = """
-            SELECT v.*, m.user_id, u.full_name as mother_name
-            FROM visits v
-            JOIN mothers m ON v.mother_id = m.mother_id
-            JOIN users u ON m.user_id = u.user_id
-        """
-        
-        params = []
-        if status_filter and status_filter in ['scheduled', 'completed', 'cancelled']:
-            query += " WHERE v.status = %s"
-            params.append(status_filter)
-        
-        query += " ORDER BY v.visit_date DESC"
-        
-        cursor.execute(query, tuple(params) if params else None)
+        limit = parse_limit(request.args.get('limit'))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    try:
+        cursor = get_db().cursor()
         
-        visits = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        # visit_id breaks ties between visits on the same date
+        visits, next_cursor = keyset_page(
+            cursor,
+            query,
+            params,
+            keys=[('v.visit_date', 'visit_date'), ('v.visit_id', 'visit_id')],
+            cursor_token=request.args.get('cursor'),
+            limit=limit,
+            descending=True,
+            where=where
+        )
         
         return jsonify({
             'success': True,
-            'data': visits
+            'data': visits,
+            'next_cursor': next_cursor
         }), 200
         
+    except InvalidCursorError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
 @bp.route('/<int:visit_id>', methods=['GET'])
 @token_required
+@cached('visit:{visit_id}')
+@query_budget(2)
+@conditional('visits')
 def get_visit(visit_id):
     """Get single visit"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("SELECT * FROM visits WHERE visit_id = %s", (visit_id,))
         visit = cursor.fetchone()
         
-        cursor.close()
-        conn.close()
-        
         if not visit:
             return jsonify({'success': False, 'message': 'Visit not found'}), 404
         
@@ -72,11 +125,13 @@ def get_visit(visit_id):
 
 @bp.route('/mother/<int:mother_id>', methods=['GET'])
 @token_required
+@cached('visits', 'mother:{mother_id}:visits')
+@query_budget(2)
+@conditional('visits')
 def get_mother_visits(mother_id):
     """Get all visits for a specific mother"""
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             SELECT * FROM visits 
@@ -85,8 +140,7 @@ def get_mother_visits(mother_id):
         """, (mother_id,))
         
         visits = cursor.fetchall()
-        cursor.close()
-        conn.close()
+        cache_tags(*[f"visit:{visit['visit_id']}" for visit in visits])
         
         return jsonify({
             'success': True,
@@ -103,23 +157,12 @@ def create_visit():
     """Create visit record"""
     data = request.get_json()
     
-    # Validate required fields
-    required_fields = ['mother_id', 'visit_date', 'visit_type']
-    is_valid, error_message = validate_required_fields(data, required_fields)
-    if not is_valid:
+    error_message = validate_visit(data)
+    if error_message:
         return jsonify({'success': False, 'message': error_message}), 400
     
-    # Validate date
-    if not validate_date(data['visit_date']):
-        return jsonify({'success': False, 'message': 'Invalid date format. Use YYYY-MM-DD'}), 400
-    
-    # Validate visit type
-    if data['visit_type'] not in ['antenatal', 'postnatal', 'general']:
-        return jsonify({'success': False, 'message': 'Invalid visit type'}), 400
-    
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
+        cursor = get_db().cursor()
         
         cursor.execute("""
             INSERT INTO visits (mother_id, hw_id, visit_date, visit_type, status, weight, blood_pressure, notes)
@@ -135,11 +178,9 @@ def create_visit():
             data.get('notes')
         ))
         
-        conn.commit()
         visit_id = cursor.lastrowid
-        
-        cursor.close()
-        conn.close()
+        invalidate(f"mother:{data['mother_id']}:visits")
+        invalidate_dashboards()
         
         return jsonify({
             'success': True,
@@ -153,6 +194,7 @@ def create_visit():
 
 @bp.route('/<int:visit_id>/status', methods=['PATCH'])
 @token_required
+@query_budget(1)
 def update_visit_status(visit_id):
     """Update visit status"""
     data = request.get_json()
@@ -166,28 +208,20 @@ def update_visit_status(visit_id):
         return jsonify({'success': False, 'message': 'Invalid status value'}), 400
     
     try:
-        conn = Config.get_db_connection()
-        cursor = conn.cursor()
-        
-        # Check if visit exists
-        cursor.execute("SELECT visit_id FROM visits WHERE visit_id = %s", (visit_id,))
-        visit = cursor.fetchone()
+        cursor = get_db().cursor()
         
-        if not visit:
-            cursor.close()
-            conn.close()
-            return jsonify({'success': False, 'message': 'Visit not found'}), 404
-        
-        # Update status
+        # Update status; rowcount counts matched rows (CLIENT.FOUND_ROWS)
         cursor.execute("""
             UPDATE visits 
             SET status = %s 
             WHERE visit_id = %s
         """, (data['status'], visit_id))
         
-        conn.commit()
-        cursor.close()
-        conn.close()
+        if cursor.rowcount == 0:
+            return jsonify({'success': False, 'message': 'Visit not found'}), 404
+        
+        invalidate(f'visit:{visit_id}')
+        invalidate_dashboards()
         
         return jsonify({
             'success': True,
@@ -195,4 +229,41 @@ def update_visit_status(visit_id):
         }), 200
         
     except Exception as e:
-        return jsonify({'success': False, 'message': str(e)}), 500
\ No newline at end of file
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@bp.route('/import', methods=['POST'])
+@token_required
+@role_required(['health_worker', 'admin'])
+def import_visits():
+    """Bulk import visits from a CSV or NDJSON upload, committed in chunks"""
+    try:
+        fmt = request_format()
+    except ImportFormatError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    
+    importer = BulkImporter(
+        get_db(),
+        'visits',
+        VISIT_COLUMNS,
+        validate_visit,
+        reference=('mother_id', 'mothers', 'mother_id', 'Mother not found'),
+        numeric_fields=['weight'],
+        defaults={'status': 'scheduled'}
+    )
+    
+    try:
+        summary = importer.run(iter_records(request.stream, fmt, VISIT_REQUIRED_FIELDS))
+        invalidate('visits')
+        invalidate_dashboards()
+        
+        return jsonify({
+            'success': True,
+            'message': f"{summary['imported']} visits imported, {summary['failed']} rows rejected",
+            **summary
+        }), 200
+        
+    except (ImportFormatError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'message': str(e), **importer.summary()}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': str(e), **importer.summary()}), 500
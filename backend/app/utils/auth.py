@@ -1,17 +1,66 @@
 import jwt
 import bcrypt
+import hashlib
+import threading
+import time
+import uuid
 from datetime import datetime, timedelta
 from functools import wraps
 from flask import request, jsonify
 from app.config import Config
+from app.utils.hashing import HashWorkerPool
+from app.utils.cache import TTLCache
+from app.utils.profiling import phase
+from app.utils.revocation import RevocationList
+
+_hash_pool = None
+_hash_pool_lock = threading.Lock()
+
+# Verified token payloads keyed by SHA-256 of the token, kept until `exp`
+_token_cache = TTLCache(ttl=Config.JWT_EXPIRATION_HOURS * 3600, maxsize=Config.TOKEN_CACHE_SIZE)
+
+revocation_list = RevocationList(refresh_interval=Config.REVOCATION_REFRESH_SECONDS)
+
+def get_hash_pool():
+    """Return the bcrypt worker pool, created on first use (after any fork)"""
+    global _hash_pool
+    if _hash_pool is None:
+        with _hash_pool_lock:
+            if _hash_pool is None:
+                _hash_pool = HashWorkerPool(
+                    workers=Config.BCRYPT_WORKERS,
+                    queue_depth=Config.BCRYPT_QUEUE_DEPTH,
+                    timeout=Config.BCRYPT_TIMEOUT
+                )
+    return _hash_pool
+
+def _hashpw(password):
+    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=Config.BCRYPT_ROUNDS)).decode('utf-8')
+
+def _checkpw(password, password_hash):
+    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
 
 def hash_password(password):
-    """Hash a password using bcrypt"""
-    return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    """Hash a password using bcrypt (raises HashingBusyError when saturated)"""
+    return get_hash_pool().run(_hashpw, password)
 
 def verify_password(password, password_hash):
-    """Verify a password against its hash"""
-    return bcrypt.checkpw(password.encode('utf-8'), password_hash.encode('utf-8'))
+    """Verify a password against its hash (raises HashingBusyError when saturated)"""
+    return get_hash_pool().run(_checkpw, password, password_hash)
+
+def needs_rehash(password_hash):
+    """True if the hash was made with a different work factor than BCRYPT_ROUNDS"""
+    try:
+        cost = int(password_hash.split('$')[2])
+    except (AttributeError, IndexError, ValueError):
+        return True
+    return cost != Config.BCRYPT_ROUNDS
+
+def hashing_busy_response():
+    """503 returned when the hashing pool rejects work"""
+    response = jsonify({'success': False, 'message': 'Server is busy, please try again shortly'})
+    response.headers['Retry-After'] = str(Config.BCRYPT_RETRY_AFTER)
+    return response, 503
 
 def create_token(user_id, role):
     """Create a JWT token for a user"""
@@ -19,7 +68,8 @@ def create_token(user_id, role):
         'user_id': user_id,
         'role': role,
         'exp': datetime.utcnow() + timedelta(hours=Config.JWT_EXPIRATION_HOURS),
-        'iat': datetime.utcnow()
+        'iat': datetime.utcnow(),
+        'jti': uuid.uuid4().hex
     }
     return jwt.encode(payload, Config.JWT_SECRET_KEY, algorithm='HS256')
 
@@ -33,31 +83,78 @@ def verify_token(token):
     except jwt.InvalidTokenError:
         return None
 
+def get_token_payload(token):
+    """
+    Return the payload of a valid, unrevoked token, or None.
+    Signature checks are cached per token, so repeat calls are a dict lookup.
+    """
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    payload = _token_cache.get(key)
+    if payload is None:
+        payload = verify_token(token)
+        if not payload:
+            return None
+        ttl = payload['exp'] - time.time()
+        if ttl <= 0:
+            return None
+        _token_cache.set(key, payload, ttl=ttl)
+    
+    if revocation_list.needs_refresh():
+        _refresh_revocations()
+    
+    if revocation_list.is_revoked(payload):
+        return None
+    return payload
+
+def _refresh_revocations():
+    """Reload revocations made by other workers"""
+    from app.utils.db_pool import get_pool
+    # From the primary even on GET requests: a lagging replica may not have the logout yet
+    try:
+        conn = get_pool().connection()
+        try:
+            revocation_list.refresh(conn.cursor())
+        finally:
+            conn.close()
+    except Exception:
+        # Keep serving with the current list; retry after the next interval
+        revocation_list.mark_refreshed()
+
+def _authenticate():
+    """Check the bearer token and set request.user_*; returns an error response or None"""
+    token = None
+    
+    # Get token from header
+    if 'Authorization' in request.headers:
+        auth_header = request.headers['Authorization']
+        try:
+            token = auth_header.split(' ')[1]  # Bearer TOKEN
+        except IndexError:
+            return jsonify({'success': False, 'message': 'Invalid token format'}), 401
+    
+    if not token:
+        return jsonify({'success': False, 'message': 'Token is missing'}), 401
+    
+    # Verify token
+    payload = get_token_payload(token)
+    if not payload:
+        return jsonify({'success': False, 'message': 'Token is invalid or expired'}), 401
+    
+    # Add user info to request context
+    request.user_id = payload['user_id']
+    request.user_role = payload['role']
+    request.token_payload = payload
+    return None
+
 def token_required(f):
     """Decorator to require valid JWT token"""
     @wraps(f)
     def decorated(*args, **kwargs):
-        token = None
-        
-        # Get token from header
-        if 'Authorization' in request.headers:
-            auth_header = request.headers['Authorization']
-            try:
-                token = auth_header.split(' ')[1]  # Bearer TOKEN
-            except IndexError:
-                return jsonify({'success': False, 'message': 'Invalid token format'}), 401
-        
-        if not token:
-            return jsonify({'success': False, 'message': 'Token is missing'}), 401
-        
-        # Verify token
-        payload = verify_token(token)
-        if not payload:
-            return jsonify({'success': False, 'message': 'Token is invalid or expired'}), 401
-        
-        # Add user info to request context
-        request.user_id = payload['user_id']
-        request.user_role = payload['role']
+        # Timed as the 'auth' phase when the request is being profiled
+        with phase('auth'):
+            error = _authenticate()
+        if error is not None:
+            return error
         
         return f(*args, **kwargs)
     
@@ -0,0 +1,230 @@
+import csv
+import io
+import json
+from decimal import Decimal, InvalidOperation
+
+import pymysql
+from flask import request
+
+from app.config import Config
+
+FORMATS = {
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+}
+
+
+class ImportFormatError(ValueError):
+    """Raised when the uploaded file cannot be parsed at all"""
+
+
+def request_format():
+    """csv or ndjson, from ?format= or the Content-Type header"""
+    fmt = request.args.get('format')
+    if fmt:
+        fmt = fmt.lower()
+    else:
+        fmt = FORMATS.get(request.mimetype)
+    if fmt not in ('csv', 'ndjson'):
+        raise ImportFormatError('Upload text/csv or application/x-ndjson (or pass ?format=csv|ndjson)')
+    return fmt
+
+
+def iter_records(stream, fmt, required_fields=()):
+    """
+    Yield (line, record) pairs from a CSV or NDJSON byte stream.
+
+    The body is decoded through a small buffer, so only one chunk of the
+    upload is in memory at a time. NDJSON lines that are not JSON objects
+    are yielded as (line, ImportFormatError) so they become row errors.
+    """
+    text = io.TextIOWrapper(io.BufferedReader(stream, Config.IMPORT_READ_BUFFER),
+                            encoding='utf-8-sig', newline='')
+
+    if fmt == 'csv':
+        reader = csv.DictReader(text)
+        missing = [field for field in required_fields if field not in (reader.fieldnames or [])]
+        if missing:
+            raise ImportFormatError(f"CSV header is missing columns: {', '.join(missing)}")
+        for record in reader:
+            # Blank cells mean "not given", like an absent JSON key
+            yield reader.line_num, {k: (v.strip() or None) if isinstance(v, str) else v
+                                    for k, v in record.items() if k is not None}
+        return
+
+    for line, raw in enumerate(text, start=1):
+        if not raw.strip():
+            continue
+        try:
+            record = json.loads(raw)
+        except ValueError:
+            yield line, ImportFormatError('Invalid JSON')
+            continue
+        if not isinstance(record, dict):
+            yield line, ImportFormatError('Each line must be a JSON object')
+            continue
+        yield line, record
+
+
+class BulkImporter:
+    """
+    Validates records one at a time and writes them in chunks.
+
+    Every `chunk_size` valid rows are checked against the referenced table
+    with one IN query, inserted with one multi-row INSERT and committed, so
+    memory stays flat and a large upload never sits in one transaction.
+    If a chunk is rejected by the database the rows are retried one by one
+    to find the offending ones. Row errors are reported with the line number
+    they came from (at most IMPORT_MAX_ERRORS are listed).
+
+    `after_insert(db, ids)` runs with the auto-increment ids of each insert
+    before it is committed, so derived rows land in the same transaction.
+    """
+
+    def __init__(self, db, table, columns, validate, reference=None, numeric_fields=(),
+                 defaults=None, chunk_size=None, max_errors=None, after_insert=None):
+        self.db = db
+        self.table = table
+        self.columns = columns
+        self.validate = validate
+        self.reference = reference
+        self.numeric_fields = numeric_fields
+        self.defaults = defaults or {}
+        self.chunk_size = chunk_size or Config.IMPORT_CHUNK_SIZE
+        self.max_errors = max_errors if max_errors is not None else Config.IMPORT_MAX_ERRORS
+        self.after_insert = after_insert
+        self.imported = 0
+        self.failed = 0
+        self.errors = []
+        self._chunk = []
+        self._cursor = None
+
+    @property
+    def cursor(self):
+        if self._cursor is None:
+            self._cursor = self.db.cursor()
+        return self._cursor
+
+    def run(self, records):
+        for line, record in records:
+            if isinstance(record, Exception):
+                self._error(line, str(record))
+                continue
+
+            try:
+                error_message = self.validate(record) or self._convert_numbers(record)
+            except (TypeError, ValueError):
+                error_message = 'Invalid value types'
+            if error_message:
+                self._error(line, error_message)
+                continue
+
+            row = tuple(self.defaults.get(column) if record.get(column) is None else record[column]
+                        for column in self.columns)
+            self._chunk.append((line, row))
+            if len(self._chunk) >= self.chunk_size:
+                self.flush()
+
+        self.flush()
+        return self.summary()
+
+    def summary(self):
+        return {
+            'imported': self.imported,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+    def flush(self):
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+
+        chunk = self._drop_missing_references(chunk)
+        if not chunk:
+            return
+
+        try:
+            self._insert([row for _, row in chunk])
+            self.db.commit()
+            self.imported += len(chunk)
+        except pymysql.err.MySQLError as e:
+            if not _is_row_error(e):
+                raise
+            self.db.rollback()
+            self._insert_one_by_one(chunk)
+
+    def _insert(self, rows):
+        placeholders = '(' + ', '.join(['%s'] * len(self.columns)) + ')'
+        self.cursor.execute(
+            f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES " +
+            ', '.join([placeholders] * len(rows)),
+            [value for row in rows for value in row]
+        )
+        if self.after_insert:
+            # lastrowid is the first id; InnoDB hands a multi-row INSERT
+            # with a known row count consecutive ids in every lock mode
+            first = self.cursor.lastrowid
+            self.after_insert(self.db, range(first, first + len(rows)))
+
+    def _insert_one_by_one(self, chunk):
+        for line, row in chunk:
+            try:
+                self._insert([row])
+                self.db.commit()
+                self.imported += 1
+            except pymysql.err.MySQLError as e:
+                if not _is_row_error(e):
+                    raise
+                self.db.rollback()
+                self._error(line, e.args[1] if len(e.args) > 1 else str(e))
+
+    def _drop_missing_references(self, chunk):
+        if not self.reference:
+            return chunk
+        field, table, column, message = self.reference
+        index = self.columns.index(field)
+        ids = sorted({str(row[index]) for _, row in chunk})
+
+        self.cursor.execute(
+            f"SELECT {column} FROM {table} WHERE {column} IN ({', '.join(['%s'] * len(ids))})",
+            ids
+        )
+        found = {str(row[column]) for row in self.cursor.fetchall()}
+
+        kept = []
+        for line, row in chunk:
+            if str(row[index]) in found:
+                kept.append((line, row))
+            else:
+                self._error(line, message)
+        return kept
+
+    def _convert_numbers(self, record):
+        for field in self.numeric_fields:
+            value = record.get(field)
+            if value is None or value == '':
+                record[field] = None
+                continue
+            try:
+                record[field] = Decimal(str(value))
+            except InvalidOperation:
+                return f'{field} must be a number'
+        return None
+
+    def _error(self, line, message):
+        self.failed += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append({'line': line, 'message': message})
+
+
+def _is_row_error(error):
+    """Server-side rejections of the data (as opposed to lost connections etc.)"""
+    code = error.args[0] if error.args and isinstance(error.args[0], int) else None
+    return isinstance(error, (pymysql.err.IntegrityError, pymysql.err.DataError,
+                              pymysql.err.OperationalError, pymysql.err.ProgrammingError)) \
+        and code is not None and 1000 <= code < 2000
@@ -0,0 +1,100 @@
+from flask import g
+from app.config import Config
+from app.utils.instrumentation import instrumented
+
+
+class DBSession:
+    """
+    Database session for a single request.
+
+    The connection is borrowed from the pool on first use and shared by every
+    query in the request. The app registers hooks (see init_db) that commit
+    successful requests, roll back failed ones and always give the connection
+    back to the pool.
+    """
+
+    def __init__(self, connect=None):
+        self._connect = connect or Config.get_db_connection
+        self._conn = None
+        self._cursors = []
+        self.finished = False
+        # Filled in by instrumented cursors (see app/utils/instrumentation.py)
+        self.query_count = 0
+        self.query_seconds = 0.0
+
+    @property
+    def is_open(self):
+        return self._conn is not None
+
+    @property
+    def connection(self):
+        """The underlying connection, opened lazily"""
+        if self._conn is None:
+            self._conn = self._connect()
+        return self._conn
+
+    def cursor(self, cursor_class=None):
+        """Create a cursor that is closed automatically at teardown"""
+        if cursor_class:
+            cursor = self.connection.cursor(instrumented(cursor_class))
+        else:
+            cursor = self.connection.cursor()
+        cursor._session = self
+        self._cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        if self._conn is not None:
+            self._conn.commit()
+
+    def rollback(self):
+        if self._conn is not None:
+            self._conn.rollback()
+
+    def close(self):
+        """Close open cursors and release the connection"""
+        cursors, self._cursors = self._cursors, []
+        for cursor in cursors:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            conn.close()
+
+
+def get_db():
+    """Return the database session bound to the current app context"""
+    if 'db_session' not in g:
+        g.db_session = DBSession()
+    return g.db_session
+
+
+def init_db(app):
+    """Register commit/rollback and release hooks on the app"""
+
+    @app.after_request
+    def finish_transaction(response):
+        session = g.get('db_session')
+        if session is not None and session.is_open:
+            if response.status_code < 400:
+                session.commit()
+            else:
+                session.rollback()
+            session.finished = True
+        return response
+
+    @app.teardown_appcontext
+    def release_db(exc):
+        session = g.pop('db_session', None)
+        if session is None:
+            return
+        try:
+            if exc is not None and not session.finished:
+                session.rollback()
+        except Exception:
+            pass
+        finally:
+            session.close()
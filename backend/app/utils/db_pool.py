@@ -0,0 +1,289 @@
+import threading
+import time
+from collections import deque
+
+from pymysql.constants import SERVER_STATUS
+
+
+class PoolTimeoutError(Exception):
+    """Raised when no connection could be borrowed within the timeout"""
+
+
+class _PoolEntry:
+    """A raw connection plus the bookkeeping the pool needs for it"""
+
+    __slots__ = ('conn', 'created_at', 'last_used')
+
+    def __init__(self, conn):
+        now = time.monotonic()
+        self.conn = conn
+        self.created_at = now
+        self.last_used = now
+
+
+class PooledConnection:
+    """
+    Proxy handed out by the pool.
+    Behaves like a PyMySQL connection, except close() returns the
+    underlying connection to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, entry):
+        self._pool = pool
+        self._entry = entry
+
+    def __getattr__(self, name):
+        if self._entry is None:
+            raise AttributeError(f"Connection already returned to the pool ({name})")
+        return getattr(self._entry.conn, name)
+
+    @property
+    def closed(self):
+        return self._entry is None
+
+    def close(self):
+        """Return the connection to the pool (safe to call twice)"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._release(entry)
+
+    def invalidate(self):
+        """Close the underlying connection instead of reusing it"""
+        entry, self._entry = self._entry, None
+        if entry is not None:
+            self._pool._discard(entry)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of PyMySQL connections.
+
+    - min_size connections are opened by prewarm() and kept around
+    - at most max_size connections exist at any time
+    - borrowers wait up to `timeout` seconds for a free connection
+    - idle connections are pinged before reuse after `ping_interval` seconds
+    - connections older than `max_lifetime` seconds are replaced
+    """
+
+    def __init__(self, connect, min_size=2, max_size=10, timeout=10.0,
+                 max_lifetime=1800, ping_interval=30):
+        if max_size < 1:
+            raise ValueError('max_size must be at least 1')
+        if min_size > max_size:
+            raise ValueError('min_size cannot be larger than max_size')
+
+        self._connect = connect
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.ping_interval = ping_interval
+
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition(threading.Lock())
+
+        self._stats = {
+            'created': 0,
+            'closed': 0,
+            'borrowed': 0,
+            'waited': 0,
+            'timeouts': 0,
+            'ping_failures': 0,
+            'expired': 0,
+            'total_wait_ms': 0.0,
+        }
+
+    # Public API
+
+    def prewarm(self):
+        """Open connections until the pool holds min_size of them"""
+        opened = 0
+        while True:
+            with self._cond:
+                if self._closed or self._size >= self.min_size:
+                    return opened
+                self._size += 1
+            try:
+                entry = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+            with self._cond:
+                self._idle.append(entry)
+                self._cond.notify()
+            opened += 1
+
+    def connection(self, timeout=None):
+        """Borrow a connection, waiting up to `timeout` seconds"""
+        timeout = self.timeout if timeout is None else timeout
+        start = time.monotonic()
+        deadline = start + timeout
+        waited = False
+
+        while True:
+            entry = None
+            should_open = False
+
+            with self._cond:
+                while True:
+                    if self._closed:
+                        raise PoolTimeoutError('Connection pool is closed')
+                    if self._idle:
+                        entry = self._idle.pop()
+                        break
+                    if self._size < self.max_size:
+                        self._size += 1
+                        should_open = True
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats['timeouts'] += 1
+                        raise PoolTimeoutError(
+                            f'Timed out after {timeout}s waiting for a database connection'
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if should_open:
+                try:
+                    entry = self._open()
+                except Exception:
+                    with self._cond:
+                        self._size -= 1
+                        self._cond.notify()
+                    raise
+            elif not self._is_usable(entry):
+                self._discard(entry)
+                continue
+
+            with self._cond:
+                self._stats['borrowed'] += 1
+                if waited:
+                    self._stats['waited'] += 1
+                self._stats['total_wait_ms'] += (time.monotonic() - start) * 1000
+
+            return PooledConnection(self, entry)
+
+    def stats(self):
+        """Snapshot of pool counters"""
+        with self._cond:
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+            })
+        total_wait_ms = snapshot.pop('total_wait_ms')
+        borrowed = snapshot['borrowed']
+        snapshot['avg_wait_ms'] = round(total_wait_ms / borrowed, 3) if borrowed else 0.0
+        return snapshot
+
+    def close(self):
+        """Close every idle connection and refuse further borrows"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = list(self._idle), deque()
+            self._cond.notify_all()
+        for entry in idle:
+            self._discard(entry)
+
+    # Internals
+
+    def _open(self):
+        entry = _PoolEntry(self._connect())
+        with self._cond:
+            self._stats['created'] += 1
+        return entry
+
+    def _is_usable(self, entry):
+        now = time.monotonic()
+        if self.max_lifetime and now - entry.created_at > self.max_lifetime:
+            with self._cond:
+                self._stats['expired'] += 1
+            return False
+        if self.ping_interval is not None and now - entry.last_used > self.ping_interval:
+            try:
+                entry.conn.ping(reconnect=False)
+            except Exception:
+                with self._cond:
+                    self._stats['ping_failures'] += 1
+                return False
+        return True
+
+    def _release(self, entry):
+        conn = entry.conn
+        try:
+            # Never hand a connection with an open transaction (or a stale
+            # REPEATABLE READ snapshot) to the next borrower
+            if getattr(conn, 'server_status', 0) & SERVER_STATUS.SERVER_STATUS_IN_TRANS:
+                conn.rollback()
+        except Exception:
+            self._discard(entry)
+            return
+
+        entry.last_used = time.monotonic()
+        with self._cond:
+            if self._closed:
+                discard = True
+            else:
+                discard = False
+                self._idle.append(entry)
+                self._cond.notify()
+        if discard:
+            self._discard(entry)
+
+    def _discard(self, entry):
+        try:
+            entry.conn.close()
+        except Exception:
+            pass
+        with self._cond:
+            self._size -= 1
+            self._stats['closed'] += 1
+            self._cond.notify()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide pool, creating it from Config on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                from app.config import Config
+                _pool = ConnectionPool(
+                    Config.create_db_connection,
+                    min_size=Config.DB_POOL_MIN_SIZE,
+                    max_size=Config.DB_POOL_MAX_SIZE,
+                    timeout=Config.DB_POOL_TIMEOUT,
+                    max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+                    ping_interval=Config.DB_POOL_PING_INTERVAL,
+                )
+    return _pool
+
+
+def init_pool(app):
+    """Pre-warm the pool at startup so the first requests skip the TLS handshake"""
+    if not app.config.get('DB_POOL_PREWARM'):
+        return
+    try:
+        opened = get_pool().prewarm()
+        app.logger.info('Database pool pre-warmed with %d connection(s)', opened)
+    except Exception as e:
+        # The API should still boot; connections will be opened on demand
+        app.logger.warning('Could not pre-warm database pool: %s', e)
@@ -0,0 +1,205 @@
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date, timedelta
+
+import pymysql
+
+from app.config import Config
+from app.utils.replicas import read_connection
+
+DEFAULTER_COLUMNS = ['report_id', 'kind', 'location', 'mother_id', 'mother_name', 'phone',
+                     'child_id', 'child_name', 'item', 'due_date', 'days_missed']
+
+# Antenatal visits still 'scheduled' after their date, ordered so each
+# clinic's list comes out grouped by location
+MISSED_VISITS_QUERY = """
+    SELECT v.mother_id, u.full_name AS mother_name, u.phone, m.location,
+           v.visit_type AS item, v.visit_date AS due_date
+    FROM visits v
+    JOIN mothers m ON v.mother_id = m.mother_id
+    JOIN users u ON m.user_id = u.user_id
+    LEFT JOIN health_workers hw ON v.hw_id = hw.hw_id
+    WHERE v.status = 'scheduled' AND v.visit_type = 'antenatal'
+      AND v.visit_date < %s AND {clinic}
+    ORDER BY m.location, v.mother_id, v.visit_date
+"""
+
+# Overdue doses from the due_doses queue (see app/utils/due_doses.py)
+MISSED_DOSES_QUERY = """
+    SELECT c.mother_id, u.full_name AS mother_name, u.phone, m.location,
+           d.child_id, c.full_name AS child_name, d.vaccine_name AS item, d.due_date
+    FROM due_doses d
+    JOIN children c ON d.child_id = c.child_id
+    JOIN mothers m ON c.mother_id = m.mother_id
+    JOIN users u ON m.user_id = u.user_id
+    WHERE d.status = 'pending' AND d.due_date < %s
+      AND (d.expires_on IS NULL OR d.expires_on >= %s) AND {clinic}
+    ORDER BY m.location, c.mother_id, d.child_id, d.due_date
+"""
+
+
+def week_start(today=None):
+    """Monday of the week containing `today`"""
+    today = today or date.today()
+    return today - timedelta(days=today.weekday())
+
+
+def clinic_condition(column, clinic_id):
+    """`column` matches clinic_id; None selects records with no clinic"""
+    if clinic_id is None:
+        return f"{column} IS NULL", ()
+    return f"{column} = %s", (clinic_id,)
+
+
+def stream_rows(conn, query, params, fetch_size):
+    """Yield rows of `query` from an unbuffered cursor, fetch_size at a time"""
+    cursor = conn.cursor(pymysql.cursors.SSDictCursor)
+    try:
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(fetch_size)
+            if not rows:
+                break
+            yield from rows
+    finally:
+        cursor.close()
+
+
+def defaulter_row(report_id, kind, row, today):
+    return (
+        report_id,
+        kind,
+        row['location'] or '',
+        row['mother_id'],
+        row['mother_name'],
+        row['phone'],
+        row.get('child_id'),
+        row.get('child_name'),
+        row['item'],
+        row['due_date'],
+        (today - row['due_date']).days,
+    )
+
+
+def build_clinic_report(clinic_id, week, today=None, fetch_size=None, connect=None):
+    """
+    Build one clinic's report for `week` (runs in a worker process).
+
+    Rows are read from an unbuffered cursor on one connection and written
+    in chunks on a second one, so memory stays flat however large the
+    clinic is. Reads go to a read replica when one is configured and
+    caught up. The previous report for the same clinic and week stays
+    readable until this one is complete, and is deleted in the same
+    transaction. Returns a summary dict.
+    """
+    today = today or date.today()
+    fetch_size = fetch_size or Config.DEFAULTER_FETCH_SIZE
+    started = time.perf_counter()
+
+    reader = connect() if connect else read_connection()
+    writer = connect() if connect else Config.create_db_connection()
+    report_id = None
+    try:
+        cursor = writer.cursor()
+        cursor.execute(
+            "INSERT INTO defaulter_reports (clinic_id, week_start, status) VALUES (%s, %s, 'running')",
+            (clinic_id, week)
+        )
+        report_id = cursor.lastrowid
+        writer.commit()
+
+        placeholders = ', '.join(['%s'] * len(DEFAULTER_COLUMNS))
+        insert = f"INSERT INTO defaulters ({', '.join(DEFAULTER_COLUMNS)}) VALUES ({placeholders})"
+        grace_start = today - timedelta(days=Config.ALERT_GRACE_DAYS)
+
+        counts = {}
+        sources = [
+            ('visit', MISSED_VISITS_QUERY, 'hw.clinic_id', (today,)),
+            ('dose', MISSED_DOSES_QUERY, 'd.clinic_id', (grace_start, today)),
+        ]
+        for kind, query, column, params in sources:
+            condition, clinic_params = clinic_condition(column, clinic_id)
+            counts[kind] = 0
+            chunk = []
+            for row in stream_rows(reader, query.format(clinic=condition), params + clinic_params, fetch_size):
+                chunk.append(defaulter_row(report_id, kind, row, today))
+                if len(chunk) >= fetch_size:
+                    cursor.executemany(insert, chunk)
+                    counts[kind] += len(chunk)
+                    chunk = []
+            if chunk:
+                cursor.executemany(insert, chunk)
+                counts[kind] += len(chunk)
+
+        cursor.execute(
+            "DELETE FROM defaulter_reports WHERE week_start = %s AND clinic_id <=> %s AND report_id <> %s",
+            (week, clinic_id, report_id)
+        )
+        cursor.execute("""
+            UPDATE defaulter_reports
+            SET status = 'complete', missed_visits = %s, missed_doses = %s, finished_at = NOW()
+            WHERE report_id = %s
+        """, (counts['visit'], counts['dose'], report_id))
+        writer.commit()
+
+        return {
+            'clinic_id': clinic_id,
+            'report_id': report_id,
+            'status': 'complete',
+            'missed_visits': counts['visit'],
+            'missed_doses': counts['dose'],
+            'seconds': round(time.perf_counter() - started, 3),
+        }
+
+    except Exception as e:
+        writer.rollback()
+        if report_id is not None:
+            try:
+                writer.cursor().execute(
+                    "UPDATE defaulter_reports SET status = 'failed', error = %s, finished_at = NOW() WHERE report_id = %s",
+                    (str(e), report_id)
+                )
+                writer.commit()
+            except Exception:
+                pass
+        return {'clinic_id': clinic_id, 'report_id': report_id, 'status': 'failed', 'error': str(e)}
+
+    finally:
+        reader.close()
+        writer.close()
+
+
+def build_defaulter_reports(workers=None, today=None, clinic_ids=None):
+    """
+    Build this week's defaulter reports for every clinic (and for records
+    with no clinic) in parallel, one clinic per task. Returns the
+    per-clinic summaries ordered by clinic.
+    """
+    today = today or date.today()
+    week = week_start(today)
+
+    if clinic_ids is None:
+        conn = Config.create_db_connection()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT clinic_id FROM clinics ORDER BY clinic_id")
+            clinic_ids = [row['clinic_id'] for row in cursor.fetchall()] + [None]
+        finally:
+            conn.close()
+
+    # spawn: forking a threaded server (pool maintenance, request threads) is unsafe
+    context = multiprocessing.get_context('spawn')
+    workers = min(workers or Config.DEFAULTER_WORKERS, max(len(clinic_ids), 1))
+    results = []
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        futures = {pool.submit(build_clinic_report, clinic_id, week, today): clinic_id for clinic_id in clinic_ids}
+        for future in as_completed(futures):
+            try:
+                results.append(future.result())
+            except Exception as e:
+                # e.g. the worker could not connect; other clinics carry on
+                results.append({'clinic_id': futures[future], 'report_id': None, 'status': 'failed', 'error': str(e)})
+
+    results.sort(key=lambda result: (result['clinic_id'] is None, result['clinic_id'] or 0))
+    return results
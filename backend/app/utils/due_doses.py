@@ -0,0 +1,118 @@
+from datetime import date
+
+import numpy as np
+
+from app.config import Config
+from app.utils.vaccine_schedule import get_engine, tuple_cursor
+
+DUE_DOSE_COLUMNS = ['child_id', 'antigen', 'vaccine_name', 'clinic_id', 'due_date', 'expires_on', 'status']
+
+# Clinic of the health worker behind each child's latest vaccination (the
+# same attribution the worker dashboard uses). Children with none yet fall
+# back to the worker of their mother's latest visit, so a newly registered
+# child still shows up on a clinic's due list. Rows come out ordered so the
+# last one per child wins; {where} appears twice, so pass the params twice.
+CLINIC_QUERY = """
+    (SELECT c.child_id, hw.clinic_id, 0 AS source, vi.visit_date AS seen_on, vi.visit_id AS row_id
+     FROM children c
+     JOIN visits vi ON vi.mother_id = c.mother_id
+     JOIN health_workers hw ON vi.hw_id = hw.hw_id
+     WHERE hw.clinic_id IS NOT NULL AND {where})
+    UNION ALL
+    (SELECT c.child_id, hw.clinic_id, 1 AS source, v.date_given AS seen_on, v.vaccine_id AS row_id
+     FROM vaccinations v
+     JOIN children c ON v.child_id = c.child_id
+     JOIN health_workers hw ON v.hw_id = hw.hw_id
+     WHERE hw.clinic_id IS NOT NULL AND {where})
+    ORDER BY child_id, source, seen_on, row_id
+"""
+
+
+def due_dose_rows(engine, arrays, clinics, today):
+    """due_doses rows (tuples in DUE_DOSE_COLUMNS order) for the children in `arrays`"""
+    child_ids, dob, given_mask, series_last = arrays
+    child, series, dose, due = engine.next_doses(child_ids, dob, given_mask, series_last, today)
+
+    latest_age = np.array([dose_info[3] or 0 for dose_info in engine.doses] + [0], dtype='timedelta64[D]')
+    expires = np.tile(dob, len(engine.series)) + latest_age[dose]
+    expires[(dose < 0) | (latest_age[dose] == np.timedelta64(0, 'D'))] = np.datetime64('NaT')
+
+    rows = []
+    for child_id, series_index, dose_index, due_date, expires_on in zip(
+            child.tolist(), series.tolist(), dose.tolist(), due.astype(object), expires.astype(object)):
+        pending = dose_index >= 0
+        rows.append((
+            child_id,
+            engine.series[series_index],
+            engine.names[dose_index] if pending else None,
+            clinics.get(child_id),
+            due_date,
+            expires_on,
+            'pending' if pending else 'closed',
+        ))
+    return rows
+
+
+def refresh_due_doses(db, where, params=(), today=None):
+    """
+    Recompute the due_doses rows of the children matching `where` (a
+    condition on children, alias c). Runs on the caller's connection, so
+    it commits or rolls back with the write that triggered it.
+    Returns the number of rows written.
+    """
+    today = today or date.today()
+    engine = get_engine(Config.VACCINE_SCHEDULE)
+    cursor = tuple_cursor(db)
+    params = tuple(params)
+
+    arrays = engine.read(cursor, today, where, params)
+
+    cursor.execute(CLINIC_QUERY.format(where=where), params + params)
+    clinics = {row[0]: row[1] for row in cursor.fetchall()}
+
+    cursor.execute(f"""
+        DELETE d FROM due_doses d
+        JOIN children c ON d.child_id = c.child_id
+        WHERE {where}
+    """, params)
+
+    rows = due_dose_rows(engine, arrays, clinics, today)
+    if rows:
+        # PyMySQL sends these as multi-row INSERTs
+        placeholders = ', '.join(['%s'] * len(DUE_DOSE_COLUMNS))
+        cursor.executemany(
+            f"INSERT INTO due_doses ({', '.join(DUE_DOSE_COLUMNS)}) VALUES ({placeholders})",
+            rows
+        )
+    return len(rows)
+
+
+def refresh_children(db, child_ids, today=None):
+    """Recompute due_doses for specific children after a write"""
+    child_ids = sorted({int(child_id) for child_id in child_ids})
+    if not child_ids:
+        return 0
+    placeholders = ', '.join(['%s'] * len(child_ids))
+    return refresh_due_doses(db, f"c.child_id IN ({placeholders})", child_ids, today)
+
+
+def rebuild_due_doses(db, batch_size=None, today=None, progress=None):
+    """
+    Backfill/rebuild due_doses for every child, committing per range of
+    `batch_size` child ids so no single transaction grows with the table.
+    """
+    batch_size = batch_size or Config.DUE_DOSES_REBUILD_BATCH
+    cursor = tuple_cursor(db)
+    cursor.execute("SELECT MIN(child_id), MAX(child_id) FROM children")
+    first, last = cursor.fetchone()
+
+    written = 0
+    if first is not None:
+        for start in range(first, last + 1, batch_size):
+            end = start + batch_size - 1
+            written += refresh_due_doses(db, "c.child_id BETWEEN %s AND %s", (start, end), today)
+            db.commit()
+            if progress:
+                progress(min(end, last), last, written)
+
+    return written
@@ -0,0 +1,78 @@
+import hashlib
+from functools import wraps
+
+from flask import g, request, make_response
+
+from app.config import Config
+from app.utils.db import get_db
+
+
+def compute_etag(cursor, tables):
+    """
+    Weak ETag for the current request from the tables its response reads.
+
+    MAX(updated_at) of each table (an index lookup on idx_*_updated) moves
+    on every insert and update, and MAX(tombstone_id) moves on every
+    delete, so a single cheap query tells whether anything the response
+    depends on may have changed. Returns None while the newest write is
+    within ETAG_SETTLE_SECONDS: updated_at has one-second resolution, so a
+    second write in the same second would otherwise keep the same tag.
+    """
+    selects = [f"(SELECT MAX(updated_at) FROM {table}) AS `{table}`" for table in tables]
+    selects.append("(SELECT MAX(tombstone_id) FROM sync_tombstones) AS `deleted`")
+    selects.append("NOW() AS `now`")
+    cursor.execute("SELECT " + ", ".join(selects))
+    versions = cursor.fetchone()
+
+    now = versions.pop('now')
+    latest = [versions[table] for table in tables if versions[table] is not None]
+    if latest and (now - max(latest)).total_seconds() < Config.ETAG_SETTLE_SECONDS:
+        return None
+
+    # Kept so a response cache hit can tag the same body for another user
+    g.etag_versions = '|'.join(str(versions[name]) for name in sorted(versions))
+    return etag_for(g.etag_versions)
+
+
+def etag_for(versions):
+    """The current caller's ETag for data at `versions` (see compute_etag)"""
+    # Same data still renders differently per URL and per user
+    key = '|'.join([request.full_path, str(request.user_id), str(request.user_role), versions])
+    return 'W/"' + hashlib.sha1(key.encode('utf-8')).hexdigest()[:20] + '"'
+
+
+def conditional(*tables):
+    """
+    Decorator for GET endpoints: answer 304 when the client's ETag still
+    matches, otherwise run the view and tag its response.
+    Use below @token_required so the tag is per user.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            try:
+                etag = compute_etag(get_db().cursor(), tables)
+            except Exception:
+                etag = None
+
+            if etag is None:
+                return f(*args, **kwargs)
+
+            if etag in _if_none_match():
+                response = make_response('', 304)
+            else:
+                response = make_response(f(*args, **kwargs))
+                if response.status_code != 200 or response.is_streamed:
+                    return response
+
+            response.headers['ETag'] = etag
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return decorated
+    return decorator
+
+
+def _if_none_match():
+    header = request.headers.get('If-None-Match', '')
+    return {tag.strip() for tag in header.split(',') if tag.strip()}
@@ -0,0 +1,64 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+
+class HashingBusyError(Exception):
+    """Raised when the password hashing pool cannot take more work"""
+
+
+class HashWorkerPool:
+    """
+    Runs bcrypt calls on a fixed number of worker threads.
+
+    bcrypt releases the GIL, so a small pool keeps hashing off the request
+    threads' CPU budget while the rest of the API keeps serving. At most
+    `workers + queue_depth` calls may be in flight; beyond that submit()
+    fails immediately with HashingBusyError so the caller can answer 503
+    instead of piling up behind a login burst.
+    """
+
+    def __init__(self, workers, queue_depth, timeout=None):
+        if workers < 1:
+            raise ValueError('workers must be at least 1')
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(workers + queue_depth)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='bcrypt')
+        self._lock = threading.Lock()
+        self._stats = {'completed': 0, 'rejected': 0, 'timeouts': 0}
+
+    def run(self, fn, *args):
+        """Run fn(*args) on the pool and wait for the result"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats['rejected'] += 1
+            raise HashingBusyError('Password hashing is saturated, try again shortly')
+
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._slots.release()
+            raise
+        future.add_done_callback(self._done)
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            with self._lock:
+                self._stats['timeouts'] += 1
+            raise HashingBusyError('Password hashing timed out')
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot.update({'workers': self.workers, 'queue_depth': self.queue_depth})
+        return snapshot
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+    def _done(self, future):
+        self._slots.release()
+        with self._lock:
+            self._stats['completed'] += 1
@@ -0,0 +1,93 @@
+import re
+import time
+from functools import lru_cache
+
+_listeners = []
+
+UNKNOWN_ROWCOUNT = 2 ** 64 - 1
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMBER = re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?\b')
+_PLACEHOLDER = re.compile(r'%\(\w+\)s|%s')
+_IN_LIST = re.compile(r'\bIN\s*\((?:\s*\?\s*,)*\s*\?\s*\)', re.IGNORECASE)
+_VALUES_LIST = re.compile(r'\bVALUES\s*(\([^()]*\))(?:\s*,\s*\([^()]*\))+', re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def normalize_sql(sql):
+    """
+    One shape per statement: literals and placeholders become ?, IN lists
+    and multi-row VALUES collapse, whitespace is squeezed.
+    "SELECT * FROM visits WHERE visit_id IN (%s, %s)" -> "SELECT * FROM visits WHERE visit_id IN (...)"
+    """
+    if isinstance(sql, bytes):
+        sql = sql.decode('utf-8', 'replace')
+    sql = _WHITESPACE.sub(' ', sql).strip()
+    sql = _STRING.sub('?', sql)
+    sql = _PLACEHOLDER.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = _IN_LIST.sub('IN (...)', sql)
+    sql = _VALUES_LIST.sub(r'VALUES \1, ...', sql)
+    return sql
+
+
+def add_query_listener(listener):
+    """
+    Call listener(cursor, sql, params, seconds, rows, error) after every
+    statement run on an instrumented cursor. Listeners must be cheap and
+    must not raise.
+    """
+    if listener not in _listeners:
+        _listeners.append(listener)
+
+
+def remove_query_listener(listener):
+    if listener in _listeners:
+        _listeners.remove(listener)
+
+
+class InstrumentedCursorMixin:
+    """
+    Times every execute() and reports it to the query listeners and to the
+    request's DBSession (query count and time). executemany() goes through
+    execute() for each statement it sends, so it is covered too.
+    """
+
+    _session = None
+
+    def execute(self, query, args=None):
+        started = time.perf_counter()
+        try:
+            result = super().execute(query, args)
+        except Exception as e:
+            self._observe(query, args, time.perf_counter() - started, None, e)
+            raise
+        rows = self.rowcount
+        # Unbuffered cursors report -1 or 2**64 - 1 until the rows are read
+        if rows is not None and not 0 <= rows < UNKNOWN_ROWCOUNT:
+            rows = None
+        self._observe(query, args, time.perf_counter() - started, rows, None)
+        return result
+
+    def _observe(self, query, args, seconds, rows, error):
+        session = self._session
+        if session is not None:
+            session.query_count += 1
+            session.query_seconds += seconds
+        for listener in _listeners:
+            listener(self, query, args, seconds, rows, error)
+
+
+_classes = {}
+
+
+def instrumented(cursor_class):
+    """Instrumented subclass of a PyMySQL cursor class (created once per class)"""
+    if issubclass(cursor_class, InstrumentedCursorMixin):
+        return cursor_class
+    cls = _classes.get(cursor_class)
+    if cls is None:
+        cls = type(f'Instrumented{cursor_class.__name__}', (InstrumentedCursorMixin, cursor_class), {})
+        _classes[cursor_class] = cls
+    return cls
@@ -0,0 +1,204 @@
+import bisect
+import hmac
+import threading
+import time
+
+from flask import Response, g, request
+
+from app.config import Config
+from app.utils.instrumentation import add_query_listener, normalize_sql
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250)
+
+# Statements beyond METRICS_MAX_STATEMENTS distinct shapes share this label
+OTHER_STATEMENT = 'other'
+
+
+class Counter:
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labels):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, tuple(zip(self.labels, values)), value) for values, value in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def dec(self, label_values, amount=1):
+        self.inc(label_values, -amount)
+
+
+class Histogram:
+    """Cumulative-bucket histogram per label set, rendered the Prometheus way"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, label_values, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = [(values, list(counts), total, count) for values, (counts, total, count) in self._series.items()]
+        samples = []
+        for values, counts, total, count in snapshot:
+            values = tuple(zip(self.labels, values))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                samples.append((self.name + '_bucket', values + (('le', _format_number(bound)),), cumulative))
+            samples.append((self.name + '_bucket', values + (('le', '+Inf'),), count))
+            samples.append((self.name + '_sum', values, total))
+            samples.append((self.name + '_count', values, count))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = []
+
+    def add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        for metric in self.metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                labels = ','.join(f'{label}="{_escape(str(v))}"' for label, v in labels)
+                lines.append(f'{name}{{{labels}}} {_format_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_number(value):
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+registry = Registry()
+
+query_duration = registry.add(Histogram(
+    'db_query_duration_seconds', 'SQL statement latency by normalised statement',
+    ('statement',), LATENCY_BUCKETS))
+query_rows = registry.add(Counter(
+    'db_query_rows_total', 'Rows returned or affected by normalised statement', ('statement',)))
+query_errors = registry.add(Counter(
+    'db_query_errors_total', 'Failed SQL statements by normalised statement and error', ('statement', 'error')))
+request_queries = registry.add(Histogram(
+    'http_request_db_queries', 'SQL statements run per request', ('endpoint',), COUNT_BUCKETS))
+request_db_seconds = registry.add(Histogram(
+    'http_request_db_seconds', 'Time spent in SQL per request', ('endpoint',), LATENCY_BUCKETS))
+request_duration = registry.add(Histogram(
+    'http_request_duration_seconds', 'Request latency by endpoint', ('endpoint', 'method'), LATENCY_BUCKETS))
+requests_total = registry.add(Counter(
+    'http_requests_total', 'Requests by endpoint, method and status', ('endpoint', 'method', 'status')))
+requests_in_flight = registry.add(Gauge(
+    'http_requests_in_flight', 'Requests being handled by endpoint', ('endpoint',)))
+
+_statements = set()
+_statements_lock = threading.Lock()
+
+
+def statement_label(sql):
+    """Normalised SQL, capped at METRICS_MAX_STATEMENTS distinct shapes"""
+    statement = normalize_sql(sql)
+    if statement in _statements:
+        return statement
+    with _statements_lock:
+        if len(_statements) >= Config.METRICS_MAX_STATEMENTS:
+            return OTHER_STATEMENT
+        _statements.add(statement)
+    return statement
+
+
+def record_query(cursor, sql, params, seconds, rows, error):
+    label = (statement_label(sql),)
+    query_duration.observe(label, seconds)
+    if error is not None:
+        query_errors.inc(label + (type(error).__name__,))
+    elif rows is not None and rows >= 0:
+        query_rows.inc(label, rows)
+
+
+def endpoint_label():
+    """URL rule rather than path, so /api/mothers/1 and /api/mothers/2 share a series"""
+    rule = request.url_rule
+    return rule.rule if rule is not None else 'unmatched'
+
+
+def init_metrics(app):
+    """
+    Register the query listener and request hooks, and serve /api/metrics.
+    Call first in create_app so the hooks see every request.
+    """
+    add_query_listener(record_query)
+
+    @app.before_request
+    def start_request_timer():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = endpoint_label()
+        requests_in_flight.inc((g.metrics_endpoint,))
+
+    @app.after_request
+    def record_request(response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        endpoint = g.metrics_endpoint
+        request_duration.observe((endpoint, request.method), time.perf_counter() - started)
+        requests_total.inc((endpoint, request.method, str(response.status_code)))
+
+        session = g.get('db_session')
+        if session is not None:
+            request_queries.observe((endpoint,), session.query_count)
+            request_db_seconds.observe((endpoint,), session.query_seconds)
+        return response
+
+    @app.teardown_request
+    def end_request(exc):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            requests_in_flight.dec((endpoint,))
+
+    @app.route('/api/metrics')
+    def metrics():
+        token = Config.METRICS_TOKEN
+        if not token:
+            # Never served unauthenticated: without a token there is no endpoint
+            return {'success': False, 'message': 'Not found'}, 404
+        if not hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return {'success': False, 'message': 'Invalid metrics token'}, 401
+        return Response(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,229 @@
+import hashlib
+import importlib.util
+import os
+import re
+import time
+
+MIGRATIONS_DIR = os.path.normpath(os.path.join(os.path.dirname(__file__), '..', '..', 'database', 'migrations'))
+
+# Named lock so two deploys cannot migrate the same database at once
+LOCK_NAME = 'schema_migrations'
+
+_FILENAME = re.compile(r'^(\d{4})_(\w+)\.py$')
+
+CREATE_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version INT PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        duration_ms INT NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+
+class MigrationError(Exception):
+    """A migration could not be discovered, locked or applied"""
+
+
+class Migration:
+    def __init__(self, version, name, path):
+        self.version = version
+        self.name = name
+        self.path = path
+        with open(path, 'rb') as f:
+            self.checksum = hashlib.sha256(f.read()).hexdigest()
+
+    def load(self):
+        spec = importlib.util.spec_from_file_location(f'migration_{self.version:04d}', self.path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        if not callable(getattr(module, 'upgrade', None)):
+            raise MigrationError(f'{os.path.basename(self.path)} has no upgrade(op) function')
+        return module
+
+
+def discover(directory=None):
+    """Migrations in `directory`, named NNNN_description.py, in version order"""
+    directory = directory or MIGRATIONS_DIR
+    migrations = []
+    for filename in os.listdir(directory):
+        match = _FILENAME.match(filename)
+        if match:
+            migrations.append(Migration(int(match.group(1)), match.group(2), os.path.join(directory, filename)))
+    migrations.sort(key=lambda migration: migration.version)
+
+    for previous, current in zip(migrations, migrations[1:]):
+        if previous.version == current.version:
+            raise MigrationError(f'Duplicate migration version {current.version:04d}')
+    return migrations
+
+
+class Operations:
+    """
+    What a migration's upgrade(op) is given. DDL goes through online-safe
+    statements (ALGORITHM=INPLACE, LOCK=NONE) so reads and writes carry on
+    while an index builds, and each helper checks information_schema first,
+    so a migration interrupted half way can simply be run again (MySQL
+    commits DDL immediately; it cannot be rolled back with the record).
+    The same checks make every helper a no-op on a database created from
+    schema.sql, which already has the objects.
+    """
+
+    def __init__(self, cursor, log=None):
+        self.cursor = cursor
+        self.log = log or (lambda message: None)
+
+    def execute(self, sql, params=None):
+        self.cursor.execute(sql, params)
+
+    def index_exists(self, table, name):
+        self.cursor.execute("""
+            SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+            LIMIT 1
+        """, (table, name))
+        return self.cursor.fetchone() is not None
+
+    def table_exists(self, table):
+        self.cursor.execute("""
+            SELECT 1 FROM information_schema.tables
+            WHERE table_schema = DATABASE() AND table_name = %s
+            LIMIT 1
+        """, (table,))
+        return self.cursor.fetchone() is not None
+
+    def trigger_exists(self, name):
+        self.cursor.execute("""
+            SELECT 1 FROM information_schema.triggers
+            WHERE trigger_schema = DATABASE() AND trigger_name = %s
+            LIMIT 1
+        """, (name,))
+        return self.cursor.fetchone() is not None
+
+    def create_table(self, table, definition):
+        """CREATE TABLE `table` (definition); no-op if the table exists"""
+        if self.table_exists(table):
+            self.log(f'  table {table} already exists')
+            return False
+        self.cursor.execute(f"CREATE TABLE {table} ({definition})")
+        self.log(f'  created table {table}')
+        return True
+
+    def create_trigger(self, name, definition):
+        """CREATE TRIGGER `name` definition; no-op if the trigger exists"""
+        if self.trigger_exists(name):
+            self.log(f'  trigger {name} already exists')
+            return False
+        self.cursor.execute(f"CREATE TRIGGER {name} {definition}")
+        self.log(f'  created trigger {name}')
+        return True
+
+    def add_index(self, table, name, columns, unique=False, fulltext=False, parser=None):
+        """
+        Build an index online; no-op if an index with this name exists.
+        FULLTEXT indexes cannot be built with LOCK=NONE: writes to the table
+        wait (reads carry on) while one builds.
+        """
+        if self.index_exists(table, name):
+            self.log(f'  {table}.{name} already exists')
+            return False
+        kind = 'FULLTEXT INDEX' if fulltext else 'UNIQUE INDEX' if unique else 'INDEX'
+        with_parser = f' WITH PARSER {parser}' if parser else ''
+        lock = 'SHARED' if fulltext else 'NONE'
+        self.cursor.execute(
+            f"ALTER TABLE {table} ADD {kind} {name} ({', '.join(columns)}){with_parser}, "
+            f"ALGORITHM=INPLACE, LOCK={lock}"
+        )
+        self.log(f"  added {table}.{name} ({', '.join(columns)})")
+        return True
+
+    def drop_index(self, table, name):
+        """Drop an index online; no-op if it is already gone"""
+        if not self.index_exists(table, name):
+            return False
+        self.cursor.execute(f"ALTER TABLE {table} DROP INDEX {name}, ALGORITHM=INPLACE, LOCK=NONE")
+        self.log(f'  dropped {table}.{name}')
+        return True
+
+
+def applied_versions(cursor):
+    """{version: row} of migrations recorded in schema_migrations"""
+    cursor.execute(CREATE_VERSION_TABLE)
+    cursor.execute("SELECT version, name, checksum, applied_at FROM schema_migrations ORDER BY version")
+    return {row['version']: row for row in cursor.fetchall()}
+
+
+def migration_status(conn, directory=None):
+    """Every known migration with its applied_at (None if pending) and checksum drift"""
+    cursor = conn.cursor()
+    applied = applied_versions(cursor)
+    status = []
+    for migration in discover(directory):
+        row = applied.get(migration.version)
+        status.append({
+            'version': migration.version,
+            'name': migration.name,
+            'applied_at': row['applied_at'] if row else None,
+            'modified': bool(row) and row['checksum'] != migration.checksum,
+        })
+    return status
+
+
+def migrate(conn, directory=None, target=None, dry_run=False, log=None, lock_timeout=30):
+    """
+    Apply pending migrations in version order, up to `target` if given.
+    Forward only: there are no downgrades; fix a bad migration with a new
+    one. Each migration is recorded (and committed) as soon as it succeeds.
+    Returns the migrations applied (or that would be, with dry_run).
+    """
+    log = log or (lambda message: None)
+    cursor = conn.cursor()
+
+    cursor.execute("SELECT GET_LOCK(%s, %s) AS locked", (LOCK_NAME, lock_timeout))
+    if not cursor.fetchone()['locked']:
+        raise MigrationError('Another process is running migrations')
+
+    try:
+        applied = applied_versions(cursor)
+        migrations = discover(directory)
+        latest = max(applied, default=0)
+
+        pending = []
+        for migration in migrations:
+            if migration.version in applied:
+                if applied[migration.version]['checksum'] != migration.checksum:
+                    log(f'warning: {migration.version:04d}_{migration.name} changed after it was applied')
+                continue
+            if migration.version < latest:
+                raise MigrationError(
+                    f'{migration.version:04d}_{migration.name} is older than applied version {latest:04d}; '
+                    'renumber it after the latest migration'
+                )
+            if target is None or migration.version <= target:
+                pending.append(migration)
+
+        if dry_run:
+            return pending
+
+        for migration in pending:
+            module = migration.load()
+            summary = module.__doc__.strip().splitlines()[0] if module.__doc__ else migration.name
+            log(f'{migration.version:04d}_{migration.name}: {summary}')
+            started = time.perf_counter()
+            try:
+                module.upgrade(Operations(cursor, log))
+            except Exception as e:
+                conn.rollback()
+                raise MigrationError(f'{migration.version:04d}_{migration.name} failed: {e}') from e
+            cursor.execute(
+                "INSERT INTO schema_migrations (version, name, checksum, duration_ms) VALUES (%s, %s, %s, %s)",
+                (migration.version, migration.name, migration.checksum,
+                 int((time.perf_counter() - started) * 1000))
+            )
+            conn.commit()
+        return pending
+
+    finally:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
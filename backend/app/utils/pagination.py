@@ -0,0 +1,102 @@
+import base64
+import json
+
+from app.config import Config
+
+
+class InvalidCursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(values):
+    """Encode the sort-key values of the last row into an opaque cursor"""
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size):
+    """Decode a cursor produced by encode_cursor into a list of `size` values"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, TypeError, UnicodeError):
+        raise InvalidCursorError('Invalid cursor')
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError('Invalid cursor')
+    return values
+
+
+def parse_limit(value, default=None, maximum=None):
+    """Parse the `limit` query parameter, clamped to [1, maximum]"""
+    default = default or Config.PAGE_DEFAULT_LIMIT
+    maximum = maximum or Config.PAGE_MAX_LIMIT
+    if value in (None, ''):
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('limit must be a positive integer')
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, maximum)
+
+
+def keyset_condition(columns, values, descending=False):
+    """
+    Build the WHERE fragment selecting rows after `values` in key order.
+
+    For columns (a, b) ascending this is: a > %s OR (a = %s AND b > %s).
+    The expanded form (rather than a row constructor) lets MySQL use a
+    range scan on the matching index.
+    """
+    op = '<' if descending else '>'
+    clauses = []
+    params = []
+    for i, column in enumerate(columns):
+        parts = [f"{c} = %s" for c in columns[:i]]
+        parts.append(f"{column} {op} %s")
+        clauses.append('(' + ' AND '.join(parts) + ')')
+        params.extend(values[:i + 1])
+    return '(' + ' OR '.join(clauses) + ')', params
+
+
+def keyset_page(cursor, query, params, keys, cursor_token=None, limit=None, descending=False, where=None):
+    """
+    Run one page of a keyset-paginated query.
+
+    `query` is a SELECT ... FROM ... without WHERE/ORDER BY/LIMIT.
+    `keys` is a list of (sql_column, row_field) pairs that uniquely order
+    the result, e.g. [('v.visit_date', 'visit_date'), ('v.visit_id', 'visit_id')].
+    `where` is an optional list of extra conditions already covered by `params`.
+
+    Returns (rows, next_cursor); next_cursor is None on the last page.
+    """
+    limit = limit or Config.PAGE_DEFAULT_LIMIT
+    columns = [column for column, _ in keys]
+    conditions = list(where or [])
+    params = list(params or [])
+
+    if cursor_token:
+        values = decode_cursor(cursor_token, len(keys))
+        condition, condition_params = keyset_condition(columns, values, descending)
+        conditions.append(condition)
+        params.extend(condition_params)
+
+    direction = 'DESC' if descending else 'ASC'
+    sql = query
+    if conditions:
+        sql += " WHERE " + " AND ".join(conditions)
+    sql += " ORDER BY " + ", ".join(f"{column} {direction}" for column in columns)
+    sql += " LIMIT %s"
+    params.append(limit + 1)
+
+    cursor.execute(sql, tuple(params))
+    rows = list(cursor.fetchall())
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor([last[field] for _, field in keys])
+
+    return rows, next_cursor
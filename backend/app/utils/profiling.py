@@ -0,0 +1,214 @@
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import nullcontext
+
+from flask import g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+
+from app.config import Config
+
+PROFILE_HEADER = 'X-Profile'
+
+_NO_PHASE = nullcontext()
+_UNSAFE = re.compile(r'[^A-Za-z0-9]+')
+
+
+class Profile:
+    """
+    One profiled request: stack samples taken by the sampler thread plus
+    wall time per phase (auth, serialize; db comes from the DB session).
+    """
+
+    def __init__(self, endpoint, thread_id):
+        self.endpoint = endpoint
+        self.thread_id = thread_id
+        self.current = 'view'
+        self.samples = Counter()
+        self.timings = Counter()
+        self.started = time.perf_counter()
+
+    def phase(self, name):
+        return _Phase(self, name)
+
+    def sample(self, frame, max_depth):
+        """Fold the request thread's stack into root-first ';'-joined frames"""
+        frames = []
+        phase = self.current
+        while frame is not None and len(frames) < max_depth:
+            module = frame.f_globals.get('__name__', '?')
+            if phase == 'view' and module.startswith('pymysql'):
+                phase = 'db'
+            frames.append(f'{module}:{frame.f_code.co_name}')
+            frame = frame.f_back
+        frames.append(phase)
+        frames.append(self.endpoint)
+        self.samples[';'.join(reversed(frames))] += 1
+
+    def server_timing(self, db_seconds):
+        """Server-Timing header value: per-phase and total wall time in ms"""
+        total = time.perf_counter() - self.started
+        phases = [('auth', self.timings['auth']), ('db', db_seconds), ('serialize', self.timings['serialize'])]
+        phases.append(('app', max(total - sum(seconds for _, seconds in phases), 0.0)))
+        phases.append(('total', total))
+        return ', '.join(f'{name};dur={seconds * 1000:.1f}' for name, seconds in phases)
+
+
+class _Phase:
+    __slots__ = ('profile', 'name', 'previous', 'started')
+
+    def __init__(self, profile, name):
+        self.profile = profile
+        self.name = name
+
+    def __enter__(self):
+        self.previous = self.profile.current
+        self.profile.current = self.name
+        self.started = time.perf_counter()
+
+    def __exit__(self, *exc):
+        self.profile.timings[self.name] += time.perf_counter() - self.started
+        self.profile.current = self.previous
+
+
+def phase(name):
+    """Context manager timing `name` in the current request's profile (no-op when not profiling)"""
+    if not has_app_context():
+        return _NO_PHASE
+    profile = g.get('profile')
+    return profile.phase(name) if profile is not None else _NO_PHASE
+
+
+class Sampler:
+    """
+    Background thread that samples the stacks of profiled request threads
+    every PROFILE_INTERVAL_MS. It only runs while a profile is active.
+    """
+
+    def __init__(self, interval=None, max_depth=None):
+        self.interval = (interval or Config.PROFILE_INTERVAL_MS) / 1000.0
+        self.max_depth = max_depth or Config.PROFILE_MAX_DEPTH
+        self._active = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def start(self, profile):
+        with self._lock:
+            self._active[profile.thread_id] = profile
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='profiler', daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(profile.thread_id, None)
+
+    def _run(self):
+        while True:
+            # Sampling under the lock means a stopped profile is never written to again
+            with self._lock:
+                if not self._active:
+                    self._wakeup.clear()
+                    idle = True
+                else:
+                    idle = False
+                    frames = sys._current_frames()
+                    for profile in self._active.values():
+                        frame = frames.get(profile.thread_id)
+                        if frame is not None:
+                            profile.sample(frame, self.max_depth)
+                    frames = frame = None
+            if idle:
+                self._wakeup.wait()
+            else:
+                time.sleep(self.interval)
+
+
+class ProfiledJSONProvider(DefaultJSONProvider):
+    """Flask's JSON provider with encoding timed as the 'serialize' phase"""
+
+    def dumps(self, obj, **kwargs):
+        with phase('serialize'):
+            return super().dumps(obj, **kwargs)
+
+
+_sampler = None
+_write_lock = threading.Lock()
+
+
+def get_sampler():
+    global _sampler
+    if _sampler is None:
+        _sampler = Sampler()
+    return _sampler
+
+
+def wants_profile():
+    """Sampled by PROFILE_SAMPLE_RATE, or asked for with `X-Profile: 1` by an admin"""
+    if Config.PROFILE_SAMPLE_RATE > 0 and random.random() < Config.PROFILE_SAMPLE_RATE:
+        return True
+    if request.headers.get(PROFILE_HEADER) not in ('1', 'true'):
+        return False
+    from app.utils.auth import get_token_payload
+    auth_header = request.headers.get('Authorization', '')
+    token = auth_header.split(' ')[1] if ' ' in auth_header else None
+    payload = get_token_payload(token) if token else None
+    return bool(payload) and payload.get('role') == 'admin'
+
+
+def write_folded(profile, directory=None):
+    """Append the samples to <PROFILE_DIR>/<method_rule>.folded (flamegraph.pl / speedscope input)"""
+    if not profile.samples:
+        return None
+    directory = directory or Config.PROFILE_DIR
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, _UNSAFE.sub('_', profile.endpoint).strip('_') + '.folded')
+    lines = ''.join(f'{stack} {count}\n' for stack, count in profile.samples.items())
+    with _write_lock:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+    return path
+
+
+def init_profiling(app):
+    """
+    Opt-in request profiling. Profiled requests get a Server-Timing header
+    (auth, db, serialize, app, total) and their stack samples are appended
+    to a folded-stacks file per endpoint.
+    """
+    app.json = ProfiledJSONProvider(app)
+
+    @app.before_request
+    def start_profile():
+        if not wants_profile():
+            return
+        rule = request.url_rule
+        endpoint = f'{request.method} {rule.rule if rule is not None else request.path}'
+        g.profile = Profile(endpoint, threading.get_ident())
+        get_sampler().start(g.profile)
+
+    @app.after_request
+    def add_server_timing(response):
+        profile = g.get('profile')
+        if profile is not None:
+            session = g.get('db_session')
+            db_seconds = session.query_seconds if session is not None else 0.0
+            response.headers['Server-Timing'] = profile.server_timing(db_seconds)
+        return response
+
+    @app.teardown_request
+    def finish_profile(exc):
+        profile = g.pop('profile', None)
+        if profile is None:
+            return
+        get_sampler().stop(profile)
+        try:
+            write_folded(profile)
+        except OSError:
+            app.logger.exception('Could not write profile for %s', profile.endpoint)
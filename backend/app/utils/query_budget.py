@@ -0,0 +1,103 @@
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, g, has_app_context, request
+
+from app.config import Config
+from app.utils.instrumentation import add_query_listener, normalize_sql
+
+
+class QueryBudgetExceeded(AssertionError):
+    """A view ran more SQL statements than its @query_budget allows"""
+
+
+def record_statement(cursor, sql, params, seconds, rows, error):
+    """Query listener: keep (statement, params) for the current request's report"""
+    if not has_app_context():
+        return
+    statements = g.get('query_statements')
+    if statements is not None:
+        statements.append((sql, _hashable(params)))
+
+
+def _hashable(params):
+    if isinstance(params, dict):
+        return tuple(sorted((key, _hashable(value)) for key, value in params.items()))
+    if isinstance(params, list):
+        return tuple(_hashable(value) for value in params)
+    return params
+
+
+def find_repeats(statements, threshold=None):
+    """
+    Repeated statements in one request:
+    - duplicates: the same SQL with the same parameters, run more than once
+    - n_plus_one: the same normalised shape run `threshold` or more times
+      with different parameters (a query inside a loop)
+    """
+    threshold = threshold or Config.QUERY_REPEAT_THRESHOLD
+    duplicates = Counter(statements)
+    shapes = Counter(normalize_sql(sql) for sql, _ in statements)
+    return {
+        'duplicates': {normalize_sql(sql): count for (sql, _), count in duplicates.items() if count > 1},
+        'n_plus_one': {shape: count for shape, count in shapes.items() if count >= threshold},
+    }
+
+
+def query_budget(limit):
+    """
+    Declare the most SQL statements a view may run. Use below @token_required
+    and @role_required so only the view's own statements count. Exceeding it
+    raises QueryBudgetExceeded under app.testing or QUERY_BUDGET_ENFORCE, and
+    is logged otherwise.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            session = g.get('db_session')
+            before = session.query_count if session is not None else 0
+            result = f(*args, **kwargs)
+
+            session = g.get('db_session')
+            used = (session.query_count if session is not None else 0) - before
+            if used > limit:
+                message = f'{request.method} {request.path} ran {used} SQL statements (budget {limit})'
+                if current_app.testing or Config.QUERY_BUDGET_ENFORCE:
+                    raise QueryBudgetExceeded(message)
+                current_app.logger.warning(message)
+            return result
+
+        decorated.query_budget = limit
+        return decorated
+    return decorator
+
+
+def init_query_detector(app):
+    """
+    Development/test aid: record every statement per request, log
+    duplicates and N+1 shapes, and report the count in X-Query-Count
+    (statements) / X-Query-Repeats (flagged shapes) response headers.
+    Runs under app.debug or app.testing, or everywhere with QUERY_DETECTOR;
+    both are checked per request since they are often set after create_app().
+    """
+    add_query_listener(record_statement)
+
+    @app.before_request
+    def start_query_log():
+        if Config.QUERY_DETECTOR or app.debug or app.testing:
+            g.query_statements = []
+
+    @app.after_request
+    def report_queries(response):
+        statements = g.pop('query_statements', None)
+        if statements is None:
+            return response
+        repeats = find_repeats(statements)
+        response.headers['X-Query-Count'] = str(len(statements))
+        flagged = set(repeats['duplicates']) | set(repeats['n_plus_one'])
+        if flagged:
+            response.headers['X-Query-Repeats'] = str(len(flagged))
+            for kind, found in repeats.items():
+                for shape, count in found.items():
+                    app.logger.warning('%s %s: %s x%d: %s', request.method, request.path, kind, count, shape)
+        return response
@@ -0,0 +1,327 @@
+import itertools
+import threading
+import time
+from functools import wraps
+
+import jwt
+from flask import g, has_request_context, request
+from itsdangerous import BadSignature, TimestampSigner
+
+from app.config import Config
+from app.utils.cache import TTLCache
+from app.utils.db_pool import ConnectionPool, get_pool
+
+# Requests that only read and may be served by a replica
+READ_METHODS = ('GET', 'HEAD')
+
+# Users who wrote recently, read from the primary until the entry expires
+_sticky = TTLCache(ttl=Config.REPLICA_STICKY_SECONDS, maxsize=100000)
+
+# Write responses carry a signed "user X wrote at T" marker in this header.
+# Clients send it back with their next requests, so whichever worker gets
+# them knows about the write (_sticky only covers the worker that saw it).
+WRITE_HEADER = 'X-Last-Write'
+_signer = TimestampSigner(Config.SECRET_KEY, salt='replica-last-write')
+
+
+def parse_replicas(spec):
+    """'host[:port],host[:port]' -> [(host, port)]"""
+    replicas = []
+    for item in (spec or '').split(','):
+        item = item.strip()
+        if not item:
+            continue
+        host, _, port = item.partition(':')
+        replicas.append((host, int(port) if port else Config.DB_PORT))
+    return replicas
+
+
+def replication_lag(conn):
+    """
+    Seconds the replica is behind its source, or None when it is not
+    replicating (no replica status, or the SQL thread is stopped).
+    """
+    cursor = conn.cursor()
+    try:
+        try:
+            cursor.execute("SHOW REPLICA STATUS")
+            column = 'Seconds_Behind_Source'
+        except Exception:
+            # MySQL before 8.0.22
+            cursor.execute("SHOW SLAVE STATUS")
+            column = 'Seconds_Behind_Master'
+        status = cursor.fetchone()
+    finally:
+        cursor.close()
+    if not status:
+        return None
+    lag = status.get(column)
+    return int(lag) if lag is not None else None
+
+
+class Replica:
+    def __init__(self, name, pool, connect):
+        self.name = name
+        self.pool = pool
+        self.connect = connect
+        self.healthy = False
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+        self._monitor = None
+
+
+class ReplicaSet:
+    """
+    Read replicas, each with its own connection pool, and a background
+    thread that checks their replication lag every REPLICA_CHECK_INTERVAL
+    seconds. Replicas more than REPLICA_MAX_LAG_SECONDS behind (or not
+    replicating, or unreachable) are taken out of rotation until a later
+    check finds them caught up.
+    """
+
+    def __init__(self, replicas, max_lag=None, check_interval=None, pool_factory=None):
+        self.max_lag = Config.REPLICA_MAX_LAG_SECONDS if max_lag is None else max_lag
+        self.check_interval = check_interval or Config.REPLICA_CHECK_INTERVAL
+        pool_factory = pool_factory or _replica_pool
+        self.replicas = []
+        for host, port in replicas:
+            connect = _replica_connect(host, port)
+            self.replicas.append(Replica(f'{host}:{port}', pool_factory(connect), connect))
+        self._rotation = itertools.count()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stats = {'replica_reads': 0, 'fallbacks': 0}
+
+    def check(self):
+        """Measure every replica's lag and update the rotation"""
+        for replica in self.replicas:
+            try:
+                if replica._monitor is None:
+                    replica._monitor = replica.connect()
+                else:
+                    replica._monitor.ping(reconnect=True)
+                lag = replication_lag(replica._monitor)
+                replica.error = None if lag is not None else 'not replicating'
+            except Exception as e:
+                lag = None
+                replica.error = str(e)
+                monitor, replica._monitor = replica._monitor, None
+                if monitor is not None:
+                    try:
+                        monitor.close()
+                    except Exception:
+                        pass
+            replica.lag = lag
+            replica.healthy = lag is not None and lag <= self.max_lag
+            replica.checked_at = time.time()
+
+    def start(self):
+        """
+        Start checking in the background. The first check runs right away
+        on the monitor thread; until it finds a replica healthy, reads go
+        to the primary.
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name='replica-monitor', daemon=True)
+            self._thread.start()
+
+    def connection(self):
+        """A connection to a healthy replica (round robin), or None"""
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if healthy:
+            start = next(self._rotation)
+            for offset in range(len(healthy)):
+                replica = healthy[(start + offset) % len(healthy)]
+                try:
+                    conn = replica.pool.connection()
+                except Exception as e:
+                    # Out of rotation until the monitor sees it again
+                    replica.healthy = False
+                    replica.error = str(e)
+                    continue
+                with self._lock:
+                    self._stats['replica_reads'] += 1
+                return replica, conn
+        with self._lock:
+            self._stats['fallbacks'] += 1
+        return None, None
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+        stats['replicas'] = [{
+            'name': replica.name,
+            'healthy': replica.healthy,
+            'lag_seconds': replica.lag,
+            'error': replica.error,
+            'checked_at': replica.checked_at,
+            'pool': replica.pool.stats(),
+        } for replica in self.replicas]
+        return stats
+
+    def _run(self):
+        while True:
+            try:
+                self.check()
+            except Exception:
+                pass
+            time.sleep(self.check_interval)
+
+
+def _replica_connect(host, port):
+    # DB_REPLICA_TIMEOUT only bounds the wait for a pooled connection; a
+    # replica that is down must not hold a request for the full connect timeout
+    return lambda: Config.create_db_connection(host=host, port=port,
+                                               connect_timeout=Config.DB_REPLICA_CONNECT_TIMEOUT)
+
+
+def _replica_pool(connect):
+    return ConnectionPool(
+        connect,
+        min_size=0,
+        max_size=Config.DB_POOL_MAX_SIZE,
+        timeout=Config.DB_REPLICA_TIMEOUT,
+        max_lifetime=Config.DB_POOL_MAX_LIFETIME,
+        ping_interval=Config.DB_POOL_PING_INTERVAL,
+    )
+
+
+_replicas = None
+
+
+def get_replicas():
+    """The process-wide ReplicaSet (None until init_replicas, or without DB_REPLICAS)"""
+    return _replicas
+
+
+def request_user():
+    """
+    The caller's user id for stickiness. Taken from request.user_id once
+    token_required has run, otherwise read (unverified) from the bearer
+    token: it only picks a server, it grants nothing.
+    """
+    user_id = getattr(request, 'user_id', None)
+    if user_id is not None:
+        return user_id
+    auth_header = request.headers.get('Authorization', '')
+    if not auth_header.startswith('Bearer '):
+        return None
+    try:
+        return jwt.decode(auth_header[7:], options={'verify_signature': False}).get('user_id')
+    except jwt.InvalidTokenError:
+        return None
+
+
+def mark_write(user_id):
+    """
+    Read this user's requests from the primary for REPLICA_STICKY_SECONDS.
+    Returns the marker for the WRITE_HEADER response header, or None.
+    """
+    if user_id is None:
+        return None
+    _sticky.set(user_id, True)
+    return _signer.sign(str(user_id)).decode()
+
+
+def has_write_marker(user_id):
+    """Whether the request carries this user's WRITE_HEADER marker from the last REPLICA_STICKY_SECONDS"""
+    marker = request.headers.get(WRITE_HEADER)
+    if not marker:
+        return False
+    try:
+        # SignatureExpired is a BadSignature
+        value = _signer.unsign(marker, max_age=Config.REPLICA_STICKY_SECONDS)
+    except BadSignature:
+        return False
+    return value.decode() == str(user_id)
+
+
+def primary_reads(f):
+    """
+    Decorator for GET endpoints that must not read from a lagging replica.
+    Use above @token_required: the token check may already open the
+    request's connection.
+    """
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        g.db_primary = True
+        return f(*args, **kwargs)
+    return decorated
+
+
+def is_sticky():
+    """Whether the caller wrote within REPLICA_STICKY_SECONDS (seen by this worker, or marked by any)"""
+    user_id = request_user()
+    if user_id is None:
+        return False
+    return _sticky.get(user_id) is not None or has_write_marker(user_id)
+
+
+def wants_replica():
+    if not has_request_context() or request.method not in READ_METHODS or g.get('db_primary'):
+        return False
+    return not is_sticky()
+
+
+def route_connection():
+    """
+    Connection for the current request: a replica for reads when replicas
+    are configured and healthy and the caller has not written within the
+    stickiness window, the primary pool otherwise.
+    """
+    replicas = get_replicas()
+    if replicas is not None and wants_replica():
+        replica, conn = replicas.connection()
+        if conn is not None:
+            g.db_route = replica.name
+            return conn
+    if has_request_context():
+        g.db_route = 'primary'
+    return get_pool().connection()
+
+
+def init_replicas(app):
+    """
+    Start monitoring DB_REPLICAS (in the background, so a replica that is
+    down does not hold up startup) and mark who wrote, so their next reads
+    see their own writes.
+    """
+    global _replicas
+    if not Config.DB_REPLICAS:
+        return
+    if _replicas is None:
+        _replicas = ReplicaSet(parse_replicas(Config.DB_REPLICAS))
+        _replicas.start()
+
+    @app.after_request
+    def stick_to_primary(response):
+        if request.method not in READ_METHODS and request.method != 'OPTIONS' and response.status_code < 400:
+            marker = mark_write(request_user())
+            if marker is not None:
+                response.headers[WRITE_HEADER] = marker
+        return response
+
+
+def read_connection():
+    """
+    New (unpooled) connection for a background read job, e.g. the
+    defaulter reports: the first replica within REPLICA_MAX_LAG_SECONDS,
+    else the primary.
+    """
+    for host, port in parse_replicas(Config.DB_REPLICAS):
+        try:
+            conn = Config.create_db_connection(host=host, port=port,
+                                               connect_timeout=Config.DB_REPLICA_CONNECT_TIMEOUT)
+        except Exception:
+            continue
+        try:
+            lag = replication_lag(conn)
+        except Exception:
+            lag = None
+        if lag is not None and lag <= Config.REPLICA_MAX_LAG_SECONDS:
+            return conn
+        conn.close()
+    return Config.create_db_connection()
@@ -0,0 +1,255 @@
+import importlib
+import threading
+import time
+from collections import OrderedDict
+from functools import wraps
+
+from flask import Response, g, make_response, request
+
+from app.config import Config
+from app.utils.etag import etag_for
+from app.utils.replicas import is_sticky
+
+# Rough per-entry bookkeeping cost (key, tuple, dict slots) added to the body size
+ENTRY_OVERHEAD = 256
+
+
+class MemoryBackend:
+    """
+    Per-process store for cached responses: LRU order, a TTL per entry and
+    bounds on both the number of entries and their total size.
+
+    Entries carry tags (e.g. 'mother:12'); invalidate() drops every entry
+    with one of the given tags. set() is passed the time the response
+    started rendering and refuses to store it if one of its tags was
+    invalidated since, so a read that raced a write cannot put stale data
+    back. Another backend (e.g. shared across workers) only needs the same
+    get/set/invalidate/clear/stats methods; see RESPONSE_CACHE_BACKEND.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None):
+        self.max_entries = max_entries or Config.RESPONSE_CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or Config.RESPONSE_CACHE_MAX_BYTES
+        self._data = OrderedDict()
+        self._tags = {}
+        self._invalidated = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(
+            ['hits', 'misses', 'stores', 'stale_rejected', 'evictions', 'expirations', 'invalidations'], 0)
+
+    def clock(self):
+        return time.monotonic()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self._counts['misses'] += 1
+                return None
+            expires_at, _, _, value = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self._counts['expirations'] += 1
+                self._counts['misses'] += 1
+                return None
+            self._data.move_to_end(key)
+            self._counts['hits'] += 1
+            return value
+
+    def set(self, key, value, size, tags=(), ttl=None, started=None):
+        ttl = Config.RESPONSE_CACHE_TTL if ttl is None else ttl
+        size += ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return False
+        with self._lock:
+            if started is not None and any(self._invalidated.get(tag, -1) >= started for tag in tags):
+                self._counts['stale_rejected'] += 1
+                return False
+
+            self._remove(key)
+            tags = frozenset(tags)
+            self._data[key] = (time.monotonic() + ttl, size, tags, value)
+            self._bytes += size
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            self._counts['stores'] += 1
+
+            while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self._counts['evictions'] += 1
+            return True
+
+    def invalidate(self, tags):
+        """Drop every entry tagged with any of `tags`; returns how many went"""
+        removed = 0
+        now = time.monotonic()
+        with self._lock:
+            for tag in tags:
+                self._invalidated[tag] = now
+                self._invalidated.move_to_end(tag)
+                for key in list(self._tags.get(tag, ())):
+                    self._remove(key)
+                    removed += 1
+            # Only in-flight renders look these up, so old ones can go
+            while len(self._invalidated) > self.max_entries:
+                self._invalidated.popitem(last=False)
+            self._counts['invalidations'] += removed
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._tags.clear()
+            self._invalidated.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats.update({
+                'backend': 'memory',
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'max_entries': self.max_entries,
+                'max_bytes': self.max_bytes,
+                'tags': len(self._tags),
+            })
+        lookups = stats['hits'] + stats['misses']
+        stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+        return stats
+
+    def _remove(self, key):
+        item = self._data.pop(key, None)
+        if item is None:
+            return
+        _, size, tags, _ = item
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+def load_backend(spec):
+    """'memory' or 'package.module:ClassName' for a custom backend"""
+    if spec == 'memory':
+        return MemoryBackend()
+    module_name, _, class_name = spec.partition(':')
+    if not class_name:
+        raise ValueError(f'Invalid RESPONSE_CACHE_BACKEND: {spec}')
+    return getattr(importlib.import_module(module_name), class_name)()
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+
+def get_cache():
+    """The process-wide response cache backend"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                _backend = load_backend(Config.RESPONSE_CACHE_BACKEND)
+    return _backend
+
+
+def cache_key():
+    """
+    Route, query string and caller scope. Entries are shared per role; a
+    mother's entries are also keyed by her user id, since what she may see
+    depends on who she is.
+    """
+    args = '&'.join(f'{name}={value}' for name, value in sorted(request.args.items(multi=True)))
+    user = request.user_id if request.user_role == 'mother' else ''
+    return f'{request.path}?{args}|{request.user_role}|{user}'
+
+
+def cache_tags(*tags):
+    """Tag the cached response being rendered (e.g. with each row it contains)"""
+    if 'cache_tags' in g:
+        g.cache_tags.update(tags)
+
+
+def invalidate(*tags):
+    """
+    Drop cached responses tagged with any of `tags`. Done now and again
+    once the request's transaction has finished (see init_response_cache).
+    """
+    get_cache().invalidate(tags)
+    g.setdefault('cache_invalidations', set()).update(tags)
+
+
+def cached(*tag_templates):
+    """
+    Decorator for GET endpoints: serve repeat requests from the response
+    cache. `tag_templates` are formatted with the view arguments, e.g.
+    'mother:{mother_id}'. Use below @token_required and above @conditional,
+    so a hit needs no database work at all (including the ETag query).
+
+    Entries are shared by everyone with the same cache_key, but ETags are
+    per user: a hit re-tags the body for the caller from the data versions
+    @conditional stored with it, rather than replaying the first user's tag.
+
+    With read replicas, callers inside their stickiness window bypass the
+    lookup (another worker's cache may not have seen their write), and a
+    render read from a replica counts as started REPLICA_MAX_LAG_SECONDS
+    earlier, so it is not stored if a tag was invalidated within that lag.
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated(*args, **kwargs):
+            if not Config.RESPONSE_CACHE_ENABLED:
+                return f(*args, **kwargs)
+
+            cache = get_cache()
+            key = cache_key()
+            entry = None if Config.DB_REPLICAS and is_sticky() else cache.get(key)
+            if entry is not None:
+                return _from_entry(entry)
+
+            started = cache.clock()
+            g.cache_tags = {template.format(**kwargs) for template in tag_templates}
+            response = make_response(f(*args, **kwargs))
+
+            if response.status_code == 200 and not response.is_streamed and not response.direct_passthrough:
+                body = response.get_data()
+                headers = [(name, response.headers[name]) for name in ('ETag', 'Cache-Control')
+                           if name in response.headers]
+                if g.get('db_route', 'primary') != 'primary':
+                    started -= Config.REPLICA_MAX_LAG_SECONDS
+                cache.set(key, (body, response.mimetype, headers, g.get('etag_versions')), len(body) + len(key),
+                          tags=g.cache_tags, started=started)
+            response.headers['X-Cache'] = 'MISS'
+            return response
+
+        return decorated
+    return decorator
+
+
+def _from_entry(entry):
+    body, mimetype, headers, versions = entry
+    headers = dict(headers)
+    if 'ETag' in headers and versions is not None:
+        headers['ETag'] = etag_for(versions)
+    etag = headers.get('ETag')
+    if etag and etag in {tag.strip() for tag in request.headers.get('If-None-Match', '').split(',')}:
+        response = make_response('', 304)
+    else:
+        response = Response(body, status=200, mimetype=mimetype)
+    response.headers.update(headers)
+    response.headers['X-Cache'] = 'HIT'
+    return response
+
+
+def init_response_cache(app):
+    """Repeat this request's invalidations after its transaction has been committed"""
+
+    @app.teardown_request
+    def invalidate_after_commit(exc):
+        tags = g.pop('cache_invalidations', None)
+        if tags:
+            get_cache().invalidate(tags)
@@ -0,0 +1,78 @@
+import threading
+import time
+from datetime import datetime
+
+
+class RevocationList:
+    """
+    In-memory view of revoked tokens.
+
+    - jtis of individually revoked tokens (logout)
+    - per-user cutoffs: every token issued before the cutoff is revoked
+      (role changes, "log out everywhere"). `iat` has whole seconds, so
+      a token issued in the cutoff's own second (the login right after
+      a revocation) stays valid
+
+    Revocations made by this process apply immediately. Revocations made
+    by other workers are picked up by refresh(), which reloads both sets
+    from the database at most every `refresh_interval` seconds.
+    """
+
+    def __init__(self, refresh_interval=30):
+        self.refresh_interval = refresh_interval
+        self._jtis = set()
+        self._user_cutoffs = {}
+        self._last_refresh = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, payload):
+        jti = payload.get('jti')
+        if jti is not None and jti in self._jtis:
+            return True
+        cutoff = self._user_cutoffs.get(payload.get('user_id'))
+        return cutoff is not None and payload.get('iat', 0) < cutoff
+
+    def needs_refresh(self):
+        return self._last_refresh is None or time.monotonic() - self._last_refresh >= self.refresh_interval
+
+    def refresh(self, cursor):
+        """Reload revocations that have not expired yet"""
+        cursor.execute("SELECT jti FROM revoked_tokens WHERE expires_at > UTC_TIMESTAMP()")
+        jtis = {row['jti'] for row in cursor.fetchall()}
+        cursor.execute("SELECT user_id, not_before FROM user_token_cutoffs")
+        cutoffs = {row['user_id']: _to_epoch(row['not_before']) for row in cursor.fetchall()}
+        with self._lock:
+            self._jtis = jtis
+            self._user_cutoffs = cutoffs
+            self._last_refresh = time.monotonic()
+
+    def mark_refreshed(self):
+        """Postpone the next refresh (e.g. after a failed attempt)"""
+        self._last_refresh = time.monotonic()
+
+    def revoke_token(self, cursor, payload):
+        """Revoke a single token until it would have expired anyway"""
+        cursor.execute("""
+            INSERT IGNORE INTO revoked_tokens (jti, user_id, expires_at)
+            VALUES (%s, %s, %s)
+        """, (payload['jti'], payload['user_id'], datetime.utcfromtimestamp(payload['exp'])))
+        with self._lock:
+            self._jtis = self._jtis | {payload['jti']}
+
+    def revoke_user(self, cursor, user_id):
+        """Revoke every token issued to a user up to now"""
+        now = int(time.time())
+        cursor.execute("""
+            INSERT INTO user_token_cutoffs (user_id, not_before)
+            VALUES (%s, %s)
+            ON DUPLICATE KEY UPDATE not_before = VALUES(not_before)
+        """, (user_id, datetime.utcfromtimestamp(now)))
+        with self._lock:
+            cutoffs = dict(self._user_cutoffs)
+            cutoffs[user_id] = now
+            self._user_cutoffs = cutoffs
+
+
+def _to_epoch(value):
+    """Seconds since the epoch for a naive UTC datetime from MySQL"""
+    return int((value - datetime(1970, 1, 1)).total_seconds())
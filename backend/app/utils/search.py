@@ -0,0 +1,131 @@
+import re
+
+# Characters with a meaning in MySQL boolean full-text syntax
+_BOOLEAN_OPERATORS = re.compile(r'[+\-<>()~*"@]')
+
+# Shortest term the ngram parser can match (ngram_token_size)
+MIN_TERM_LENGTH = 2
+
+SEARCH_TYPES = ['mother', 'child', 'visit', 'vaccination']
+
+# Every query ranks hits with MATCH ... AGAINST on a FULLTEXT (ngram)
+# index from schema.sql, so no leading-wildcard LIKE scans are involved.
+# Visits and vaccinations can match on two tables; their hits are unioned
+# and de-duplicated by id before the details are joined.
+SEARCH_QUERIES = {
+    'mother': """
+        SELECT m.*, u.full_name, u.email, u.phone,
+               MATCH(u.full_name, u.email, u.phone) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+        FROM users u
+        JOIN mothers m ON m.user_id = u.user_id
+        WHERE MATCH(u.full_name, u.email, u.phone) AGAINST (%(q)s IN BOOLEAN MODE)
+        ORDER BY score DESC, m.mother_id
+        LIMIT %(limit)s OFFSET %(offset)s
+    """,
+    'child': """
+        SELECT c.*, MATCH(c.full_name) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+        FROM children c
+        WHERE MATCH(c.full_name) AGAINST (%(q)s IN BOOLEAN MODE)
+        ORDER BY score DESC, c.child_id
+        LIMIT %(limit)s OFFSET %(offset)s
+    """,
+    'visit': """
+        SELECT v.*, m.user_id, u.full_name as mother_name, hits.score
+        FROM (
+            SELECT visit_id, MAX(score) AS score
+            FROM (
+                SELECT v.visit_id,
+                       MATCH(u.full_name, u.email, u.phone) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+                FROM users u
+                JOIN mothers m ON m.user_id = u.user_id
+                JOIN visits v ON v.mother_id = m.mother_id
+                WHERE MATCH(u.full_name, u.email, u.phone) AGAINST (%(q)s IN BOOLEAN MODE)
+                UNION ALL
+                SELECT visit_id, MATCH(notes) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+                FROM visits
+                WHERE MATCH(notes) AGAINST (%(q)s IN BOOLEAN MODE)
+            ) matched
+            GROUP BY visit_id
+            ORDER BY score DESC, visit_id
+            LIMIT %(limit)s OFFSET %(offset)s
+        ) hits
+        JOIN visits v ON v.visit_id = hits.visit_id
+        JOIN mothers m ON v.mother_id = m.mother_id
+        JOIN users u ON m.user_id = u.user_id
+        ORDER BY hits.score DESC, v.visit_id
+    """,
+    'vaccination': """
+        SELECT v.*, c.full_name as child_name, hits.score
+        FROM (
+            SELECT vaccine_id, MAX(score) AS score
+            FROM (
+                SELECT vaccine_id, MATCH(vaccine_name) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+                FROM vaccinations
+                WHERE MATCH(vaccine_name) AGAINST (%(q)s IN BOOLEAN MODE)
+                UNION ALL
+                SELECT v.vaccine_id, MATCH(c.full_name) AGAINST (%(q)s IN BOOLEAN MODE) AS score
+                FROM children c
+                JOIN vaccinations v ON v.child_id = c.child_id
+                WHERE MATCH(c.full_name) AGAINST (%(q)s IN BOOLEAN MODE)
+            ) matched
+            GROUP BY vaccine_id
+            ORDER BY score DESC, vaccine_id
+            LIMIT %(limit)s OFFSET %(offset)s
+        ) hits
+        JOIN vaccinations v ON v.vaccine_id = hits.vaccine_id
+        JOIN children c ON v.child_id = c.child_id
+        ORDER BY hits.score DESC, v.vaccine_id
+    """,
+}
+
+ID_FIELDS = {
+    'mother': 'mother_id',
+    'child': 'child_id',
+    'visit': 'visit_id',
+    'vaccination': 'vaccine_id',
+}
+
+
+def build_boolean_query(text):
+    """
+    Turn free text into a boolean-mode AGAINST() expression where every
+    word is required, e.g. 'jane doe' -> '+"jane" +"doe"'.
+    Returns None when nothing searchable is left.
+    """
+    words = _BOOLEAN_OPERATORS.sub(' ', text or '').split()
+    words = [w for w in words if len(w) >= MIN_TERM_LENGTH]
+    if not words:
+        return None
+    return ' '.join(f'+"{w}"' for w in words)
+
+
+def search_records(cursor, boolean_query, types, limit, offset):
+    """
+    Return up to `limit` + 1 ranked hits starting at `offset`.
+
+    With one type the offset is pushed down into SQL. With several, each
+    entity returns its top offset + limit + 1 hits and they are merged by
+    score, so the cost is bounded by the search depth, not table size.
+    """
+    if len(types) == 1:
+        return _run(cursor, types[0], boolean_query, limit + 1, offset)
+
+    hits = []
+    for record_type in types:
+        hits.extend(_run(cursor, record_type, boolean_query, offset + limit + 1, 0))
+    hits.sort(key=lambda hit: (-hit['score'], SEARCH_TYPES.index(hit['type']), hit[ID_FIELDS[hit['type']]]))
+    return hits[offset:offset + limit + 1]
+
+
+def _run(cursor, record_type, boolean_query, limit, offset):
+    cursor.execute(SEARCH_QUERIES[record_type], {
+        'q': boolean_query,
+        'limit': limit,
+        'offset': offset,
+    })
+    hits = []
+    for row in cursor.fetchall():
+        row['type'] = record_type
+        row['score'] = float(row['score'])
+        hits.append(row)
+    return hits
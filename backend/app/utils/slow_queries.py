@@ -0,0 +1,265 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from collections import deque
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from logging.handlers import RotatingFileHandler
+
+from flask import has_request_context, request
+
+from app.config import Config
+from app.utils.instrumentation import add_query_listener, normalize_sql
+
+# Statements MySQL can EXPLAIN without side effects worth planning
+EXPLAINABLE = ('SELECT', 'WITH', 'UPDATE', 'DELETE')
+
+# Longest list/tuple parameter kept in an entry (batch inserts, IN lists)
+MAX_PARAMS = 20
+
+# The EXPLAIN thread's own statements must not be captured again
+_local = threading.local()
+
+
+def normalize_params(params):
+    """
+    Parameter shapes for the log: numbers, dates and NULLs are kept (ids make
+    a plan reproducible), text is reduced to its length since it may be a
+    name, phone number or password hash.
+    """
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {key: normalize_params(value) for key, value in params.items()}
+    if isinstance(params, (list, tuple)):
+        values = [normalize_params(value) for value in params[:MAX_PARAMS]]
+        if len(params) > MAX_PARAMS:
+            values.append(f'... {len(params) - MAX_PARAMS} more')
+        return values
+    if isinstance(params, (bool, int, float)):
+        return params
+    if isinstance(params, Decimal):
+        return float(params)
+    if isinstance(params, (date, datetime)):
+        return params.isoformat()
+    if isinstance(params, (bytes, bytearray)):
+        return f'<bytes:{len(params)}>'
+    return f'<str:{len(str(params))}>'
+
+
+def explainable(sql):
+    words = sql.lstrip(' \t\r\n(').split(None, 1)
+    return bool(words) and words[0].upper() in EXPLAINABLE
+
+
+class SlowQueryLog:
+    """
+    Query listener that captures statements slower than SLOW_QUERY_MS.
+
+    Capturing happens on the request thread and is cheap: a duration check,
+    then sampling (SLOW_QUERY_SAMPLE_RATE) and a per-minute budget
+    (SLOW_QUERY_MAX_PER_MINUTE). Captured statements are handed to a
+    background thread, which runs EXPLAIN FORMAT=JSON on its own connection
+    and writes the entry to the ring buffer and the rotating log file, so
+    the slow request is not made slower.
+    """
+
+    def __init__(self, threshold_ms=None, sample_rate=None, max_per_minute=None, buffer_size=None,
+                 explain=None, connect=None, logger=None):
+        self.threshold = (Config.SLOW_QUERY_MS if threshold_ms is None else threshold_ms) / 1000.0
+        self.sample_rate = Config.SLOW_QUERY_SAMPLE_RATE if sample_rate is None else sample_rate
+        self.max_per_minute = Config.SLOW_QUERY_MAX_PER_MINUTE if max_per_minute is None else max_per_minute
+        self.explain = Config.SLOW_QUERY_EXPLAIN if explain is None else explain
+        self._connect = connect or Config.create_db_connection
+        self._conn = None
+        self.logger = logger
+        self._entries = deque(maxlen=buffer_size or Config.SLOW_QUERY_BUFFER_SIZE)
+        self._queue = queue.Queue(maxsize=100)
+        self._worker = None
+        self._lock = threading.Lock()
+        self._window = (0, 0)
+        self._counts = dict.fromkeys(['slow', 'captured', 'sampled_out', 'rate_limited', 'dropped'], 0)
+
+    def __call__(self, cursor, sql, params, seconds, rows, error):
+        if seconds < self.threshold or getattr(_local, 'explaining', False):
+            return
+        entry = self.capture(cursor, sql, params, seconds, rows, error)
+        if entry is None:
+            return
+        try:
+            self._queue.put_nowait(entry)
+        except queue.Full:
+            self._count('dropped')
+            return
+        self._ensure_worker()
+
+    def capture(self, cursor, sql, params, seconds, rows, error):
+        """Build an entry for a slow statement, or None if sampled out or over budget"""
+        self._count('slow')
+        if self.sample_rate < 1 and random.random() >= self.sample_rate:
+            self._count('sampled_out')
+            return None
+
+        minute = int(time.monotonic() // 60)
+        with self._lock:
+            window, used = self._window
+            if window != minute:
+                used = 0
+            if used >= self.max_per_minute:
+                self._counts['rate_limited'] += 1
+                return None
+            self._window = (minute, used + 1)
+            self._counts['captured'] += 1
+
+        if isinstance(sql, bytes):
+            sql = sql.decode('utf-8', 'replace')
+
+        # Literal statement for EXPLAIN; stays on the worker, never stored
+        literal = None
+        if self.explain and error is None and explainable(sql):
+            try:
+                literal = cursor.mogrify(sql, params)
+            except Exception:
+                literal = None
+
+        return {
+            'time': datetime.now(timezone.utc).isoformat(timespec='milliseconds'),
+            'endpoint': _endpoint(),
+            'duration_ms': round(seconds * 1000, 1),
+            'statement': normalize_sql(sql),
+            'params': normalize_params(params),
+            'rows': rows if rows is not None and rows >= 0 else None,
+            'error': f'{type(error).__name__}: {error}' if error is not None else None,
+            'plan': None,
+            '_literal': literal,
+        }
+
+    def process(self, entry):
+        """EXPLAIN the statement (worker thread) and record the entry"""
+        literal = entry.pop('_literal', None)
+        if literal is not None:
+            try:
+                entry['plan'] = self._explain(literal)
+            except Exception as e:
+                entry['plan'] = {'error': str(e)}
+        with self._lock:
+            self._entries.append(entry)
+        if self.logger is not None:
+            self.logger.warning(json.dumps(entry, default=str))
+
+    def entries(self, limit=None):
+        """Captured entries, newest first"""
+        with self._lock:
+            entries = list(self._entries)
+        entries.reverse()
+        return entries[:limit] if limit else entries
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._counts)
+            stats['buffered'] = len(self._entries)
+        stats.update({
+            'threshold_ms': self.threshold * 1000,
+            'sample_rate': self.sample_rate,
+            'max_per_minute': self.max_per_minute,
+            'pending': self._queue.qsize(),
+        })
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def _explain(self, literal):
+        _local.explaining = True
+        try:
+            if self._conn is None:
+                self._conn = self._connect()
+            else:
+                self._conn.ping(reconnect=True)
+            cursor = self._conn.cursor()
+            try:
+                cursor.execute('EXPLAIN FORMAT=JSON ' + literal)
+                row = cursor.fetchone()
+            finally:
+                cursor.close()
+            # EXPLAIN never changes data, but don't leave a transaction open
+            self._conn.rollback()
+        except Exception:
+            conn, self._conn = self._conn, None
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            raise
+        finally:
+            _local.explaining = False
+        plan = next(iter(row.values())) if isinstance(row, dict) else row[0]
+        return json.loads(plan)
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='slow-query-log', daemon=True)
+                self._worker.start()
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            try:
+                self.process(entry)
+            except Exception:
+                pass
+
+
+def _endpoint():
+    """URL rule of the current request, or None for background work"""
+    if not has_request_context():
+        return None
+    rule = request.url_rule
+    return f'{request.method} {rule.rule if rule is not None else request.path}'
+
+
+def file_logger(path):
+    """JSON-lines logger on a size-rotated file (SLOW_QUERY_LOG_MAX_BYTES, SLOW_QUERY_LOG_BACKUPS)"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    logger = logging.getLogger('app.slow_queries')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    if not logger.handlers:
+        handler = RotatingFileHandler(path, maxBytes=Config.SLOW_QUERY_LOG_MAX_BYTES,
+                                      backupCount=Config.SLOW_QUERY_LOG_BACKUPS, encoding='utf-8')
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+    return logger
+
+
+_log = None
+
+
+def get_slow_query_log():
+    """The process-wide slow-query log (None when SLOW_QUERY_ENABLED is off)"""
+    return _log
+
+
+def init_slow_query_log(app):
+    """Start capturing slow statements for this process"""
+    global _log
+    if not Config.SLOW_QUERY_ENABLED or _log is not None:
+        return
+    logger = file_logger(Config.SLOW_QUERY_LOG_FILE) if Config.SLOW_QUERY_LOG_FILE else None
+    _log = SlowQueryLog(logger=logger)
+    add_query_listener(_log)
@@ -0,0 +1,62 @@
+import pymysql
+from flask import Response, current_app, request
+from app.config import Config
+from app.utils.instrumentation import instrumented
+
+
+def wants_stream():
+    """True when the client asked for a streamed full-table response"""
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_query(query, params=None, batch_size=None):
+    """
+    Run `query` on an unbuffered server-side cursor and stream the rows as
+    {"success": true, "data": [...]} without materialising the result.
+
+    The stream uses its own pooled connection so the request session can
+    still commit/roll back while rows are being sent. If the client goes
+    away before the end, the connection is discarded rather than drained.
+    """
+    batch_size = batch_size or Config.STREAM_BATCH_SIZE
+    dumps = current_app.json.dumps
+
+    conn = Config.get_db_connection()
+    state = {'done': False}
+    try:
+        cursor = conn.cursor(instrumented(pymysql.cursors.SSDictCursor))
+        cursor.execute(query, params)
+    except Exception:
+        conn.invalidate()
+        raise
+
+    def release():
+        if state['done']:
+            return
+        state['done'] = True
+        # An unfinished unbuffered result would be read to the end by
+        # cursor.close(); dropping the connection is cheaper
+        conn.invalidate()
+
+    def generate():
+        yield '{"success": true, "data": ['
+        first = True
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            chunk = ','.join(dumps(row) for row in rows)
+            if first:
+                first = False
+            else:
+                chunk = ',' + chunk
+            yield chunk
+        yield ']}'
+
+        state['done'] = True
+        cursor.close()
+        conn.close()
+
+    response = Response(generate(), mimetype='application/json')
+    response.call_on_close(release)
+    return response
@@ -0,0 +1,179 @@
+import pymysql
+from flask import current_app
+
+from app.config import Config
+from app.utils.pagination import encode_cursor, decode_cursor, keyset_condition, InvalidCursorError
+
+# Synced entities in the order a batch is filled. Each is read in
+# (updated_at, id) order through its idx_*_updated index; `mother` is the
+# column that scopes a mother's own sync to her records.
+SYNC_ENTITIES = {
+    'mothers': {
+        'query': """
+            SELECT m.*, u.full_name, u.email, u.phone
+            FROM mothers m
+            JOIN users u ON m.user_id = u.user_id
+        """,
+        'updated': 'm.updated_at',
+        'id': ('m.mother_id', 'mother_id'),
+        'mother': 'm.mother_id',
+    },
+    'children': {
+        'query': "SELECT c.* FROM children c",
+        'updated': 'c.updated_at',
+        'id': ('c.child_id', 'child_id'),
+        'mother': 'c.mother_id',
+    },
+    'visits': {
+        'query': "SELECT v.* FROM visits v",
+        'updated': 'v.updated_at',
+        'id': ('v.visit_id', 'visit_id'),
+        'mother': 'v.mother_id',
+    },
+    'vaccinations': {
+        'query': """
+            SELECT vac.*
+            FROM vaccinations vac
+            JOIN children c ON vac.child_id = c.child_id
+        """,
+        'updated': 'vac.updated_at',
+        'id': ('vac.vaccine_id', 'vaccine_id'),
+        'mother': 'c.mother_id',
+    },
+}
+
+TOMBSTONE_QUERY = "SELECT tombstone_id, entity, entity_id, deleted_at FROM sync_tombstones t"
+
+# Newest time a batch may read up to: SYNC_SAFETY_SECONDS ago, and before the
+# oldest transaction that has written rows but not committed them yet. Those
+# rows carry updated_at/deleted_at times from inside the transaction, so a
+# cursor that moved past them would never see them once they commit.
+CUTOFF_QUERY = """
+    SELECT LEAST(NOW() - INTERVAL %s SECOND,
+                 COALESCE(MIN(trx_started), NOW()) - INTERVAL 1 SECOND) AS cutoff
+    FROM information_schema.innodb_trx
+    WHERE trx_rows_modified > 0 AND trx_mysql_thread_id <> CONNECTION_ID()
+"""
+
+# Cleared when the database user may not read innodb_trx (needs PROCESS)
+_open_transactions_visible = True
+
+# Watermark layout: [cutoff, mothers, children, visits, vaccinations, tombstones]
+WATERMARK_SIZE = len(SYNC_ENTITIES) + 2
+
+
+def decode_watermark(token):
+    """Positions per entity from a watermark, or the start of time for None"""
+    if not token:
+        return {'cutoff': None, 'positions': {name: None for name in SYNC_ENTITIES}, 'tombstones': None}
+    values = decode_cursor(token, WATERMARK_SIZE)
+    positions = dict(zip(SYNC_ENTITIES, values[1:-1]))
+    for position in positions.values():
+        if position is not None and (not isinstance(position, list) or len(position) != 2):
+            raise InvalidCursorError('Invalid watermark')
+    if values[-1] is not None and (not isinstance(values[-1], list) or len(values[-1]) != 2):
+        raise InvalidCursorError('Invalid watermark')
+    return {'cutoff': values[0], 'positions': positions, 'tombstones': values[-1]}
+
+
+def encode_watermark(state):
+    return encode_cursor([state['cutoff']] +
+                         [state['positions'][name] for name in SYNC_ENTITIES] +
+                         [state['tombstones']])
+
+
+def sync_cutoff(cursor):
+    """
+    The cutoff for this sync (see CUTOFF_QUERY). Without the PROCESS
+    privilege only SYNC_SAFETY_SECONDS is applied, so a transaction that
+    stays open longer than that can still be skipped.
+    """
+    global _open_transactions_visible
+    if _open_transactions_visible:
+        try:
+            cursor.execute(CUTOFF_QUERY, (Config.SYNC_SAFETY_SECONDS,))
+            return cursor.fetchone()['cutoff']
+        except pymysql.err.OperationalError as e:
+            # 1227: access denied, you need the PROCESS privilege
+            if e.args[0] != 1227:
+                raise
+            _open_transactions_visible = False
+            current_app.logger.warning('Sync cannot see open transactions (grant PROCESS): %s', e.args[1])
+    cursor.execute("SELECT NOW() - INTERVAL %s SECOND AS cutoff", (Config.SYNC_SAFETY_SECONDS,))
+    return cursor.fetchone()['cutoff']
+
+
+def compact(row):
+    """Drop null fields; clients treat a missing field as null"""
+    return {key: value for key, value in row.items() if value is not None}
+
+
+def collect_changes(cursor, state, cutoff, limit, mother_id=None):
+    """
+    Fill one batch of at most `limit` changed rows, entity by entity.
+
+    Only rows with updated_at <= cutoff (see sync_cutoff) are read, so
+    rows of transactions that have not committed yet are left for the
+    next call instead of being skipped for good. Tombstones are read in
+    (deleted_at, tombstone_id) order for the same reason: ids are handed
+    out before commit, so an id order would pass over a slow delete.
+    Returns (changes, deleted, new_state, has_more).
+    """
+    positions = dict(state['positions'])
+    changes = {name: [] for name in SYNC_ENTITIES}
+    deleted = {name: [] for name in SYNC_ENTITIES}
+    remaining = limit
+
+    for name, entity in SYNC_ENTITIES.items():
+        id_column, id_field = entity['id']
+        conditions = [f"{entity['updated']} <= %s"]
+        params = [cutoff]
+        if mother_id is not None:
+            conditions.append(f"{entity['mother']} = %s")
+            params.append(mother_id)
+        if positions[name] is not None:
+            condition, condition_params = keyset_condition([entity['updated'], id_column], positions[name])
+            conditions.append(condition)
+            params.extend(condition_params)
+
+        cursor.execute(
+            entity['query'] + " WHERE " + " AND ".join(conditions) +
+            f" ORDER BY {entity['updated']}, {id_column} LIMIT %s",
+            tuple(params + [remaining + 1])
+        )
+        rows = list(cursor.fetchall())
+        has_more = len(rows) > remaining
+        rows = rows[:remaining]
+        if rows:
+            last = rows[-1]
+            positions[name] = [str(last['updated_at']), last[id_field]]
+            changes[name] = [compact(row) for row in rows]
+            remaining -= len(rows)
+        if has_more:
+            return changes, deleted, dict(state, positions=positions), True
+
+    conditions = ["t.deleted_at <= %s"]
+    params = [cutoff]
+    if mother_id is not None:
+        conditions.append("t.mother_id = %s")
+        params.append(mother_id)
+    if state['tombstones'] is not None:
+        condition, condition_params = keyset_condition(['t.deleted_at', 't.tombstone_id'], state['tombstones'])
+        conditions.append(condition)
+        params.extend(condition_params)
+    cursor.execute(
+        TOMBSTONE_QUERY + " WHERE " + " AND ".join(conditions) +
+        " ORDER BY t.deleted_at, t.tombstone_id LIMIT %s",
+        tuple(params + [remaining + 1])
+    )
+    rows = list(cursor.fetchall())
+    has_more = len(rows) > remaining
+    rows = rows[:remaining]
+    tombstones = state['tombstones']
+    for row in rows:
+        if row['entity'] in deleted:
+            deleted[row['entity']].append(row['entity_id'])
+        tombstones = [str(row['deleted_at']), row['tombstone_id']]
+
+    new_state = {'cutoff': state['cutoff'], 'positions': positions, 'tombstones': tombstones}
+    return changes, deleted, new_state, has_more
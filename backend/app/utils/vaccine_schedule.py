@@ -0,0 +1,315 @@
+import re
+from datetime import date
+
+import numpy as np
+import pymysql
+
+# Routine infant schedules as series of doses:
+# (vaccine, age in days, min days after the previous dose, latest age in days or None)
+# A dose past its latest age is no longer given and does not block the series.
+SCHEDULES = {
+    # Kenya Expanded Programme on Immunization (KEPI), Ministry of Health
+    'KE': [
+        ('BCG', [('BCG', 0, 0, 365)]),
+        ('OPV', [('OPV 0', 0, 0, 14), ('OPV 1', 42, 28, 730), ('OPV 2', 70, 28, 730), ('OPV 3', 98, 28, 730)]),
+        ('Pentavalent', [('Pentavalent 1', 42, 0, 730), ('Pentavalent 2', 70, 28, 730), ('Pentavalent 3', 98, 28, 730)]),
+        ('PCV', [('PCV 1', 42, 0, 730), ('PCV 2', 70, 28, 730), ('PCV 3', 98, 28, 730)]),
+        ('Rotavirus', [('Rotavirus 1', 42, 0, 105), ('Rotavirus 2', 70, 28, 168)]),
+        ('IPV', [('IPV', 98, 0, 730)]),
+        ('Measles-Rubella', [('Measles-Rubella 1', 270, 0, 1825), ('Measles-Rubella 2', 540, 28, 1825)]),
+    ],
+    # Rwanda Expanded Programme on Immunization (EPI)
+    'RW': [
+        ('BCG', [('BCG', 0, 0, 365)]),
+        ('OPV', [('OPV 0', 0, 0, 14), ('OPV 1', 42, 28, 730), ('OPV 2', 70, 28, 730), ('OPV 3', 98, 28, 730)]),
+        ('Pentavalent', [('Pentavalent 1', 42, 0, 730), ('Pentavalent 2', 70, 28, 730), ('Pentavalent 3', 98, 28, 730)]),
+        ('PCV', [('PCV 1', 42, 0, 730), ('PCV 2', 70, 28, 730), ('PCV 3', 98, 28, 730)]),
+        ('Rotavirus', [('Rotavirus 1', 42, 0, 105), ('Rotavirus 2', 70, 28, 224), ('Rotavirus 3', 98, 28, 224)]),
+        ('IPV', [('IPV', 98, 0, 730)]),
+        ('Measles-Rubella', [('Measles-Rubella 1', 270, 0, 1825), ('Measles-Rubella 2', 450, 28, 1825)]),
+    ],
+}
+
+# Other spellings nurses use for the same dose, keyed by series prefix
+SERIES_ALIASES = {
+    'OPV': ['bopv', 'polio'],
+    'Pentavalent': ['penta', 'dtphepbhib', 'dtp'],
+    'PCV': ['pneumo'],
+    'Rotavirus': ['rota'],
+    'IPV': [],
+    'Measles-Rubella': ['mr', 'measles', 'mcv'],
+}
+
+STATUSES = ['overdue', 'due', 'upcoming']
+
+_NON_ALNUM = re.compile(r'[^a-z0-9]')
+_DOSE_NUMBER = re.compile(r'(\d+)$')
+
+
+def normalize_vaccine_name(name):
+    """'Measles-Rubella 1' -> 'measlesrubella1'"""
+    return _NON_ALNUM.sub('', (name or '').lower())
+
+
+class ScheduleEngine:
+    """
+    Computes each child's next dose per series, for all children at once.
+
+    The schedule is flattened into arrays (ages, intervals, latest ages)
+    once. compute() then works column by column over NumPy arrays of
+    children, so the cost is a few vector operations per dose rather than
+    Python work per child and vaccination.
+    """
+
+    def __init__(self, schedule):
+        self.series = [name for name, _ in schedule]
+        self.doses = []
+        self.dose_series = []
+        for series_index, (series_name, doses) in enumerate(schedule):
+            for dose in doses:
+                self.doses.append(dose)
+                self.dose_series.append(series_index)
+        if len(self.doses) > 63:
+            raise ValueError('A schedule can have at most 63 doses')
+
+        self.names = [dose[0] for dose in self.doses]
+        self.aliases = self._build_aliases(schedule)
+
+    def _build_aliases(self, schedule):
+        aliases = {}
+        index = 0
+        for series_name, doses in schedule:
+            prefixes = [normalize_vaccine_name(series_name)] + SERIES_ALIASES.get(series_name, [])
+            for dose in doses:
+                aliases[normalize_vaccine_name(dose[0])] = index
+                number = _DOSE_NUMBER.search(dose[0])
+                suffix = number.group(1) if number else '1'
+                for prefix in prefixes:
+                    aliases.setdefault(prefix + suffix, index)
+                    if len(doses) == 1:
+                        aliases.setdefault(prefix, index)
+                index += 1
+        return aliases
+
+    @property
+    def horizon_days(self):
+        """Children older than this have no routine doses left"""
+        return max(dose[3] or dose[1] for dose in self.doses)
+
+    def dose_index(self, vaccine_name):
+        return self.aliases.get(normalize_vaccine_name(vaccine_name))
+
+    # Loading
+
+    def given_query(self, where=None):
+        """
+        One row per child: a bitmask of the doses given and, per series,
+        the date of the most recent dose. Names are matched in SQL so only
+        a row per child crosses the wire, not a row per vaccination.
+        `where` is an extra condition on children (alias c).
+        """
+        normalized = "LOWER(REGEXP_REPLACE(v.vaccine_name, '[^A-Za-z0-9]', ''))"
+        whens = ' '.join('WHEN %s THEN %s' for _ in self.aliases)
+        params = []
+        for alias, index in self.aliases.items():
+            params.extend([alias, index])
+
+        series_columns = []
+        for series_index in range(len(self.series)):
+            members = ', '.join(str(i) for i, s in enumerate(self.dose_series) if s == series_index)
+            series_columns.append(f"MAX(CASE WHEN dose IN ({members}) THEN date_given END)")
+
+        scope = f' AND {where}' if where else ''
+        sql = f"""
+            SELECT child_id, BIT_OR(1 << dose) AS given_mask, {', '.join(series_columns)}
+            FROM (
+                SELECT v.child_id, v.date_given, CASE {normalized} {whens} END AS dose
+                FROM vaccinations v
+                JOIN children c ON v.child_id = c.child_id
+                WHERE c.dob >= %s{scope}
+            ) given
+            WHERE dose IS NOT NULL
+            GROUP BY child_id
+        """
+        return sql, params
+
+    def read(self, cursor, today=None, where=None, params=()):
+        """
+        Arrays (child_ids, dob, given_mask, series_last) for the children
+        young enough to have doses left, optionally filtered by `where` on
+        children (alias c) with `params`. Expects a tuple cursor.
+        """
+        today = today or date.today()
+        earliest = np.datetime64(today, 'D') - np.timedelta64(self.horizon_days, 'D')
+        scope = (earliest.astype(object),) + tuple(params)
+
+        children_sql = "SELECT c.child_id, c.dob FROM children c WHERE c.dob >= %s"
+        if where:
+            children_sql += f" AND {where}"
+        cursor.execute(children_sql + " ORDER BY c.child_id", scope)
+        rows = cursor.fetchall()
+        child_ids = np.array([row[0] for row in rows], dtype=np.int64)
+        dob = np.array([row[1] for row in rows], dtype='datetime64[D]')
+
+        sql, given_params = self.given_query(where)
+        cursor.execute(sql, tuple(given_params) + scope)
+        given_rows = cursor.fetchall()
+
+        given_mask = np.zeros(len(child_ids), dtype=np.uint64)
+        series_last = np.full((len(child_ids), len(self.series)), np.datetime64('NaT'), dtype='datetime64[D]')
+        if given_rows and len(child_ids):
+            ids = np.array([row[0] for row in given_rows], dtype=np.int64)
+            positions = np.searchsorted(child_ids, ids)
+            positions = np.clip(positions, 0, len(child_ids) - 1)
+            found = child_ids[positions] == ids
+            given_mask[positions[found]] = np.array([int(row[1]) for row in given_rows], dtype=np.uint64)[found]
+            last = np.array([row[2:] for row in given_rows], dtype='datetime64[D]')
+            series_last[positions[found]] = last[found]
+
+        return child_ids, dob, given_mask, series_last
+
+    def load(self, cursor, today=None, mother_id=None, grace_days=14, window_days=14):
+        """Read the children in scope and their doses, then compute()"""
+        today = today or date.today()
+        if mother_id is None:
+            arrays = self.read(cursor, today)
+        else:
+            arrays = self.read(cursor, today, 'c.mother_id = %s', (mother_id,))
+        return self.compute(*arrays, today, grace_days, window_days)
+
+    # Computation
+
+    def next_doses(self, child_ids, dob, given_mask, series_last, today):
+        """
+        Next dose of every series for every child, as parallel arrays
+        (child, series, dose, due). A dose is due at dob + age, but never
+        sooner than `interval` days after the latest dose of its series;
+        doses past their latest age are skipped. dose is -1 (and due NaT)
+        where nothing is left to give in the series.
+        """
+        today = np.datetime64(today, 'D')
+        n = len(child_ids)
+        given = ((given_mask[:, None] >> np.arange(len(self.doses), dtype=np.uint64)[None, :]) & np.uint64(1)).astype(bool)
+
+        out_dose, out_due = [], []
+        for series_index in range(len(self.series)):
+            found = np.zeros(n, dtype=bool)
+            due = np.full(n, np.datetime64('NaT'), dtype='datetime64[D]')
+            dose_of = np.full(n, -1, dtype=np.int64)
+            last = series_last[:, series_index]
+            has_last = ~np.isnat(last)
+
+            for index in [i for i, s in enumerate(self.dose_series) if s == series_index]:
+                _, age, interval, max_age = self.doses[index]
+                not_given = ~given[:, index]
+                expired = not_given & (today > dob + np.timedelta64(max_age, 'D')) if max_age else np.zeros(n, bool)
+                candidate = ~found & not_given & ~expired
+
+                due_here = dob + np.timedelta64(age, 'D')
+                if interval:
+                    after_last = np.where(has_last, last + np.timedelta64(interval, 'D'), due_here)
+                    due_here = np.maximum(due_here, after_last)
+
+                due[candidate] = due_here[candidate]
+                dose_of[candidate] = index
+                found |= candidate
+
+            out_dose.append(dose_of)
+            out_due.append(due)
+
+        series_count = len(self.series)
+        child = np.tile(child_ids, series_count)
+        series = np.repeat(np.arange(series_count, dtype=np.int64), n)
+        dose = np.concatenate(out_dose) if n else np.array([], dtype=np.int64)
+        due = np.concatenate(out_due) if n else np.array([], dtype='datetime64[D]')
+        return child, series, dose, due
+
+    def compute(self, child_ids, dob, given_mask, series_last, today, grace_days=14, window_days=14):
+        """
+        Next dose per (child, series) with its due date and status: 'due'
+        for `grace_days` after the due date, 'overdue' after that and
+        'upcoming' within `window_days` before it.
+        """
+        child, _, dose, due = self.next_doses(child_ids, dob, given_mask, series_last, today)
+        pending = dose >= 0
+        child, dose, due = child[pending], dose[pending], due[pending]
+
+        days_late = (np.datetime64(today, 'D') - due).astype(np.int64)
+        status = np.full(len(child), -1, dtype=np.int64)
+        status[days_late > grace_days] = 0
+        status[(days_late >= 0) & (days_late <= grace_days)] = 1
+        status[(days_late < 0) & (days_late >= -window_days)] = 2
+        keep = status >= 0
+
+        return DoseAlerts(self, child[keep], dose[keep], due[keep], status[keep], days_late[keep])
+
+
+class DoseAlerts:
+    """Alert rows as parallel arrays, ordered overdue, due, upcoming, then by due date"""
+
+    def __init__(self, engine, child_ids, doses, due, status, days_late):
+        self.engine = engine
+        order = np.lexsort((doses, child_ids, due, status))
+        self.child_ids = child_ids[order]
+        self.doses = doses[order]
+        self.due = due[order]
+        self.status = status[order]
+        self.days_late = days_late[order]
+        # Packed sort key for keyset pagination: status | due day | child | dose
+        self.keys = ((self.status << 61) | (self.due.astype(np.int64) << 38)
+                     | (self.child_ids << 6) | self.doses)
+
+    def __len__(self):
+        return len(self.child_ids)
+
+    def counts(self):
+        return {name: int(np.count_nonzero(self.status == i)) for i, name in enumerate(STATUSES)}
+
+    def page(self, limit, after=None, status=None):
+        """
+        Return (rows, last_key) for up to `limit` alerts after key `after`.
+        last_key is None when there is nothing more.
+        """
+        keys = self.keys
+        indices = np.arange(len(keys))
+        if status is not None:
+            selected = self.status == STATUSES.index(status)
+            keys = keys[selected]
+            indices = indices[selected]
+        start = 0 if after is None else int(np.searchsorted(keys, after, side='right'))
+        chosen = indices[start:start + limit]
+
+        engine = self.engine
+        rows = []
+        for i in chosen:
+            dose = int(self.doses[i])
+            rows.append({
+                'child_id': int(self.child_ids[i]),
+                'vaccine_name': engine.names[dose],
+                'series': engine.series[engine.dose_series[dose]],
+                'due_date': str(self.due[i]),
+                'status': STATUSES[self.status[i]],
+                'days_overdue': max(int(self.days_late[i]), 0),
+            })
+
+        last_key = None
+        if start + limit < len(keys):
+            last_key = int(keys[start + limit - 1])
+        return rows, last_key
+
+
+_engines = {}
+
+
+def get_engine(country):
+    """Shared engine for a schedule code in SCHEDULES"""
+    if country not in _engines:
+        if country not in SCHEDULES:
+            raise ValueError(f'Unknown vaccine schedule: {country}')
+        _engines[country] = ScheduleEngine(SCHEDULES[country])
+    return _engines[country]
+
+
+def tuple_cursor(db):
+    """Plain tuple cursor for bulk reads (no per-row dicts)"""
+    return db.cursor(pymysql.cursors.Cursor)
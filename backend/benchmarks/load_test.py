@@ -0,0 +1,361 @@
+"""
+HTTP load test for the MaternalCare+ API.
+
+Creates a throwaway database, fills it with database/generate_data.py
+at the requested scale, boots create_app() on a local threaded server
+and drives a weighted mix of realistic calls at each concurrency level. Prints (or writes) a JSON
+report with throughput and p50/p95/p99 latency per endpoint so builds
+can be compared.
+
+    python benchmarks/load_test.py --mothers 20000 --concurrency 1,8,32 --duration 20 \\
+        --output results/baseline.json
+
+Uses DB_HOST/DB_PORT/DB_USER/DB_PASSWORD from the environment (.env);
+the database named by --db-name is DROPPED and recreated.
+"""
+import argparse
+import http.client
+import json
+import os
+import random
+import sys
+import threading
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'database'))
+
+import generate_data  # noqa: E402
+
+# Relative weights of each call in a mix
+MIXES = {
+    'default': {
+        'login': 5,
+        'mother_dashboard': 20,
+        'worker_dashboard': 10,
+        'get_mother': 15,
+        'list_mothers': 8,
+        'list_children': 4,
+        'list_visits': 8,
+        'list_vaccinations': 4,
+        'search': 6,
+        'record_visit': 12,
+        'record_vaccination': 8,
+    },
+    'read_heavy': {
+        'mother_dashboard': 35,
+        'worker_dashboard': 15,
+        'get_mother': 25,
+        'list_visits': 10,
+        'search': 10,
+        'login': 5,
+    },
+    'write_heavy': {
+        'record_visit': 45,
+        'record_vaccination': 45,
+        'get_mother': 10,
+    },
+}
+
+
+# Dataset
+
+def sample_dataset(db_name, sample_size=2000):
+    """Row counts plus the ids and logins the workload draws from"""
+    conn = generate_data.connect(db_name)
+    try:
+        with conn.cursor() as cursor:
+            dataset = {}
+            for table in ('users', 'clinics', 'health_workers', 'mothers', 'children', 'visits', 'vaccinations'):
+                cursor.execute(f"SELECT COUNT(*) AS n FROM {table}")
+                dataset[table] = cursor.fetchone()['n']
+            cursor.execute("SELECT email FROM users WHERE role = 'mother' ORDER BY RAND() LIMIT %s", (sample_size,))
+            mother_emails = [row['email'] for row in cursor.fetchall()]
+            cursor.execute("SELECT email FROM users WHERE role = 'health_worker' ORDER BY RAND() LIMIT %s", (sample_size,))
+            worker_emails = [row['email'] for row in cursor.fetchall()]
+            cursor.execute("SELECT mother_id FROM mothers ORDER BY RAND() LIMIT %s", (sample_size,))
+            mother_ids = [row['mother_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT child_id FROM children ORDER BY RAND() LIMIT %s", (sample_size,))
+            child_ids = [row['child_id'] for row in cursor.fetchall()]
+            cursor.execute("SELECT full_name FROM users WHERE role = 'mother' ORDER BY RAND() LIMIT 200")
+            names = [row['full_name'] for row in cursor.fetchall()]
+    finally:
+        conn.close()
+    if not (mother_emails and worker_emails and child_ids):
+        raise RuntimeError(f'{db_name} has no mothers, health workers or children to drive load with')
+    return dataset, {
+        'mother_emails': mother_emails,
+        'worker_emails': worker_emails,
+        'mother_ids': mother_ids,
+        'child_ids': child_ids,
+        'names': names,
+    }
+
+
+# Server
+
+def start_server(port, db_name):
+    from werkzeug.serving import make_server
+    from app import create_app
+    from app.config import Config
+
+    # generate_data imported the app package (and read Config) before main()
+    # parsed --db-name, so the environment is too late: set it on Config itself
+    Config.DB_NAME = db_name
+    server = make_server('127.0.0.1', port, create_app(), threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+# Client
+
+class Client:
+    """Minimal JSON HTTP client, one persistent connection per thread"""
+
+    def __init__(self, port):
+        self.port = port
+        self.conn = None
+
+    def request(self, method, path, token=None, body=None):
+        headers = {'Content-Type': 'application/json'}
+        if token:
+            headers['Authorization'] = f'Bearer {token}'
+        payload = json.dumps(body) if body is not None else None
+        for attempt in range(2):
+            if self.conn is None:
+                self.conn = http.client.HTTPConnection('127.0.0.1', self.port, timeout=60)
+            try:
+                self.conn.request(method, path, body=payload, headers=headers)
+                response = self.conn.getresponse()
+                data = response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    self.conn.close()
+                    self.conn = None
+                return response.status, data
+            except (http.client.HTTPException, ConnectionError):
+                self.conn.close()
+                self.conn = None
+                if attempt:
+                    raise
+
+
+class Workload:
+    """Builds the requests for each named call"""
+
+    def __init__(self, client, samples, tokens, password, rng):
+        self.client = client
+        self.samples = samples
+        self.password = password
+        self.tokens = tokens
+        self.rng = rng
+
+    def call(self, name):
+        return getattr(self, name)()
+
+    def _mother(self):
+        return self.rng.choice(self.tokens['mother'])
+
+    def _worker(self):
+        return self.rng.choice(self.tokens['health_worker'])
+
+    def login(self):
+        return self.client.request('POST', '/api/auth/login', body={
+            'email': self.rng.choice(self.samples['mother_emails']),
+            'password': self.password,
+        })
+
+    def mother_dashboard(self):
+        return self.client.request('GET', '/api/mothers/me?include=children,visits,vaccinations', self._mother())
+
+    def worker_dashboard(self):
+        return self.client.request('GET', '/api/dashboard/worker', self._worker())
+
+    def get_mother(self):
+        return self.client.request('GET', f"/api/mothers/{self.rng.choice(self.samples['mother_ids'])}", self._worker())
+
+    def list_mothers(self):
+        return self.client.request('GET', '/api/mothers?limit=50', self._worker())
+
+    def list_children(self):
+        return self.client.request('GET', '/api/children?limit=50', self._worker())
+
+    def list_visits(self):
+        return self.client.request('GET', '/api/visits?limit=50&status=scheduled', self._worker())
+
+    def list_vaccinations(self):
+        return self.client.request('GET', '/api/vaccinations?limit=50', self._worker())
+
+    def search(self):
+        name = self.rng.choice(self.samples['names']).replace(' ', '+')
+        return self.client.request('GET', f'/api/search?q={name}', self._worker())
+
+    def record_visit(self):
+        return self.client.request('POST', '/api/visits', self._worker(), body={
+            'mother_id': self.rng.choice(self.samples['mother_ids']),
+            'visit_date': (date.today() + timedelta(days=self.rng.randint(1, 60))).isoformat(),
+            'visit_type': self.rng.choice(['antenatal', 'postnatal', 'general']),
+            'weight': round(self.rng.uniform(50, 90), 1),
+            'blood_pressure': '120/80',
+        })
+
+    def record_vaccination(self):
+        today = date.today()
+        return self.client.request('POST', '/api/vaccinations', self._worker(), body={
+            'child_id': self.rng.choice(self.samples['child_ids']),
+            'vaccine_name': self.rng.choice(['OPV 2', 'Pentavalent 2', 'PCV 2']),
+            'date_given': today.isoformat(),
+            'next_due_date': (today + timedelta(weeks=4)).isoformat(),
+        })
+
+
+def login_tokens(port, samples, password, count):
+    client = Client(port)
+    tokens = {}
+    for role, key in (('mother', 'mother_emails'), ('health_worker', 'worker_emails')):
+        tokens[role] = []
+        for email in samples[key][:count]:
+            status, body = client.request('POST', '/api/auth/login', body={'email': email, 'password': password})
+            if status != 200:
+                raise RuntimeError(f'Login failed for {email}: {status} {body[:200]!r}')
+            tokens[role].append(json.loads(body)['token'])
+    return tokens
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return round(sorted_values[index], 2)
+
+
+def run_level(port, samples, tokens, password, mix, concurrency, duration, warmup):
+    names = list(mix)
+    weights = [mix[name] for name in names]
+    timings = {name: [] for name in names}
+    statuses = {name: {} for name in names}
+    lock = threading.Lock()
+    start_at = time.perf_counter() + warmup
+    stop_at = start_at + duration
+
+    def worker(seed):
+        rng = random.Random(seed)
+        workload = Workload(Client(port), samples, tokens, password, rng)
+        local = {name: [] for name in names}
+        local_status = {name: {} for name in names}
+        while True:
+            now = time.perf_counter()
+            if now >= stop_at:
+                break
+            name = rng.choices(names, weights)[0]
+            began = time.perf_counter()
+            try:
+                status, _ = workload.call(name)
+            except Exception:
+                status = 'error'
+            elapsed = (time.perf_counter() - began) * 1000
+            if began >= start_at:
+                local[name].append(elapsed)
+                local_status[name][status] = local_status[name].get(status, 0) + 1
+        with lock:
+            for name in names:
+                timings[name].extend(local[name])
+                for status, count in local_status[name].items():
+                    statuses[name][status] = statuses[name].get(status, 0) + count
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    endpoints = {}
+    total = 0
+    errors = 0
+    for name in names:
+        latencies = sorted(timings[name])
+        failed = sum(count for status, count in statuses[name].items()
+                     if status == 'error' or status >= 400)
+        total += len(latencies)
+        errors += failed
+        endpoints[name] = {
+            'requests': len(latencies),
+            'errors': failed,
+            'status_codes': {str(k): v for k, v in sorted(statuses[name].items(), key=lambda kv: str(kv[0]))},
+            'throughput_rps': round(len(latencies) / duration, 2),
+            'mean_ms': round(sum(latencies) / len(latencies), 2) if latencies else None,
+            'p50_ms': percentile(latencies, 50),
+            'p95_ms': percentile(latencies, 95),
+            'p99_ms': percentile(latencies, 99),
+        }
+
+    return {
+        'concurrency': concurrency,
+        'duration_s': duration,
+        'requests': total,
+        'errors': errors,
+        'throughput_rps': round(total / duration, 2),
+        'endpoints': endpoints,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-name', default='mcht_bench', help='database to (re)create for the run')
+    parser.add_argument('--mothers', type=int, default=5000, help='scale for database/generate_data.py')
+    parser.add_argument('--children-per-mother', type=float, default=1.2)
+    parser.add_argument('--method', choices=['load', 'insert'], default='load', help='generator load method')
+    parser.add_argument('--password', default='password123', help='password of the generated accounts')
+    parser.add_argument('--skip-seed', action='store_true', help='reuse an already seeded --db-name')
+    parser.add_argument('--mix', choices=sorted(MIXES), default='default')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=15.0, help='measured seconds per level')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds per level')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--tokens', type=int, default=20, help='accounts of each role logged in up front')
+    parser.add_argument('--output', help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+
+    seed_counts = None
+    if not args.skip_seed:
+        generate_data.create_database(args.db_name)
+        seed_counts = generate_data.generate(args.db_name, args.mothers,
+                                             children_per_mother=args.children_per_mother,
+                                             method=args.method, password=args.password)
+    dataset, samples = sample_dataset(args.db_name)
+    if seed_counts:
+        dataset['seed_seconds'] = seed_counts['seconds']
+    print(f'Dataset: {dataset}', file=sys.stderr)
+
+    server = start_server(args.port, args.db_name)
+    try:
+        tokens = login_tokens(args.port, samples, args.password, args.tokens)
+        levels = []
+        for concurrency in [int(c) for c in args.concurrency.split(',')]:
+            print(f'Running {args.mix} mix at concurrency {concurrency}...', file=sys.stderr)
+            levels.append(run_level(args.port, samples, tokens, args.password, MIXES[args.mix], concurrency,
+                                    args.duration, args.warmup))
+    finally:
+        server.shutdown()
+
+    report = {
+        'mix': args.mix,
+        'weights': MIXES[args.mix],
+        'dataset': dataset,
+        'levels': levels,
+        'generated_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+
+if __name__ == '__main__':
+    main()
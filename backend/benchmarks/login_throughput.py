@@ -0,0 +1,96 @@
+"""
+Login throughput vs. number of bcrypt hash workers.
+
+Simulates a burst of logins: `--clients` request threads each verify a
+password through a HashWorkerPool for `--duration` seconds. Reports
+verified logins per second, latency percentiles and 503 rejections for
+every worker count, as JSON.
+
+    python benchmarks/login_throughput.py --workers 1,2,4,8 --clients 32
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+
+import bcrypt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.utils.hashing import HashWorkerPool, HashingBusyError  # noqa: E402
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100.0 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run(workers, clients, queue_depth, duration, password_hash, password):
+    pool = HashWorkerPool(workers=workers, queue_depth=queue_depth)
+    latencies = []
+    rejected = [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client():
+        local, local_rejected = [], 0
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            try:
+                pool.run(bcrypt.checkpw, password, password_hash)
+                local.append((time.perf_counter() - start) * 1000)
+            except HashingBusyError:
+                local_rejected += 1
+                time.sleep(0.005)  # a real client would back off on 503
+        with lock:
+            latencies.extend(local)
+            rejected[0] += local_rejected
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    started = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - started
+    pool.shutdown()
+
+    latencies.sort()
+    return {
+        'workers': workers,
+        'clients': clients,
+        'queue_depth': queue_depth,
+        'logins': len(latencies),
+        'rejected': rejected[0],
+        'logins_per_sec': round(len(latencies) / elapsed, 2),
+        'p50_ms': round(percentile(latencies, 50) or 0, 2),
+        'p95_ms': round(percentile(latencies, 95) or 0, 2),
+        'p99_ms': round(percentile(latencies, 99) or 0, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', default='1,2,4,8', help='comma-separated worker counts to try')
+    parser.add_argument('--clients', type=int, default=32, help='concurrent request threads')
+    parser.add_argument('--queue-depth', type=int, default=16, help='queued hashes allowed beyond the workers')
+    parser.add_argument('--rounds', type=int, default=12, help='bcrypt work factor of the stored hash')
+    parser.add_argument('--duration', type=float, default=5.0, help='seconds per worker count')
+    args = parser.parse_args()
+
+    password = b'correct horse battery staple'
+    password_hash = bcrypt.hashpw(password, bcrypt.gensalt(rounds=args.rounds))
+
+    results = [
+        run(int(workers), args.clients, args.queue_depth, args.duration, password_hash, password)
+        for workers in args.workers.split(',')
+    ]
+    print(json.dumps({'cpu_count': os.cpu_count(), 'rounds': args.rounds, 'results': results}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
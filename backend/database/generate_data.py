@@ -0,0 +1,489 @@
+"""
+Synthetic data generator for the MaternalCare+ schema.
+
+Fills clinics, users, health_workers, mothers, children, visits and
+vaccinations with referentially consistent rows at production scale:
+
+- mothers are registered between week 8 of pregnancy and two years
+  after delivery; ANC contacts follow the 8-contact schedule counted
+  from conception and postnatal visits follow delivery
+- children are born around the mother's expected_delivery (plus older
+  siblings) and receive KEPI (Kenya MoH) doses at the schedule ages
+  with realistic delays and drop-out
+- each mother attends one clinic and is seen by that clinic's workers
+
+Rows are streamed in chunks and loaded with LOAD DATA LOCAL INFILE
+(falls back to multi-row INSERTs when the server disallows it), with
+unique and foreign key checks disabled for the session. Every chunk is
+committed as soon as it is loaded.
+
+    python database/generate_data.py --db-name mcht_db --mothers 500000 --reset
+
+Every generated account uses --password (default: password123).
+"""
+import argparse
+import csv
+import math
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+from app.utils.vaccine_schedule import SCHEDULES  # noqa: E402
+
+SCHEMA_PATH = os.path.join(BACKEND_DIR, 'database', 'schema.sql')
+
+# KEPI routine schedule, in order of age: (vaccine, age in days)
+KEPI_SCHEDULE = sorted(
+    ((dose[0], dose[1]) for _, doses in SCHEDULES['KE'] for dose in doses),
+    key=lambda dose: dose[1]
+)
+
+# ANC contacts (gestational weeks) and postnatal visits (days after delivery)
+ANC_WEEKS = [12, 20, 26, 30, 34, 36, 38, 40]
+PNC_DAYS = [2, 10, 42, 180]
+
+FIRST_NAMES = [
+    'Achieng', 'Akinyi', 'Amina', 'Aisha', 'Wanjiru', 'Wambui', 'Njeri', 'Nyambura',
+    'Chebet', 'Jepkosgei', 'Cherono', 'Mwende', 'Mutheu', 'Kanini', 'Nafula', 'Naliaka',
+    'Atieno', 'Adhiambo', 'Halima', 'Zawadi', 'Imani', 'Neema', 'Faith', 'Grace',
+    'Mercy', 'Esther', 'Mary', 'Ruth', 'Joy', 'Purity', 'Ann', 'Lucy',
+    'Uwase', 'Mukamana', 'Ingabire', 'Umutoni', 'Keza', 'Iradukunda', 'Mugisha', 'Aline',
+]
+CHILD_NAMES = [
+    'Baraka', 'Brian', 'Kevin', 'Kipchoge', 'Otieno', 'Omondi', 'Kamau', 'Mwangi',
+    'Juma', 'Hassan', 'Daniel', 'David', 'Samuel', 'Ian', 'Elvis', 'Emmanuel',
+] + FIRST_NAMES
+SURNAMES = [
+    'Ochieng', 'Odhiambo', 'Otieno', 'Kamau', 'Mwangi', 'Njoroge', 'Kariuki', 'Kiprop',
+    'Kipchumba', 'Rotich', 'Mutua', 'Musyoka', 'Wafula', 'Wekesa', 'Barasa', 'Mohamed',
+    'Abdi', 'Ali', 'Onyango', 'Owino', 'Chege', 'Gitau', 'Nyaga', 'Kimani',
+    'Niyonzima', 'Habimana', 'Uwimana', 'Mukiza', 'Nshimiyimana', 'Hakizimana',
+]
+LOCATIONS = [
+    'Nairobi', 'Kisumu', 'Mombasa', 'Nakuru', 'Eldoret', 'Machakos', 'Kakamega', 'Garissa',
+    'Kigali', 'Gasabo', 'Kicukiro', 'Nyarugenge', 'Musanze', 'Huye', 'Rubavu',
+]
+BLOOD_GROUPS = (['O+', 'A+', 'B+', 'AB+', 'O-', 'A-', 'B-', 'AB-'],
+                [46, 24, 20, 4, 3, 1.5, 1, 0.5])
+POSITIONS = ['Nurse', 'Nurse', 'Nurse', 'Midwife', 'Midwife', 'Clinical Officer', 'Community Health Worker']
+
+COLUMNS = {
+    'clinics': ['clinic_id', 'name', 'location', 'contact'],
+    'users': ['user_id', 'full_name', 'email', 'phone', 'password_hash', 'role'],
+    'health_workers': ['hw_id', 'user_id', 'clinic_id', 'position', 'department'],
+    'mothers': ['mother_id', 'user_id', 'age', 'blood_group', 'pregnancy_stage',
+                'expected_delivery', 'location', 'medical_conditions', 'emergency_contact'],
+    'children': ['child_id', 'mother_id', 'full_name', 'dob', 'gender', 'birth_weight', 'birth_height'],
+    'visits': ['mother_id', 'hw_id', 'visit_date', 'visit_type', 'status', 'weight',
+               'blood_pressure', 'notes'],
+    'vaccinations': ['child_id', 'hw_id', 'vaccine_name', 'date_given', 'next_due_date',
+                     'administered_by', 'batch_number'],
+}
+ID_COLUMNS = {
+    'clinics': 'clinic_id',
+    'users': 'user_id',
+    'health_workers': 'hw_id',
+    'mothers': 'mother_id',
+    'children': 'child_id',
+}
+
+
+def connect(database=None, local_infile=False):
+    """Connect with the configured credentials (optionally without a database)"""
+    import pymysql
+    from app.config import Config
+
+    ssl_config = None
+    if Config.DB_HOST not in ("localhost", "127.0.0.1"):
+        ssl_config = {"ssl": {}}
+    return pymysql.connect(
+        host=Config.DB_HOST,
+        port=Config.DB_PORT,
+        user=Config.DB_USER,
+        password=Config.DB_PASSWORD,
+        database=database,
+        cursorclass=pymysql.cursors.DictCursor,
+        ssl=ssl_config,
+        local_infile=local_infile,
+        autocommit=False,
+    )
+
+
+def split_sql(script):
+    """Split schema.sql into statements, honouring DELIMITER blocks"""
+    statements = []
+    delimiter = ';'
+    buffer = []
+    for line in script.splitlines():
+        stripped = line.strip()
+        if stripped.upper().startswith('DELIMITER '):
+            delimiter = stripped.split(None, 1)[1]
+            continue
+        if not buffer and (not stripped or stripped.startswith('--')):
+            continue
+        buffer.append(line)
+        if stripped.endswith(delimiter):
+            statement = '\n'.join(buffer).strip()
+            statements.append(statement[:-len(delimiter)].strip())
+            buffer = []
+    return [s for s in statements if s]
+
+
+def create_database(db_name):
+    """Drop db_name and recreate it from schema.sql"""
+    with open(SCHEMA_PATH) as f:
+        script = re.sub(r'\bmcht_db\b', db_name, f.read())
+    conn = connect()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute(f"DROP DATABASE IF EXISTS `{db_name}`")
+            for statement in split_sql(script):
+                cursor.execute(statement)
+        conn.commit()
+    finally:
+        conn.close()
+
+
+class TableLoader:
+    """
+    Buffers rows for one table and flushes them in chunks, either as a
+    CSV file fed to LOAD DATA LOCAL INFILE or as one multi-row INSERT.
+    Each chunk is committed on its own, so undo log and lock memory stay
+    bounded however many rows are generated.
+    """
+
+    def __init__(self, conn, table, method, batch_size):
+        self.conn = conn
+        self.table = table
+        self.columns = COLUMNS[table]
+        self.method = method
+        self.batch_size = batch_size
+        self.rows = []
+        self.count = 0
+
+    def add(self, row):
+        self.rows.append(row)
+        if len(self.rows) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.method == 'load':
+            try:
+                self._load_data()
+            except Exception as e:
+                # 1148 / 2068 / 3948: local infile disabled on client or server
+                if getattr(e, 'args', [None])[0] not in (1148, 2068, 3948):
+                    raise
+                print(f'LOAD DATA LOCAL INFILE unavailable ({e}), using INSERTs', file=sys.stderr)
+                self.method = 'insert'
+                self._insert()
+        else:
+            self._insert()
+        self.conn.commit()
+        self.count += len(self.rows)
+        self.rows = []
+
+    def _insert(self):
+        placeholders = '(' + ', '.join(['%s'] * len(self.columns)) + ')'
+        sql = f"INSERT INTO {self.table} ({', '.join(self.columns)}) VALUES "
+        with self.conn.cursor() as cursor:
+            cursor.execute(sql + ', '.join([placeholders] * len(self.rows)),
+                           [value for row in self.rows for value in row])
+
+    def _load_data(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.csv', newline='', delete=False) as f:
+            writer = csv.writer(f, lineterminator='\n')
+            for row in self.rows:
+                writer.writerow(['\\N' if value is None else value for value in row])
+            path = f.name
+        try:
+            with self.conn.cursor() as cursor:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE %s INTO TABLE {self.table} "
+                    "CHARACTER SET utf8mb4 "
+                    "FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '\"' "
+                    f"LINES TERMINATED BY '\\n' ({', '.join(self.columns)})",
+                    (path,)
+                )
+        finally:
+            os.unlink(path)
+
+
+class Generator:
+    """Produces one mother at a time together with her children, visits and doses"""
+
+    def __init__(self, rng, today, password_hash, workers_by_clinic, worker_names,
+                 children_per_mother, email_domain):
+        self.rng = rng
+        self.today = today
+        self.password_hash = password_hash
+        self.workers_by_clinic = workers_by_clinic
+        self.worker_names = worker_names
+        self.children_per_mother = children_per_mother
+        self.email_domain = email_domain
+        self.clinic_ids = list(workers_by_clinic)
+
+    def mother(self, user_id, mother_id, next_child_id, loaders):
+        rng = self.rng
+        today = self.today
+        first, surname = rng.choice(FIRST_NAMES), rng.choice(SURNAMES)
+        clinic_id = rng.choice(self.clinic_ids)
+        workers = self.workers_by_clinic[clinic_id]
+
+        # Registered between gestational week 8 and two years after delivery
+        days_to_due = rng.randint(-730, 224)
+        expected_delivery = today + timedelta(days=days_to_due)
+        conception = expected_delivery - timedelta(days=280)
+        gestational_days = 280 - days_to_due
+        if days_to_due < 0:
+            stage = None
+        elif gestational_days < 13 * 7:
+            stage = 'First Trimester'
+        elif gestational_days < 27 * 7:
+            stage = 'Second Trimester'
+        else:
+            stage = 'Third Trimester'
+
+        age = min(45, max(16, int(rng.gauss(27, 6))))
+        loaders['users'].add((
+            user_id, f'{first} {surname}', f'mother{user_id}@{self.email_domain}',
+            f'+2547{user_id:08d}', self.password_hash, 'mother',
+        ))
+        loaders['mothers'].add((
+            mother_id, user_id, age, rng.choices(*BLOOD_GROUPS)[0], stage,
+            expected_delivery, rng.choice(LOCATIONS),
+            rng.choice(['Hypertension', 'Anaemia', 'Gestational diabetes', 'HIV positive'])
+            if rng.random() < 0.12 else None,
+            f'+2547{rng.randint(0, 99999999):08d}',
+        ))
+
+        # Attendance differs a lot between mothers and drives defaulting
+        attendance = rng.betavariate(6, 1.5)
+        weight = rng.gauss(62, 9)
+
+        # ANC contacts: past ones completed/cancelled/missed, plus the next appointment
+        scheduled_next = False
+        for week in ANC_WEEKS:
+            visit_date = conception + timedelta(days=week * 7 + rng.randint(-5, 5))
+            if visit_date < conception + timedelta(days=56):
+                continue
+            if visit_date > today:
+                if scheduled_next or days_to_due < 0:
+                    break
+                scheduled_next = True
+                status = 'scheduled'
+            else:
+                status = self._past_status(attendance)
+            loaders['visits'].add(self._visit(mother_id, rng.choice(workers), visit_date, 'antenatal', status,
+                                              weight + week * 0.3))
+
+        if days_to_due < 0:
+            delivery = expected_delivery + timedelta(days=int(rng.gauss(0, 8)))
+            for day in PNC_DAYS:
+                visit_date = delivery + timedelta(days=day + rng.randint(0, 3))
+                if visit_date > today:
+                    if scheduled_next:
+                        break
+                    scheduled_next = True
+                    status = 'scheduled'
+                else:
+                    status = self._past_status(attendance)
+                loaders['visits'].add(self._visit(mother_id, rng.choice(workers), visit_date, 'postnatal',
+                                                  status, weight + 4))
+
+            births = [delivery]
+        else:
+            births = []
+
+        # Older siblings, spaced two to five years apart
+        siblings = self._poisson(max(0.0, self.children_per_mother - (1 if births else 0)))
+        last_birth = births[0] if births else expected_delivery
+        for _ in range(min(siblings, max(0, (age - 17) // 2))):
+            last_birth = last_birth - timedelta(days=rng.randint(730, 1825))
+            births.append(last_birth)
+
+        child_id = next_child_id
+        for dob in births:
+            if dob > today:
+                continue
+            self._child(child_id, mother_id, surname, dob, workers, attendance, loaders)
+            child_id += 1
+
+        return child_id
+
+    def _child(self, child_id, mother_id, surname, dob, workers, attendance, loaders):
+        rng = self.rng
+        loaders['children'].add((
+            child_id, mother_id, f'{rng.choice(CHILD_NAMES)} {surname}', dob,
+            rng.choice(['male', 'female']),
+            round(min(4.8, max(1.5, rng.gauss(3.2, 0.45))), 2),
+            round(min(56.0, max(40.0, rng.gauss(49.5, 2.2))), 2),
+        ))
+
+        delay = 0
+        for index, (vaccine, age_days) in enumerate(KEPI_SCHEDULE):
+            # Doses after the first visit slip and children drop out along the way
+            if age_days and rng.random() > attendance + 0.05:
+                break
+            delay += int(rng.expovariate(1 / 6.0)) if age_days else rng.randint(0, 2)
+            given = dob + timedelta(days=age_days + delay)
+            if given > self.today:
+                break
+            following = next((age for _, age in KEPI_SCHEDULE[index + 1:] if age > age_days), None)
+            hw_id = rng.choice(workers)
+            loaders['vaccinations'].add((
+                child_id, hw_id, vaccine, given,
+                dob + timedelta(days=following + delay) if following is not None else None,
+                self.worker_names[hw_id], f'KE{rng.randint(100000, 999999)}',
+            ))
+
+    def _visit(self, mother_id, hw_id, visit_date, visit_type, status, weight):
+        rng = self.rng
+        if status != 'completed':
+            return (mother_id, hw_id, visit_date, visit_type, status, None, None, None)
+        systolic = int(rng.gauss(115, 12))
+        diastolic = int(rng.gauss(75, 8))
+        notes = rng.choice([None, None, 'Routine check, no concerns', 'Advised on nutrition',
+                            'Iron and folic acid given', 'Referred for ultrasound',
+                            'Blood pressure elevated, review next visit'])
+        return (mother_id, hw_id, visit_date, visit_type, status, round(weight + rng.gauss(0, 1.5), 2),
+                f'{systolic}/{diastolic}', notes)
+
+    def _past_status(self, attendance):
+        roll = self.rng.random()
+        if roll < attendance:
+            return 'completed'
+        if roll < attendance + (1 - attendance) / 3:
+            return 'cancelled'
+        return 'scheduled'
+
+    def _poisson(self, mean):
+        # Knuth; means here are small
+        limit = math.exp(-mean)
+        k, p = 0, self.rng.random()
+        while p > limit:
+            k += 1
+            p *= self.rng.random()
+        return k
+
+
+def _next_ids(cursor):
+    ids = {}
+    for table, column in ID_COLUMNS.items():
+        cursor.execute(f"SELECT COALESCE(MAX({column}), 0) AS max_id FROM {table}")
+        ids[table] = cursor.fetchone()['max_id'] + 1
+    return ids
+
+
+def generate(db_name, mothers, clinics=None, workers_per_clinic=5, children_per_mother=1.2,
+             method='load', batch_size=20000, seed=42, password='password123',
+             email_domain='example.test', progress=True):
+    """
+    Append `mothers` mothers (and everything that hangs off them) to
+    db_name. Returns the number of rows written per table. Chunks are
+    committed as they are flushed: a failed run leaves the chunks before
+    the failure in place, so rerun with --reset.
+    """
+    import bcrypt
+
+    rng = random.Random(seed)
+    clinics = clinics or max(1, mothers // 2000)
+    rounds = int(os.getenv('BCRYPT_ROUNDS', 12))
+    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+    conn = connect(db_name, local_infile=(method == 'load'))
+    started = time.perf_counter()
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SET SESSION foreign_key_checks = 0, unique_checks = 0")
+            ids = _next_ids(cursor)
+
+        loaders = {table: TableLoader(conn, table, method, batch_size) for table in COLUMNS}
+
+        # Clinics and their staff first, so mothers can be spread across them
+        user_id = ids['users']
+        hw_id = ids['health_workers']
+        workers_by_clinic = {}
+        worker_names = {}
+        for clinic_id in range(ids['clinics'], ids['clinics'] + clinics):
+            location = rng.choice(LOCATIONS)
+            loaders['clinics'].add((clinic_id, f'{location} Health Centre {clinic_id}', location,
+                                    f'+2542{clinic_id:08d}'))
+            workers_by_clinic[clinic_id] = []
+            for _ in range(workers_per_clinic):
+                name = f'{rng.choice(FIRST_NAMES)} {rng.choice(SURNAMES)}'
+                loaders['users'].add((user_id, name, f'worker{user_id}@{email_domain}',
+                                      f'+2547{user_id:08d}', password_hash, 'health_worker'))
+                loaders['health_workers'].add((hw_id, user_id, clinic_id, rng.choice(POSITIONS),
+                                               'Maternal and Child Health'))
+                workers_by_clinic[clinic_id].append(hw_id)
+                worker_names[hw_id] = name
+                user_id += 1
+                hw_id += 1
+
+        generator = Generator(rng, date.today(), password_hash, workers_by_clinic, worker_names,
+                              children_per_mother, email_domain)
+        child_id = ids['children']
+        report_every = max(1, mothers // 20)
+        for i in range(mothers):
+            child_id = generator.mother(user_id, ids['mothers'] + i, child_id, loaders)
+            user_id += 1
+            if progress and (i + 1) % report_every == 0:
+                written = sum(loader.count for loader in loaders.values())
+                elapsed = time.perf_counter() - started
+                print(f'{i + 1}/{mothers} mothers, {written} rows, {written / elapsed:,.0f} rows/s',
+                      file=sys.stderr)
+
+        for loader in loaders.values():
+            loader.flush()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    counts = {table: loader.count for table, loader in loaders.items()}
+    counts['seconds'] = round(time.perf_counter() - started, 2)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--db-name', default=os.getenv('DB_NAME', 'mcht_db'))
+    parser.add_argument('--reset', action='store_true', help='drop and recreate --db-name from schema.sql first')
+    parser.add_argument('--mothers', type=int, default=100000)
+    parser.add_argument('--clinics', type=int, help='default: one per 2000 mothers')
+    parser.add_argument('--workers-per-clinic', type=int, default=5)
+    parser.add_argument('--children-per-mother', type=float, default=1.2, help='mean, including newborns')
+    parser.add_argument('--method', choices=['load', 'insert'], default='load',
+                        help='LOAD DATA LOCAL INFILE (default) or multi-row INSERT')
+    parser.add_argument('--batch-size', type=int, default=20000, help='rows per chunk and table')
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--password', default='password123')
+    parser.add_argument('--email-domain', default='example.test')
+    args = parser.parse_args()
+
+    os.environ['DB_NAME'] = args.db_name
+    if args.reset:
+        create_database(args.db_name)
+
+    counts = generate(args.db_name, args.mothers, clinics=args.clinics,
+                      workers_per_clinic=args.workers_per_clinic,
+                      children_per_mother=args.children_per_mother, method=args.method,
+                      batch_size=args.batch_size, seed=args.seed, password=args.password,
+                      email_domain=args.email_domain)
+    total = sum(v for k, v in counts.items() if k != 'seconds')
+    print(f'Wrote {total:,} rows in {counts["seconds"]}s: {counts}', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
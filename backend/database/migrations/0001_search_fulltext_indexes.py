@@ -0,0 +1,9 @@
+"""Add the ngram FULLTEXT indexes behind /api/search"""
+
+
+def upgrade(op):
+    # ngram parser so partial names and phone numbers match
+    op.add_index('users', 'ft_user_search', ['full_name', 'email', 'phone'], fulltext=True, parser='ngram')
+    op.add_index('children', 'ft_child_name', ['full_name'], fulltext=True, parser='ngram')
+    op.add_index('visits', 'ft_visit_notes', ['notes'], fulltext=True, parser='ngram')
+    op.add_index('vaccinations', 'ft_vaccine_name', ['vaccine_name'], fulltext=True, parser='ngram')
@@ -0,0 +1,18 @@
+"""Add revoked_tokens and user_token_cutoffs for logout and token revocation"""
+
+
+def upgrade(op):
+    # Revoked JWTs (logout); rows can be purged once expires_at has passed
+    op.create_table('revoked_tokens', """
+        jti VARCHAR(64) PRIMARY KEY,
+        user_id INT NOT NULL,
+        expires_at DATETIME NOT NULL,
+        revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_revoked_expires (expires_at)
+    """)
+    # Tokens issued to a user before not_before (UTC) are rejected
+    op.create_table('user_token_cutoffs', """
+        user_id INT PRIMARY KEY,
+        not_before DATETIME NOT NULL,
+        FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+    """)
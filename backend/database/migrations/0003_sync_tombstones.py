@@ -0,0 +1,45 @@
+"""Add sync_tombstones, its delete triggers and the updated_at indexes for /api/sync"""
+
+TOMBSTONE_TRIGGERS = [
+    ('trg_user_tombstone', """BEFORE DELETE ON users FOR EACH ROW
+        INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+        SELECT 'mothers', mother_id, mother_id FROM mothers WHERE user_id = OLD.user_id"""),
+    ('trg_mother_tombstone', """AFTER DELETE ON mothers FOR EACH ROW
+        INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+        VALUES ('mothers', OLD.mother_id, OLD.mother_id)"""),
+    ('trg_child_tombstone', """AFTER DELETE ON children FOR EACH ROW
+        INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+        VALUES ('children', OLD.child_id, OLD.mother_id)"""),
+    ('trg_visit_tombstone', """AFTER DELETE ON visits FOR EACH ROW
+        INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+        VALUES ('visits', OLD.visit_id, OLD.mother_id)"""),
+    ('trg_vaccination_tombstone', """AFTER DELETE ON vaccinations FOR EACH ROW
+        INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+        VALUES ('vaccinations', OLD.vaccine_id, (SELECT mother_id FROM children WHERE child_id = OLD.child_id))"""),
+]
+
+UPDATED_INDEXES = [
+    ('users', 'idx_user_updated'),
+    ('mothers', 'idx_mother_updated'),
+    ('children', 'idx_child_updated'),
+    ('visits', 'idx_visit_updated'),
+    ('vaccinations', 'idx_vaccination_updated'),
+]
+
+
+def upgrade(op):
+    op.create_table('sync_tombstones', """
+        tombstone_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+        entity VARCHAR(20) NOT NULL,
+        entity_id INT NOT NULL,
+        mother_id INT,
+        deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        INDEX idx_tombstone_deleted (deleted_at),
+        INDEX idx_tombstone_mother (mother_id, deleted_at)
+    """)
+    # With binary logging on, this needs SUPER or log_bin_trust_function_creators=ON
+    for name, definition in TOMBSTONE_TRIGGERS:
+        op.create_trigger(name, definition)
+    # Delta sync reads each table in (updated_at, primary key) order
+    for table, name in UPDATED_INDEXES:
+        op.add_index(table, name, ['updated_at'])
@@ -0,0 +1,22 @@
+"""Add the due_doses queue (fill it with `flask due-doses rebuild`)"""
+
+
+def upgrade(op):
+    created = op.create_table('due_doses', """
+        child_id INT NOT NULL,
+        antigen VARCHAR(50) NOT NULL,
+        vaccine_name VARCHAR(100),
+        clinic_id INT,
+        due_date DATE,
+        expires_on DATE,
+        status ENUM('pending', 'closed') NOT NULL,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        PRIMARY KEY (child_id, antigen),
+        FOREIGN KEY (child_id) REFERENCES children(child_id) ON DELETE CASCADE,
+        FOREIGN KEY (clinic_id) REFERENCES clinics(clinic_id) ON DELETE SET NULL,
+        INDEX idx_due_status_date (status, due_date),
+        INDEX idx_due_clinic_status_date (clinic_id, status, due_date)
+    """)
+    if created:
+        # Existing children only enter the queue on their next write until then
+        op.log('  run `flask due-doses rebuild` to queue the existing children')
@@ -0,0 +1,34 @@
+"""Add defaulter_reports and defaulters for the weekly defaulter tracing job"""
+
+
+def upgrade(op):
+    # clinic_id NULL: records not attributed to any clinic
+    op.create_table('defaulter_reports', """
+        report_id INT PRIMARY KEY AUTO_INCREMENT,
+        clinic_id INT,
+        week_start DATE NOT NULL,
+        status ENUM('running', 'complete', 'failed') NOT NULL DEFAULT 'running',
+        missed_visits INT NOT NULL DEFAULT 0,
+        missed_doses INT NOT NULL DEFAULT 0,
+        error TEXT,
+        started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        finished_at TIMESTAMP NULL,
+        FOREIGN KEY (clinic_id) REFERENCES clinics(clinic_id) ON DELETE CASCADE,
+        INDEX idx_report_clinic_week (clinic_id, week_start)
+    """)
+    op.create_table('defaulters', """
+        defaulter_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+        report_id INT NOT NULL,
+        kind ENUM('visit', 'dose') NOT NULL,
+        location VARCHAR(255) NOT NULL DEFAULT '',
+        mother_id INT NOT NULL,
+        mother_name VARCHAR(255),
+        phone VARCHAR(20),
+        child_id INT,
+        child_name VARCHAR(255),
+        item VARCHAR(100) NOT NULL,
+        due_date DATE NOT NULL,
+        days_missed INT NOT NULL,
+        FOREIGN KEY (report_id) REFERENCES defaulter_reports(report_id) ON DELETE CASCADE,
+        INDEX idx_defaulter_report (report_id, kind, defaulter_id)
+    """)
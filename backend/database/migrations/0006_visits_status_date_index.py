@@ -0,0 +1,6 @@
+"""Index visits by (status, visit_date) for the status-filtered, date-ordered visit lists"""
+
+
+def upgrade(op):
+    # GET /api/visits?status=... ORDER BY visit_date DESC and the missed-visit scans
+    op.add_index('visits', 'idx_visit_status_date', ['status', 'visit_date'])
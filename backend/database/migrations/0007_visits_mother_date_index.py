@@ -0,0 +1,8 @@
+"""Index visits by (mother_id, visit_date) for a mother's visit history"""
+
+
+def upgrade(op):
+    op.add_index('visits', 'idx_visit_mother_date', ['mother_id', 'visit_date'])
+    # The composite index serves the mother_id foreign key and every lookup
+    # the single-column one did
+    op.drop_index('visits', 'idx_visit_mother')
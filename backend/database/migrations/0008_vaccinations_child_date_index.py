@@ -0,0 +1,7 @@
+"""Index vaccinations by (child_id, date_given) for a child's vaccination history"""
+
+
+def upgrade(op):
+    op.add_index('vaccinations', 'idx_vaccination_child_date', ['child_id', 'date_given'])
+    # Superseded by the composite index (which also serves the child_id foreign key)
+    op.drop_index('vaccinations', 'idx_vaccination_child')
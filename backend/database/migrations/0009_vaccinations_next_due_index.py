@@ -0,0 +1,5 @@
+"""Index vaccinations by next_due_date for upcoming/overdue dose lookups"""
+
+
+def upgrade(op):
+    op.add_index('vaccinations', 'idx_vaccination_next_due', ['next_due_date'])
@@ -0,0 +1,5 @@
+"""Index users by phone so phone-number login is not a full table scan"""
+
+
+def upgrade(op):
+    op.add_index('users', 'idx_user_phone', ['phone'])
@@ -5,6 +5,14 @@ CREATE DATABASE IF NOT EXISTS mcht_db;
 USE mcht_db;
 
 -- Drop tables if they exist (for clean setup)
+-- Existing databases: apply changes with `flask db migrate` instead of reloading this file
+DROP TABLE IF EXISTS schema_migrations;
+DROP TABLE IF EXISTS sync_tombstones;
+DROP TABLE IF EXISTS user_token_cutoffs;
+DROP TABLE IF EXISTS revoked_tokens;
+DROP TABLE IF EXISTS defaulters;
+DROP TABLE IF EXISTS defaulter_reports;
+DROP TABLE IF EXISTS due_doses;
 DROP TABLE IF EXISTS vaccinations;
 DROP TABLE IF EXISTS visits;
 DROP TABLE IF EXISTS children;
@@ -111,6 +119,114 @@ CREATE TABLE vaccinations (
     FOREIGN KEY (hw_id) REFERENCES health_workers(hw_id) ON DELETE SET NULL
 );
 
+-- Tables, triggers and indexes below up to the composite indexes are added to
+-- existing databases by database/migrations 0001-0005.
+
+-- Next dose of each vaccine series per child, kept up to date by the
+-- child and vaccination endpoints (see app/utils/due_doses.py).
+-- 'closed' series have every dose given or past its latest age.
+-- Rebuild with: flask due-doses rebuild (nightly, so expired doses roll over)
+CREATE TABLE due_doses (
+    child_id INT NOT NULL,
+    antigen VARCHAR(50) NOT NULL,
+    vaccine_name VARCHAR(100),
+    clinic_id INT,
+    due_date DATE,
+    expires_on DATE,
+    status ENUM('pending', 'closed') NOT NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (child_id, antigen),
+    FOREIGN KEY (child_id) REFERENCES children(child_id) ON DELETE CASCADE,
+    FOREIGN KEY (clinic_id) REFERENCES clinics(clinic_id) ON DELETE SET NULL,
+    INDEX idx_due_status_date (status, due_date),
+    INDEX idx_due_clinic_status_date (clinic_id, status, due_date)
+);
+
+-- Weekly defaulter tracing lists per clinic (clinic_id NULL: records not
+-- attributed to any clinic), built by: flask defaulters build
+CREATE TABLE defaulter_reports (
+    report_id INT PRIMARY KEY AUTO_INCREMENT,
+    clinic_id INT,
+    week_start DATE NOT NULL,
+    status ENUM('running', 'complete', 'failed') NOT NULL DEFAULT 'running',
+    missed_visits INT NOT NULL DEFAULT 0,
+    missed_doses INT NOT NULL DEFAULT 0,
+    error TEXT,
+    started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL,
+    FOREIGN KEY (clinic_id) REFERENCES clinics(clinic_id) ON DELETE CASCADE,
+    INDEX idx_report_clinic_week (clinic_id, week_start)
+);
+
+-- One missed antenatal visit ('visit') or overdue dose ('dose') per row,
+-- written in location order
+CREATE TABLE defaulters (
+    defaulter_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    report_id INT NOT NULL,
+    kind ENUM('visit', 'dose') NOT NULL,
+    location VARCHAR(255) NOT NULL DEFAULT '',
+    mother_id INT NOT NULL,
+    mother_name VARCHAR(255),
+    phone VARCHAR(20),
+    child_id INT,
+    child_name VARCHAR(255),
+    item VARCHAR(100) NOT NULL,
+    due_date DATE NOT NULL,
+    days_missed INT NOT NULL,
+    FOREIGN KEY (report_id) REFERENCES defaulter_reports(report_id) ON DELETE CASCADE,
+    INDEX idx_defaulter_report (report_id, kind, defaulter_id)
+);
+
+-- Revoked JWTs (logout); rows can be purged once expires_at has passed
+CREATE TABLE revoked_tokens (
+    jti VARCHAR(64) PRIMARY KEY,
+    user_id INT NOT NULL,
+    expires_at DATETIME NOT NULL,
+    revoked_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_revoked_expires (expires_at)
+);
+
+-- Tokens issued to a user before not_before (UTC) are rejected
+CREATE TABLE user_token_cutoffs (
+    user_id INT PRIMARY KEY,
+    not_before DATETIME NOT NULL,
+    FOREIGN KEY (user_id) REFERENCES users(user_id) ON DELETE CASCADE
+);
+
+-- Deleted records for /api/sync. Filled by the triggers below; rows older
+-- than SYNC_TOMBSTONE_RETENTION_DAYS can be purged.
+-- Cascaded deletes do not fire triggers, so a deleted mother implies her
+-- children, visits and vaccinations, and a deleted child its vaccinations.
+CREATE TABLE sync_tombstones (
+    tombstone_id BIGINT PRIMARY KEY AUTO_INCREMENT,
+    entity VARCHAR(20) NOT NULL,
+    entity_id INT NOT NULL,
+    mother_id INT,
+    deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_tombstone_deleted (deleted_at),
+    INDEX idx_tombstone_mother (mother_id, deleted_at)
+);
+
+CREATE TRIGGER trg_user_tombstone BEFORE DELETE ON users FOR EACH ROW
+    INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+    SELECT 'mothers', mother_id, mother_id FROM mothers WHERE user_id = OLD.user_id;
+
+CREATE TRIGGER trg_mother_tombstone AFTER DELETE ON mothers FOR EACH ROW
+    INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+    VALUES ('mothers', OLD.mother_id, OLD.mother_id);
+
+CREATE TRIGGER trg_child_tombstone AFTER DELETE ON children FOR EACH ROW
+    INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+    VALUES ('children', OLD.child_id, OLD.mother_id);
+
+CREATE TRIGGER trg_visit_tombstone AFTER DELETE ON visits FOR EACH ROW
+    INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+    VALUES ('visits', OLD.visit_id, OLD.mother_id);
+
+CREATE TRIGGER trg_vaccination_tombstone AFTER DELETE ON vaccinations FOR EACH ROW
+    INSERT INTO sync_tombstones (entity, entity_id, mother_id)
+    VALUES ('vaccinations', OLD.vaccine_id, (SELECT mother_id FROM children WHERE child_id = OLD.child_id));
+
 -- Indexes for better performance
 CREATE INDEX idx_user_email ON users(email);
 CREATE INDEX idx_user_role ON users(role);
@@ -118,11 +234,31 @@ CREATE INDEX idx_mother_user ON mothers(user_id);
 CREATE INDEX idx_hw_user ON health_workers(user_id);
 CREATE INDEX idx_hw_clinic ON health_workers(clinic_id);
 CREATE INDEX idx_child_mother ON children(mother_id);
-CREATE INDEX idx_visit_mother ON visits(mother_id);
 CREATE INDEX idx_visit_date ON visits(visit_date);
-CREATE INDEX idx_vaccination_child ON vaccinations(child_id);
 CREATE INDEX idx_vaccination_date ON vaccinations(date_given);
 
+-- Composite indexes for the hot route queries (database/migrations 0006-0010
+-- add the same indexes to existing databases)
+CREATE INDEX idx_visit_status_date ON visits(status, visit_date);
+CREATE INDEX idx_visit_mother_date ON visits(mother_id, visit_date);
+CREATE INDEX idx_vaccination_child_date ON vaccinations(child_id, date_given);
+CREATE INDEX idx_vaccination_next_due ON vaccinations(next_due_date);
+CREATE INDEX idx_user_phone ON users(phone);
+
+-- Delta sync reads each table in (updated_at, primary key) order; ETags
+-- read MAX(updated_at) from the same indexes
+CREATE INDEX idx_user_updated ON users(updated_at);
+CREATE INDEX idx_mother_updated ON mothers(updated_at);
+CREATE INDEX idx_child_updated ON children(updated_at);
+CREATE INDEX idx_visit_updated ON visits(updated_at);
+CREATE INDEX idx_vaccination_updated ON vaccinations(updated_at);
+
+-- Full-text indexes for /api/search (ngram parser so partial names match)
+CREATE FULLTEXT INDEX ft_user_search ON users(full_name, email, phone) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_child_name ON children(full_name) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_visit_notes ON visits(notes) WITH PARSER ngram;
+CREATE FULLTEXT INDEX ft_vaccine_name ON vaccinations(vaccine_name) WITH PARSER ngram;
+
 -- Insert sample data for testing
 
 -- -- Sample clinic
@@ -0,0 +1,147 @@
+"""Database fakes and app fixtures shared by the test modules"""
+import pytest
+from flask import Flask, g
+
+from app.utils import auth
+
+# Any bearer token passes once `login` has patched token verification
+AUTH_HEADERS = {'Authorization': 'Bearer x'}
+
+
+class FakeCursor:
+    """
+    Stands in for a PyMySQL DictCursor and records every (sql, params) in
+    `executed`. Each statement's result comes from respond(), which returns
+    `rows` unless a subclass (or the `respond` argument) answers per SQL.
+    Like an instrumented cursor, it counts statements on its FakeSession.
+    """
+
+    session = None
+
+    def __init__(self, rows=(), respond=None, lastrowid=1, rowcount=1):
+        self.rows = list(rows)
+        if respond is not None:
+            self.respond = respond
+        self.executed = []
+        self.inserted = []
+        self.result = []
+        self.lastrowid = lastrowid
+        self.rowcount = rowcount
+        self.closed = False
+
+    def respond(self, sql, params):
+        return self.rows
+
+    def execute(self, sql, params=None):
+        self.executed.append((sql, params))
+        if self.session is not None:
+            self.session.query_count += 1
+        self.result = list(self.respond(sql, params) or [])
+
+    def executemany(self, sql, rows):
+        self.executed.append((sql, None))
+        self.inserted.extend(rows)
+
+    def fetchone(self):
+        return self.result[0] if self.result else None
+
+    def fetchall(self):
+        return self.result
+
+    def fetchmany(self, size):
+        chunk, self.result = self.result[:size], self.result[size:]
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class VersionsCursor(FakeCursor):
+    """Answers compute_etag's query with (a copy of) `versions`: table -> MAX(updated_at), deleted, now"""
+
+    def __init__(self, versions):
+        super().__init__()
+        self.versions = versions
+
+    def respond(self, sql, params):
+        return [dict(self.versions)]
+
+
+class FakeSession:
+    """Stands in for the request's DBSession (get_db()): every cursor() is the same one"""
+
+    def __init__(self, cursor=None):
+        self._cursor = cursor if cursor is not None else FakeCursor()
+        self._cursor.session = self
+        self.query_count = 0
+        self.query_seconds = 0.0
+
+    def cursor(self, cursor_class=None):
+        return self._cursor
+
+
+class FakeConnection:
+    """
+    Stands in for a PyMySQL connection. cursor() returns a new
+    cursor_factory(connection) each time (kept in `cursors`), and
+    transaction calls are recorded in `events`.
+    """
+
+    def __init__(self, cursor_factory=None):
+        self.cursor_factory = cursor_factory or (lambda conn: FakeCursor())
+        self.cursors = []
+        self.events = []
+        self.commits = 0
+
+    @property
+    def closed(self):
+        return 'close' in self.events
+
+    def cursor(self, cursor_class=None):
+        cursor = self.cursor_factory(self)
+        self.cursors.append(cursor)
+        return cursor
+
+    def commit(self):
+        self.commits += 1
+        self.events.append('commit')
+
+    def rollback(self):
+        self.events.append('rollback')
+
+    def close(self):
+        self.events.append('close')
+
+    def ping(self, reconnect=False):
+        pass
+
+
+@pytest.fixture
+def login(monkeypatch):
+    """Accept any bearer token as user `user_id` with `role`"""
+    def login(role='health_worker', user_id=3):
+        monkeypatch.setattr(auth, 'get_token_payload', lambda token: {'user_id': user_id, 'role': role})
+    return login
+
+
+@pytest.fixture
+def use_db(monkeypatch):
+    """Make get_db() in each of `modules` return one FakeSession around `cursor`"""
+    def use_db(cursor, *modules):
+        session = FakeSession(cursor)
+        for module in modules:
+            monkeypatch.setattr(module, 'get_db', lambda: g.setdefault('db_session', session))
+        return session
+    return use_db
+
+
+@pytest.fixture
+def make_client():
+    """A test client for a bare app with each route module's blueprint under /api/<module>"""
+    def make_client(*modules, testing=False):
+        app = Flask(__name__)
+        app.testing = testing
+        for module in modules:
+            app.register_blueprint(module.bp, url_prefix='/api/' + module.__name__.rsplit('.', 1)[-1])
+        return app.test_client()
+    return make_client
@@ -0,0 +1,149 @@
+import io
+
+import pymysql
+import pytest
+
+from app.routes.visits import VISIT_COLUMNS, VISIT_REQUIRED_FIELDS, validate_visit
+from app.utils.bulk_import import BulkImporter, ImportFormatError, iter_records
+from tests.conftest import FakeConnection, FakeCursor
+
+
+class ImportCursor(FakeCursor):
+    """Checks mother ids and stages inserted rows on the connection until commit"""
+
+    def __init__(self, db):
+        super().__init__(lastrowid=None)
+        self.db = db
+
+    def respond(self, sql, params):
+        self.db.statements.append(sql)
+        if sql.startswith('SELECT'):
+            return [{'mother_id': int(i)} for i in params if int(i) in self.db.mothers]
+        rows = [params[i:i + len(VISIT_COLUMNS)] for i in range(0, len(params), len(VISIT_COLUMNS))]
+        if any(row[VISIT_COLUMNS.index('notes')] == 'boom' for row in rows):
+            raise pymysql.err.DataError(1406, "Data too long for column 'notes'")
+        self.db.pending.extend(rows)
+        self.lastrowid = self.db.next_id
+        self.db.next_id += len(rows)
+        return []
+
+
+class ImportConnection(FakeConnection):
+    def __init__(self, mothers=(1, 2)):
+        super().__init__(ImportCursor)
+        self.mothers = set(mothers)
+        self.statements = []
+        self.pending = []
+        self.rows = []
+        self.next_id = 100
+
+    def commit(self):
+        super().commit()
+        self.rows.extend(self.pending)
+        self.pending = []
+
+    def rollback(self):
+        super().rollback()
+        self.pending = []
+
+
+def visits_importer(db, **kwargs):
+    return BulkImporter(db, 'visits', VISIT_COLUMNS, validate_visit,
+                        reference=('mother_id', 'mothers', 'mother_id', 'Mother not found'),
+                        numeric_fields=['weight'], defaults={'status': 'scheduled'}, **kwargs)
+
+
+def csv_stream(lines):
+    return io.BytesIO(('\n'.join(lines) + '\n').encode('utf-8'))
+
+
+def test_csv_rows_are_validated_and_inserted_in_chunks():
+    lines = ['mother_id,visit_date,visit_type,weight,notes']
+    lines += [f'1,2026-0{1 + i % 9}-10,antenatal,6{i % 10}.5,' for i in range(25)]
+    db = ImportConnection()
+
+    summary = visits_importer(db, chunk_size=10).run(iter_records(csv_stream(lines), 'csv', VISIT_REQUIRED_FIELDS))
+
+    assert summary['imported'] == 25 and summary['failed'] == 0
+    assert len(db.rows) == 25 and db.commits == 3
+    assert sum(sql.startswith('INSERT') for sql in db.statements) == 3
+    # Blank cells fall back to defaults / NULL
+    assert db.rows[0][VISIT_COLUMNS.index('status')] == 'scheduled'
+    assert db.rows[0][VISIT_COLUMNS.index('notes')] is None
+
+
+def test_row_errors_carry_their_line_numbers():
+    lines = [
+        'mother_id,visit_date,visit_type,weight',
+        '1,2026-01-10,antenatal,60',
+        '1,10/01/2026,antenatal,60',
+        '9,2026-01-10,antenatal,60',
+        '2,2026-01-10,dental,60',
+        '2,2026-01-10,general,heavy',
+    ]
+    db = ImportConnection()
+
+    summary = visits_importer(db).run(iter_records(csv_stream(lines), 'csv', VISIT_REQUIRED_FIELDS))
+
+    assert summary['imported'] == 1
+    assert {e['line']: e['message'] for e in summary['errors']} == {
+        3: 'Invalid date format. Use YYYY-MM-DD',
+        5: 'Invalid visit type',
+        6: 'weight must be a number',
+        4: 'Mother not found',
+    }
+
+
+def test_rejected_chunk_is_retried_row_by_row():
+    stream = io.BytesIO(b'\n'.join([
+        b'{"mother_id": 1, "visit_date": "2026-01-10", "visit_type": "general"}',
+        b'{"mother_id": 1, "visit_date": "2026-01-11", "visit_type": "general", "notes": "boom"}',
+        b'',
+        b'not json',
+        b'{"mother_id": 2, "visit_date": "2026-01-12", "visit_type": "general"}',
+    ]))
+    db = ImportConnection()
+
+    summary = visits_importer(db).run(iter_records(stream, 'ndjson'))
+
+    assert summary['imported'] == 2
+    assert [r[VISIT_COLUMNS.index('visit_date')] for r in db.rows] == ['2026-01-10', '2026-01-12']
+    assert {e['line']: e['message'] for e in summary['errors']} == {
+        2: "Data too long for column 'notes'",
+        4: 'Invalid JSON',
+    }
+
+
+def test_error_list_is_capped():
+    lines = ['mother_id,visit_date,visit_type'] + ['1,bad,antenatal'] * 5
+    summary = visits_importer(ImportConnection(), max_errors=2).run(
+        iter_records(csv_stream(lines), 'csv', VISIT_REQUIRED_FIELDS))
+    assert summary['failed'] == 5
+    assert len(summary['errors']) == 2 and summary['errors_truncated']
+
+
+def test_csv_without_required_columns_is_rejected():
+    with pytest.raises(ImportFormatError):
+        list(iter_records(csv_stream(['mother_id,visit_date', '1,2026-01-10']), 'csv', VISIT_REQUIRED_FIELDS))
+
+
+def test_after_insert_gets_the_new_ids_before_commit():
+    stream = io.BytesIO(b'\n'.join([
+        b'{"mother_id": 1, "visit_date": "2026-01-10", "visit_type": "general"}',
+        b'{"mother_id": 1, "visit_date": "2026-01-11", "visit_type": "general"}',
+        b'{"mother_id": 2, "visit_date": "2026-01-12", "visit_type": "general", "notes": "boom"}',
+        b'{"mother_id": 2, "visit_date": "2026-01-13", "visit_type": "general"}',
+        b'{"mother_id": 2, "visit_date": "2026-01-14", "visit_type": "general"}',
+    ]))
+    db = ImportConnection()
+    calls = []
+
+    def after_insert(session, ids):
+        # Still uncommitted: the derived writes join the chunk's transaction
+        calls.append((list(ids), len(session.pending)))
+
+    visits_importer(db, chunk_size=2, after_insert=after_insert).run(iter_records(stream, 'ndjson'))
+
+    # The second chunk fails as a whole and is retried one row at a time
+    assert calls == [([100, 101], 2), ([102], 1), ([103], 1)]
+    assert len(db.rows) == 4
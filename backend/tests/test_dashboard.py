@@ -0,0 +1,72 @@
+import pytest
+
+from app.routes import dashboard, visits
+from tests.conftest import AUTH_HEADERS, FakeCursor
+
+
+class DashboardCursor(FakeCursor):
+    """Answers the dashboard's COUNT queries and row queries for one clinic"""
+
+    def __init__(self, todays_visits):
+        super().__init__(lastrowid=50)
+        self.todays_visits = todays_visits
+
+    def respond(self, sql, params):
+        if 'FROM health_workers WHERE user_id' in sql:
+            return [{'clinic_id': 4}]
+        if 'COUNT(*) AS total FROM visits v' in sql and 'visit_date = %s' in sql:
+            return [{'total': len(self.todays_visits)}]
+        if 'COUNT(*) AS total FROM visits v' in sql:
+            return [{'total': 3}]
+        if 'COUNT(DISTINCT v.mother_id)' in sql:
+            return [{'total': 12}]
+        if 'COUNT(*) AS total FROM vaccinations' in sql:
+            return [{'total': 40}]
+        if 'FROM visits v' in sql and 'visit_date = %s' in sql:
+            return self.todays_visits
+        if 'FROM mothers m' in sql:
+            return [{'mother_id': i} for i in range(12, 12 - params[-1], -1)]
+        return []
+
+
+@pytest.fixture
+def client(monkeypatch, use_db, login, make_client):
+    cursor = DashboardCursor([{'visit_id': i, 'mother_id': i} for i in range(1, 10)])
+    use_db(cursor, dashboard, visits)
+    login()
+    monkeypatch.setattr(dashboard.Config, 'DASHBOARD_TOP_N', 2)
+    dashboard._worker_cache.clear()
+    yield make_client(dashboard, visits), cursor
+    dashboard._worker_cache.clear()
+
+
+def test_counts_come_from_sql_and_todays_visits_are_not_capped(client):
+    client, cursor = client
+    data = client.get('/api/dashboard/worker', headers=AUTH_HEADERS).get_json()['data']
+
+    assert data['clinic_id'] == 4
+    assert data['stats'] == {'todays_visits': 9, 'upcoming_visits': 3, 'total_patients': 12, 'total_vaccinations': 40}
+    # Every visit due today, but only DASHBOARD_TOP_N recent patients
+    assert [visit['visit_id'] for visit in data['visits']] == list(range(1, 10))
+    assert [patient['mother_id'] for patient in data['recent_patients']] == [12, 11]
+    todays = next(sql for sql, _ in cursor.executed if 'v.*' in sql)
+    assert 'LIMIT' not in todays
+
+
+def test_dashboard_is_cached_until_a_visit_is_written(client):
+    client, cursor = client
+    client.get('/api/dashboard/worker', headers=AUTH_HEADERS)
+    built = len(cursor.executed)
+
+    # Cached: only the clinic lookup runs
+    client.get('/api/dashboard/worker', headers=AUTH_HEADERS)
+    assert len(cursor.executed) == built + 1
+
+    cursor.todays_visits = cursor.todays_visits + [{'visit_id': 10, 'mother_id': 10}]
+    response = client.post('/api/visits', headers=AUTH_HEADERS, json={
+        'mother_id': 10, 'visit_date': '2026-10-17', 'visit_type': 'antenatal'})
+    assert response.status_code == 201
+
+    data = client.get('/api/dashboard/worker', headers=AUTH_HEADERS).get_json()['data']
+    assert data['stats']['todays_visits'] == 10
+    assert len(data['visits']) == 10
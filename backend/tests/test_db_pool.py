@@ -0,0 +1,132 @@
+import threading
+
+import pytest
+
+from app import create_app
+from app.utils import db_pool
+from app.utils.auth import create_token
+from app.utils.db_pool import ConnectionPool, PoolTimeoutError
+from tests.conftest import FakeConnection
+
+
+class PooledConnection(FakeConnection):
+    """Tracks the pings and transaction state the pool checks on checkout and return"""
+
+    def __init__(self):
+        super().__init__()
+        self.pings = 0
+        self.server_status = 0
+        self.ping_error = None
+
+    @property
+    def rollbacks(self):
+        return self.events.count('rollback')
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+        if self.ping_error:
+            raise self.ping_error
+
+    def rollback(self):
+        super().rollback()
+        self.server_status = 0
+
+
+def make_pool(**kwargs):
+    created = []
+
+    def connect():
+        conn = PooledConnection()
+        created.append(conn)
+        return conn
+
+    return ConnectionPool(connect, **kwargs), created
+
+
+def test_prewarm_opens_min_size():
+    pool, created = make_pool(min_size=3, max_size=5)
+    assert pool.prewarm() == 3
+    assert len(created) == 3
+    stats = pool.stats()
+    assert (stats['size'], stats['idle'], stats['in_use']) == (3, 3, 0)
+
+
+def test_close_returns_connection_for_reuse():
+    pool, created = make_pool(min_size=0, max_size=2)
+    conn = pool.connection()
+    raw = conn._entry.conn
+    conn.close()
+    conn.close()  # second close is a no-op
+
+    again = pool.connection()
+    assert again._entry.conn is raw
+    assert len(created) == 1
+    assert raw.closed is False
+
+
+def test_borrow_times_out_when_exhausted():
+    pool, _ = make_pool(min_size=0, max_size=1, timeout=0.05)
+    held = pool.connection()
+    with pytest.raises(PoolTimeoutError):
+        pool.connection()
+    assert pool.stats()['timeouts'] == 1
+    held.close()
+
+
+def test_waiting_borrower_gets_released_connection():
+    pool, created = make_pool(min_size=0, max_size=1, timeout=2)
+    held = pool.connection()
+    result = {}
+
+    def borrow():
+        conn = pool.connection()
+        result['raw'] = conn._entry.conn
+        conn.close()
+
+    t = threading.Thread(target=borrow)
+    t.start()
+    held.close()
+    t.join(2)
+    assert result['raw'] is created[0]
+    assert pool.stats()['waited'] == 1
+
+
+def test_open_transaction_is_rolled_back_on_release():
+    pool, created = make_pool(min_size=0, max_size=1)
+    conn = pool.connection()
+    created[0].server_status = 1  # SERVER_STATUS_IN_TRANS
+    conn.close()
+    assert created[0].rollbacks == 1
+
+
+def test_expired_and_dead_connections_are_replaced():
+    pool, created = make_pool(min_size=0, max_size=1, max_lifetime=0.0001, ping_interval=None)
+    pool.connection().close()
+    import time
+    time.sleep(0.01)
+    pool.connection().close()
+    assert len(created) == 2
+    assert created[0].closed is True
+    assert pool.stats()['expired'] == 1
+
+    pool, created = make_pool(min_size=0, max_size=1, ping_interval=0)
+    pool.connection().close()
+    created[0].ping_error = OSError('gone away')
+    pool.connection().close()
+    assert len(created) == 2
+    assert pool.stats()['ping_failures'] == 1
+
+
+def test_pool_stats_are_admin_only(monkeypatch):
+    pool = ConnectionPool(FakeConnection, min_size=0, max_size=2)
+    monkeypatch.setattr(db_pool, 'get_pool', lambda: pool)
+    client = create_app().test_client()
+
+    def get(role=None):
+        headers = {'Authorization': f'Bearer {create_token(1, role)}'} if role else {}
+        return client.get('/api/health/pool', headers=headers)
+
+    assert get().status_code == 401
+    assert get('health_worker').status_code == 403
+    response = get('admin')
+    assert response.status_code == 200 and response.get_json()['pool']['max_size'] == 2
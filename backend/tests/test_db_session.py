@@ -0,0 +1,67 @@
+import pytest
+from flask import Flask, jsonify
+
+from app.utils import db as db_module
+from app.utils.db import DBSession, get_db, init_db
+from tests.conftest import FakeConnection
+
+
+@pytest.fixture
+def app(monkeypatch):
+    connections = []
+
+    def connect():
+        conn = FakeConnection()
+        connections.append(conn)
+        return conn
+
+    monkeypatch.setattr(db_module, 'DBSession', lambda: DBSession(connect))
+
+    app = Flask(__name__)
+    init_db(app)
+
+    @app.route('/ok')
+    def ok():
+        get_db().cursor()
+        get_db().cursor()
+        return jsonify({'success': True}), 200
+
+    @app.route('/not-found')
+    def not_found():
+        get_db().cursor()
+        return jsonify({'success': False}), 404
+
+    @app.route('/boom')
+    def boom():
+        get_db().cursor()
+        raise RuntimeError('boom')
+
+    @app.route('/no-db')
+    def no_db():
+        return jsonify({'success': True}), 200
+
+    app.connections = connections
+    return app
+
+
+def test_connection_is_shared_and_committed(app):
+    assert app.test_client().get('/ok').status_code == 200
+    assert len(app.connections) == 1
+    conn = app.connections[0]
+    assert conn.events == ['commit', 'close']
+    assert all(c.closed for c in conn.cursors)
+
+
+def test_error_response_rolls_back_and_releases(app):
+    assert app.test_client().get('/not-found').status_code == 404
+    assert app.connections[0].events == ['rollback', 'close']
+
+
+def test_exception_rolls_back_and_releases(app):
+    assert app.test_client().get('/boom').status_code == 500
+    assert app.connections[0].events == ['rollback', 'close']
+
+
+def test_connection_is_opened_lazily(app):
+    assert app.test_client().get('/no-db').status_code == 200
+    assert app.connections == []
@@ -0,0 +1,114 @@
+from datetime import date
+
+import pytest
+
+from app.routes import reports
+from app.utils.defaulters import build_clinic_report, clinic_condition, week_start
+from tests.conftest import AUTH_HEADERS, FakeConnection, FakeCursor
+
+TODAY = date(2026, 10, 15)
+
+
+def visit(mother_id, location, day):
+    return {'mother_id': mother_id, 'mother_name': f'Mother {mother_id}', 'phone': None,
+            'location': location, 'item': 'antenatal', 'due_date': date(2026, 10, day)}
+
+
+class ReportCursor(FakeCursor):
+    """Serves the connection's `sources` rows and records its statements, chunks and fetches"""
+
+    def __init__(self, conn):
+        super().__init__(lastrowid=77)
+        self.conn = conn
+
+    def respond(self, sql, params):
+        self.conn.executed.append((sql, params))
+        if self.conn.fail_on and self.conn.fail_on in sql:
+            raise RuntimeError('boom')
+        source = 'visit' if 'FROM visits' in sql else 'dose' if 'FROM due_doses' in sql else None
+        return self.conn.sources.get(source, [])
+
+    def executemany(self, sql, rows):
+        self.conn.batches.append(list(rows))
+
+    def fetchmany(self, size):
+        chunk = super().fetchmany(size)
+        self.conn.fetches.append(len(chunk))
+        return chunk
+
+
+def report_connection(sources=None, fail_on=None):
+    conn = FakeConnection(ReportCursor)
+    conn.sources = sources or {}
+    conn.fail_on = fail_on
+    conn.executed, conn.batches, conn.fetches = [], [], []
+    return conn
+
+
+def test_week_starts_on_monday_and_null_clinic_matches_unattributed():
+    assert week_start(TODAY) == date(2026, 10, 12)
+    assert clinic_condition('hw.clinic_id', 3) == ('hw.clinic_id = %s', (3,))
+    assert clinic_condition('hw.clinic_id', None) == ('hw.clinic_id IS NULL', ())
+
+
+def test_report_streams_in_chunks_and_records_counts():
+    reader = report_connection({'visit': [visit(1, 'Gasabo', 1), visit(2, 'Gasabo', 3), visit(3, 'Kicukiro', 5)]})
+    writer = report_connection()
+    connections = iter([reader, writer])
+
+    result = build_clinic_report(4, week_start(TODAY), TODAY, fetch_size=2, connect=lambda: next(connections))
+
+    assert result['status'] == 'complete'
+    assert (result['report_id'], result['missed_visits'], result['missed_doses']) == (77, 3, 0)
+    # Read 2 rows at a time from the unbuffered cursor, written in matching chunks
+    assert reader.fetches[:3] == [2, 1, 0]
+    assert [len(batch) for batch in writer.batches] == [2, 1]
+    first = writer.batches[0][0]
+    assert first[:4] == (77, 'visit', 'Gasabo', 1) and first[-1] == 14
+
+    visit_sql, visit_params = reader.executed[0]
+    assert 'hw.clinic_id = %s' in visit_sql and visit_params == (TODAY, 4)
+    # The old report is only replaced once the new one is complete, in one transaction
+    assert "'running'" in writer.executed[0][0]
+    delete_sql, delete_params = writer.executed[-2]
+    assert 'clinic_id <=> %s' in delete_sql and delete_params == (date(2026, 10, 12), 4, 77)
+    assert "status = 'complete'" in writer.executed[-1][0]
+    assert writer.commits == 2
+
+
+def test_failed_report_is_marked_failed():
+    reader = report_connection(fail_on='FROM due_doses')
+    writer = report_connection()
+    connections = iter([reader, writer])
+
+    result = build_clinic_report(None, week_start(TODAY), TODAY, connect=lambda: next(connections))
+
+    assert result == {'clinic_id': None, 'report_id': 77, 'status': 'failed', 'error': 'boom'}
+    assert "status = 'failed'" in writer.executed[-1][0]
+    assert not any(sql.startswith('DELETE') for sql, _ in writer.executed)
+
+
+class RouteCursor(FakeCursor):
+    def respond(self, sql, params):
+        if 'FROM defaulter_reports' in sql:
+            return [{'report_id': 5, 'clinic_id': 1}]
+        if 'FROM health_workers' in sql:
+            return [{'clinic_id': 2}]
+        return []
+
+
+@pytest.fixture
+def client(use_db, login, make_client):
+    use_db(RouteCursor(), reports)
+    login()
+    return make_client(reports)
+
+
+def test_workers_only_see_their_clinics_report(client):
+    response = client.get('/api/reports/defaulters/5', headers=AUTH_HEADERS)
+    assert response.status_code == 403
+
+
+def test_only_admins_start_the_job(client):
+    response = client.post('/api/reports/defaulters/run', headers=AUTH_HEADERS)
+    assert response.status_code == 403
@@ -0,0 +1,93 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.routes import vaccinations
+from app.utils.due_doses import due_dose_rows, refresh_children
+from app.utils.vaccine_schedule import get_engine
+from tests.conftest import AUTH_HEADERS, FakeCursor, FakeSession
+
+TODAY = date(2026, 10, 16)
+
+
+def test_rows_cover_every_series_with_expiry_and_closed_series():
+    engine = get_engine('KE')
+    given_mask = np.zeros(1, dtype=np.uint64)
+    for name in ['OPV 0', 'OPV 1', 'OPV 2', 'OPV 3']:
+        given_mask[0] |= np.uint64(1 << engine.dose_index(name))
+    series_last = np.full((1, len(engine.series)), np.datetime64('NaT'), dtype='datetime64[D]')
+    series_last[0, engine.series.index('OPV')] = np.datetime64('2026-10-01')
+    arrays = (np.array([7]), np.array(['2026-06-01'], dtype='datetime64[D]'), given_mask, series_last)
+
+    rows = {row[1]: row for row in due_dose_rows(engine, arrays, {7: 3}, TODAY)}
+
+    assert set(rows) == set(engine.series)
+    assert rows['OPV'] == (7, 'OPV', None, 3, None, None, 'closed')
+    assert rows['BCG'] == (7, 'BCG', 'BCG', 3, date(2026, 6, 1), date(2027, 6, 1), 'pending')
+    assert rows['Pentavalent'][2:5] == ('Pentavalent 1', 3, date(2026, 7, 13))
+
+
+class DueCursor(FakeCursor):
+    def __init__(self, clinic_rows=((5, 4, 0), (5, 2, 1))):
+        super().__init__()
+        self.clinic_rows = list(clinic_rows)
+
+    def respond(self, sql, params):
+        if 'c.dob FROM children' in sql:
+            return [(5, date(2026, 10, 10))]
+        if 'JOIN health_workers' in sql:
+            return self.clinic_rows
+        if 'FROM health_workers WHERE user_id' in sql:
+            return [{'clinic_id': 4}]
+        return []
+
+
+def test_refresh_replaces_the_childs_rows():
+    cursor = DueCursor()
+    written = refresh_children(FakeSession(cursor), ['5', 5], today=TODAY)
+
+    assert written == len(get_engine('KE').series)
+    statements = [sql for sql, _ in cursor.executed]
+    delete = next(i for i, sql in enumerate(statements) if 'DELETE d FROM due_doses' in sql)
+    assert statements[delete + 1].startswith('INSERT INTO due_doses')
+    assert cursor.executed[delete][1] == (5,)
+    assert {row[3] for row in cursor.inserted} == {2}
+
+
+def test_child_without_vaccinations_gets_the_mothers_clinic():
+    # Only a visit row (source 0): the clinic of the mother's latest visit
+    cursor = DueCursor(clinic_rows=[(5, 4, 0)])
+    refresh_children(FakeSession(cursor), [5], today=TODAY)
+
+    clinic_sql, clinic_params = next((sql, params) for sql, params in cursor.executed if 'UNION ALL' in sql)
+    assert 'JOIN visits vi ON vi.mother_id = c.mother_id' in clinic_sql
+    assert clinic_params == (5, 5)
+    assert {row[3] for row in cursor.inserted} == {4}
+
+
+@pytest.fixture
+def client(monkeypatch, use_db, login, make_client):
+    cursor = DueCursor()
+    use_db(cursor, vaccinations)
+    login()
+    monkeypatch.setattr(vaccinations, 'date', type('FixedDate', (), {'today': staticmethod(lambda: TODAY)}))
+    return make_client(vaccinations), cursor
+
+
+def test_overdue_for_a_clinic_is_one_range_query(client):
+    client, cursor = client
+    response = client.get('/api/vaccinations/due', headers=AUTH_HEADERS)
+
+    assert response.status_code == 200
+    assert response.get_json()['clinic_id'] == 4
+    sql, params = cursor.executed[-1]
+    assert "d.clinic_id = %s AND d.status = 'pending' AND d.due_date < %s" in sql
+    assert params[:3] == (4, date(2026, 10, 2), TODAY)
+    assert 'ORDER BY d.due_date ASC, d.child_id ASC, d.antigen ASC' in sql
+
+
+def test_due_rejects_unknown_status(client):
+    client, _ = client
+    response = client.get('/api/vaccinations/due?status=late', headers=AUTH_HEADERS)
+    assert response.status_code == 400
@@ -0,0 +1,52 @@
+import threading
+
+import bcrypt
+import pytest
+
+from app.config import Config
+from app.utils.auth import needs_rehash
+from app.utils.hashing import HashWorkerPool, HashingBusyError
+
+
+def test_pool_runs_work_and_returns_result():
+    pool = HashWorkerPool(workers=1, queue_depth=0)
+    try:
+        assert pool.run(lambda a, b: a + b, 2, 3) == 5
+        assert pool.stats()['completed'] == 1
+    finally:
+        pool.shutdown()
+
+
+def test_pool_rejects_when_saturated():
+    pool = HashWorkerPool(workers=1, queue_depth=0)
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(2)
+
+    t = threading.Thread(target=pool.run, args=(slow,))
+    t.start()
+    started.wait(2)
+    try:
+        with pytest.raises(HashingBusyError):
+            pool.run(lambda: None)
+        assert pool.stats()['rejected'] == 1
+        release.set()
+        t.join(2)
+
+        # The slot is freed once the slow call finishes
+        assert pool.run(lambda: 'ok') == 'ok'
+    finally:
+        release.set()
+        pool.shutdown()
+
+
+def test_needs_rehash_compares_work_factor(monkeypatch):
+    monkeypatch.setattr(Config, 'BCRYPT_ROUNDS', 5)
+    current = bcrypt.hashpw(b'secret', bcrypt.gensalt(rounds=5)).decode()
+    older = bcrypt.hashpw(b'secret', bcrypt.gensalt(rounds=4)).decode()
+    assert needs_rehash(current) is False
+    assert needs_rehash(older) is True
+    assert needs_rehash('not-a-hash') is True
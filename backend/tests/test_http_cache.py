@@ -0,0 +1,102 @@
+import gzip
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, jsonify, request
+
+from app import create_app
+from app.utils import etag as etag_module
+from app.utils.compression import init_compression
+from app.utils.etag import conditional
+from tests.conftest import VersionsCursor
+
+
+def test_preflight_is_answered_without_auth_and_cached():
+    client = create_app().test_client()
+    response = client.options('/api/mothers', headers={
+        'Origin': 'http://localhost:3000',
+        'Access-Control-Request-Method': 'POST',
+        'Access-Control-Request-Headers': 'Authorization, Content-Type',
+    })
+    assert response.status_code == 200
+    assert response.headers['Access-Control-Allow-Origin'] == 'http://localhost:3000'
+    assert response.headers['Access-Control-Max-Age'] == '7200'
+
+
+@pytest.fixture
+def compressed_app():
+    app = Flask(__name__)
+    init_compression(app)
+
+    @app.route('/big')
+    def big():
+        return jsonify({'data': [{'name': f'Mother {i}'} for i in range(500)]})
+
+    @app.route('/small')
+    def small():
+        return jsonify({'ok': True})
+
+    return app.test_client()
+
+
+def test_large_responses_are_gzipped(compressed_app, monkeypatch):
+    monkeypatch.setattr('app.utils.compression.brotli', None)
+    response = compressed_app.get('/big', headers={'Accept-Encoding': 'gzip, deflate, br'})
+    assert response.headers['Content-Encoding'] == 'gzip'
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert int(response.headers['Content-Length']) == len(response.data)
+    assert b'Mother 499' in gzip.decompress(response.data)
+
+
+def test_small_or_unaccepted_responses_are_untouched(compressed_app):
+    assert 'Content-Encoding' not in compressed_app.get('/small', headers={'Accept-Encoding': 'gzip'}).headers
+    assert 'Content-Encoding' not in compressed_app.get('/big').headers
+
+
+@pytest.fixture
+def tagged(use_db):
+    cursor = VersionsCursor({
+        'mothers': datetime(2026, 1, 1, 8, 0, 0),
+        'deleted': 3,
+        'now': datetime(2026, 1, 1, 9, 0, 0),
+    })
+    use_db(cursor, etag_module)
+    calls = []
+
+    app = Flask(__name__)
+
+    @app.route('/mothers')
+    @conditional('mothers')
+    def mothers():
+        calls.append(1)
+        return jsonify({'success': True, 'data': []}), 200
+
+    @app.before_request
+    def fake_auth():
+        request.user_id = 1
+        request.user_role = 'admin'
+
+    return app.test_client(), cursor, calls
+
+
+def test_matching_etag_returns_304_without_running_the_view(tagged):
+    client, cursor, calls = tagged
+    first = client.get('/mothers')
+    tag = first.headers['ETag']
+    assert tag.startswith('W/"') and first.headers['Cache-Control'] == 'private, no-cache'
+
+    second = client.get('/mothers', headers={'If-None-Match': tag})
+    assert second.status_code == 304 and second.data == b''
+    assert second.headers['ETag'] == tag
+    assert len(calls) == 1
+
+    # Any write (or delete) changes the tag
+    cursor.versions['deleted'] = 4
+    assert client.get('/mothers', headers={'If-None-Match': tag}).status_code == 200
+
+
+def test_no_etag_while_latest_write_is_settling(tagged):
+    client, cursor, calls = tagged
+    cursor.versions['mothers'] = cursor.versions['now'] - timedelta(seconds=1)
+    response = client.get('/mothers')
+    assert response.status_code == 200 and 'ETag' not in response.headers
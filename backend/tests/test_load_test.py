@@ -0,0 +1,85 @@
+import importlib.util
+import os
+import random
+
+import pytest
+
+import app
+
+BENCHMARK = os.path.join(os.path.dirname(os.path.dirname(app.__file__)), 'benchmarks', 'load_test.py')
+
+
+@pytest.fixture(scope='module')
+def load_test():
+    spec = importlib.util.spec_from_file_location('load_test', BENCHMARK)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+class StubClient:
+    """Records requests instead of sending them"""
+
+    def __init__(self, port=None):
+        self.requests = []
+
+    def request(self, method, path, token=None, body=None):
+        self.requests.append((method, path, token, body))
+        return 200, b'{}'
+
+
+SAMPLES = {
+    'mother_ids': [1, 2],
+    'child_ids': [5],
+    'mother_emails': ['mother1@example.com'],
+    'worker_emails': ['worker1@example.com'],
+    'names': ['Amina Wanjiru'],
+}
+TOKENS = {'mother': ['mother-token'], 'health_worker': ['worker-token']}
+
+
+def test_every_call_type_builds_a_request(load_test):
+    names = sorted({name for mix in load_test.MIXES.values() for name in mix})
+    for name in names:
+        client = StubClient()
+        workload = load_test.Workload(client, SAMPLES, TOKENS, 'secret', random.Random(0))
+        status, _ = workload.call(name)
+        assert status == 200 and len(client.requests) == 1, name
+
+
+def test_run_level_passes_dataset_to_workload(load_test, monkeypatch):
+    monkeypatch.setattr(load_test, 'Client', StubClient)
+    report = load_test.run_level(0, SAMPLES, TOKENS, 'secret', load_test.MIXES['default'],
+                                 concurrency=2, duration=0.05, warmup=0)
+    assert report['requests'] > 0
+    assert report['errors'] == 0
+
+
+def test_server_uses_the_bench_database(load_test, monkeypatch, tmp_path):
+    from werkzeug import serving
+    from app.config import Config
+
+    monkeypatch.setattr(Config, 'DB_NAME', 'mcht_db')
+    served = []
+
+    class StubServer:
+        def serve_forever(self):
+            pass
+
+        def shutdown(self):
+            pass
+
+    def create_app():
+        served.append(Config.DB_NAME)
+        return None
+
+    monkeypatch.setattr(app, 'create_app', create_app)
+    monkeypatch.setattr(serving, 'make_server', lambda *args, **kwargs: StubServer())
+    monkeypatch.setattr(load_test, 'sample_dataset', lambda db_name: ({}, SAMPLES))
+    monkeypatch.setattr(load_test, 'login_tokens', lambda *args: TOKENS)
+    monkeypatch.setattr(load_test, 'run_level', lambda *args: {})
+    monkeypatch.setattr('sys.argv', ['load_test.py', '--skip-seed', '--db-name', 'mcht_bench_x',
+                                     '--concurrency', '1', '--output', str(tmp_path / 'report.json')])
+
+    load_test.main()
+    assert served == ['mcht_bench_x']
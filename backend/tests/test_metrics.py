@@ -0,0 +1,96 @@
+import pytest
+from flask import Flask, g, jsonify
+
+from app.utils import metrics
+from app.utils.instrumentation import add_query_listener, instrumented, normalize_sql, remove_query_listener
+from tests.conftest import FakeSession
+
+
+def test_normalize_sql_collapses_literals_and_lists():
+    assert normalize_sql("SELECT *\n  FROM visits WHERE visit_id IN (%s, %s, %s) AND status = 'scheduled'") == \
+        "SELECT * FROM visits WHERE visit_id IN (...) AND status = ?"
+    assert normalize_sql("INSERT INTO t (a, b) VALUES (1, 'x'), (2, 'y'), (3, 'z')") == \
+        "INSERT INTO t (a, b) VALUES (?, ?), ..."
+    assert normalize_sql("SELECT idx_1 FROM t2 LIMIT 10") == "SELECT idx_1 FROM t2 LIMIT ?"
+
+
+class BaseCursor:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.rowcount = -1
+
+    def execute(self, query, args=None):
+        if self.fail:
+            raise RuntimeError('lost connection')
+        self.rowcount = 3
+        return 3
+
+
+def test_instrumented_cursor_reports_to_session_and_listeners():
+    seen = []
+
+    def listener(cursor, sql, params, seconds, rows, error):
+        seen.append((sql, params, rows, type(error).__name__ if error else None))
+
+    add_query_listener(listener)
+    try:
+        cls = instrumented(BaseCursor)
+        assert instrumented(BaseCursor) is cls and instrumented(cls) is cls
+
+        session = FakeSession()
+        cursor = cls()
+        cursor._session = session
+        assert cursor.execute("SELECT 1", (1,)) == 3
+
+        failing = cls(fail=True)
+        with pytest.raises(RuntimeError):
+            failing.execute("SELECT 2")
+    finally:
+        remove_query_listener(listener)
+
+    assert session.query_count == 1 and session.query_seconds > 0
+    assert seen == [("SELECT 1", (1,), 3, None), ("SELECT 2", None, None, 'RuntimeError')]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(metrics.Config, 'METRICS_TOKEN', 'secret')
+    app = Flask(__name__)
+    metrics.init_metrics(app)
+
+    @app.route('/metrics-test/<int:item_id>')
+    def item(item_id):
+        session = FakeSession()
+        session.query_count = 4
+        g.db_session = session
+        metrics.record_query(None, f"SELECT * FROM metrics_test WHERE id = {item_id}", None, 0.003, 1, None)
+        return jsonify({'success': True})
+
+    return app.test_client()
+
+
+def test_metrics_endpoint_renders_prometheus_text(client):
+    client.get('/metrics-test/1')
+    client.get('/metrics-test/2')
+    response = client.get('/api/metrics', headers={'Authorization': 'Bearer secret'})
+    text = response.get_data(as_text=True)
+
+    assert response.status_code == 200
+    assert response.headers['Content-Type'].startswith('text/plain; version=0.0.4')
+    assert '# TYPE http_request_duration_seconds histogram' in text
+    assert 'http_requests_total{endpoint="/metrics-test/<int:item_id>",method="GET",status="200"} 2' in text
+    assert 'http_request_db_queries_bucket{endpoint="/metrics-test/<int:item_id>",le="5"} 2' in text
+    assert 'http_requests_in_flight{endpoint="/metrics-test/<int:item_id>"} 0' in text
+    statement = 'statement="SELECT * FROM metrics_test WHERE id = ?"'
+    assert f'db_query_duration_seconds_bucket{{{statement},le="0.005"}} 2' in text
+    assert f'db_query_rows_total{{{statement}}} 2' in text
+
+
+def test_metrics_token(client, monkeypatch):
+    assert client.get('/api/metrics').status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer wrong'}).status_code == 401
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer secret'}).status_code == 200
+
+    monkeypatch.setattr(metrics.Config, 'METRICS_TOKEN', '')
+    assert client.get('/api/metrics').status_code == 404
+    assert client.get('/api/metrics', headers={'Authorization': 'Bearer '}).status_code == 404
@@ -0,0 +1,153 @@
+import os
+import re
+
+import pytest
+
+import app
+from app.utils.migrations import MigrationError, discover, migrate, migration_status
+from tests.conftest import FakeConnection, FakeCursor
+
+SCHEMA = os.path.join(os.path.dirname(os.path.dirname(app.__file__)), 'database', 'schema.sql')
+
+# What schema.sql created before the migration runner existed
+BASELINE_TABLES = {'users', 'clinics', 'health_workers', 'mothers', 'children', 'visits', 'vaccinations'}
+BASELINE_INDEXES = {
+    ('users', 'idx_user_email'), ('users', 'idx_user_role'), ('mothers', 'idx_mother_user'),
+    ('health_workers', 'idx_hw_user'), ('health_workers', 'idx_hw_clinic'), ('children', 'idx_child_mother'),
+    ('visits', 'idx_visit_mother'), ('visits', 'idx_visit_date'), ('vaccinations', 'idx_vaccination_child'),
+    ('vaccinations', 'idx_vaccination_date'),
+}
+
+
+class SchemaCursor(FakeCursor):
+    """Answers the lock, information_schema and schema_migrations queries"""
+
+    def __init__(self, db):
+        super().__init__()
+        self.db = db
+
+    def respond(self, sql, params):
+        self.db.executed.append(sql)
+        sql = ' '.join(sql.split())
+        if sql.startswith('SELECT GET_LOCK'):
+            return [{'locked': 0 if self.db.locked else 1}]
+        if 'information_schema.statistics' in sql:
+            return [{'1': 1}] if params in self.db.indexes else []
+        if 'information_schema.tables' in sql:
+            return [{'1': 1}] if params[0] in self.db.tables else []
+        if 'information_schema.triggers' in sql:
+            return [{'1': 1}] if params[0] in self.db.triggers else []
+        if sql.startswith('CREATE TABLE') and 'IF NOT EXISTS' not in sql:
+            self.db.tables.add(sql.split()[2])
+        elif sql.startswith('CREATE TRIGGER'):
+            self.db.triggers.add(sql.split()[2])
+        elif sql.startswith('SELECT version'):
+            return [dict(row) for row in self.db.applied]
+        elif sql.startswith('INSERT INTO schema_migrations'):
+            version, name, checksum, _ = params
+            self.db.applied.append({'version': version, 'name': name, 'checksum': checksum, 'applied_at': 'now'})
+        elif sql.startswith('ALTER TABLE'):
+            words = sql.split()
+            index = (words[2], words[words.index('INDEX') + 1].rstrip(','))
+            if words[3] == 'DROP':
+                self.db.indexes.discard(index)
+            else:
+                self.db.indexes.add(index)
+        else:
+            return [{}]
+        return []
+
+
+class SchemaConnection(FakeConnection):
+    """A database's tables, indexes, triggers and applied migrations; `executed` lists every statement"""
+
+    def __init__(self, indexes=(), applied=(), locked=False, tables=(), triggers=()):
+        super().__init__(SchemaCursor)
+        self.executed = []
+        self.indexes = set(indexes)
+        self.tables = set(tables)
+        self.triggers = set(triggers)
+        self.applied = list(applied)
+        self.locked = locked
+
+
+def write(directory, filename, body):
+    (directory / filename).write_text(body)
+
+
+@pytest.fixture
+def migrations_dir(tmp_path):
+    write(tmp_path, '0002_second.py', '"""Second"""\ndef upgrade(op):\n    op.add_index("visits", "idx_b", ["mother_id", "visit_date"])\n')
+    write(tmp_path, '0001_first.py', '"""First"""\ndef upgrade(op):\n    op.add_index("visits", "idx_a", ["status", "visit_date"])\n')
+    write(tmp_path, 'README.md', 'not a migration')
+    return tmp_path
+
+
+def test_repo_migrations_are_ordered():
+    versions = [migration.version for migration in discover()]
+    assert versions == list(range(1, len(versions) + 1))
+
+
+def test_repo_migrations_bring_a_baseline_database_up_to_schema_sql():
+    with open(SCHEMA) as f:
+        schema = f.read()
+    tables = set(re.findall(r'^CREATE TABLE (\w+)', schema, re.M))
+    triggers = set(re.findall(r'^CREATE TRIGGER (\w+)', schema, re.M))
+    indexes = {(table, name) for name, table in re.findall(r'^CREATE (?:FULLTEXT )?INDEX (\w+) ON (\w+)', schema, re.M)}
+
+    conn = SchemaConnection(indexes=BASELINE_INDEXES, tables=BASELINE_TABLES)
+    migrate(conn)
+    assert conn.tables == tables
+    assert conn.triggers == triggers
+    assert conn.indexes == indexes
+
+    fulltext = [sql for sql in conn.executed if 'FULLTEXT' in sql]
+    assert len(fulltext) == 4 and all(sql.endswith('WITH PARSER ngram, ALGORITHM=INPLACE, LOCK=SHARED') for sql in fulltext)
+
+    # A database created from schema.sql has everything: nothing is run
+    fresh = SchemaConnection(indexes=indexes, tables=tables, triggers=triggers)
+    migrate(fresh)
+    assert not any(sql.startswith(('CREATE TABLE ', 'CREATE TRIGGER', 'ALTER')) and 'IF NOT EXISTS' not in sql
+                   for sql in fresh.executed)
+
+
+def test_migrate_applies_pending_in_order_online(migrations_dir):
+    conn = SchemaConnection()
+    applied = migrate(conn, migrations_dir)
+
+    assert [m.version for m in applied] == [1, 2]
+    alters = [sql for sql in conn.executed if sql.startswith('ALTER')]
+    assert alters == [
+        'ALTER TABLE visits ADD INDEX idx_a (status, visit_date), ALGORITHM=INPLACE, LOCK=NONE',
+        'ALTER TABLE visits ADD INDEX idx_b (mother_id, visit_date), ALGORITHM=INPLACE, LOCK=NONE',
+    ]
+    assert conn.commits == 2
+    assert conn.executed[-1].startswith('SELECT RELEASE_LOCK')
+
+    # Nothing left to do the second time
+    assert migrate(conn, migrations_dir) == []
+
+
+def test_existing_index_is_skipped_and_recorded(migrations_dir):
+    conn = SchemaConnection(indexes={('visits', 'idx_a')})
+    migrate(conn, migrations_dir, target=1)
+
+    assert not any(sql.startswith('ALTER') for sql in conn.executed)
+    assert [row['version'] for row in conn.applied] == [1]
+    status = migration_status(conn, migrations_dir)
+    assert [(row['version'], row['applied_at']) for row in status] == [(1, 'now'), (2, None)]
+
+
+def test_dry_run_and_out_of_order(migrations_dir):
+    conn = SchemaConnection()
+    assert [m.version for m in migrate(conn, migrations_dir, dry_run=True)] == [1, 2]
+    assert conn.applied == []
+
+    conn = SchemaConnection(applied=[{'version': 2, 'name': 'second', 'checksum': 'x', 'applied_at': 'now'}])
+    with pytest.raises(MigrationError, match='older than applied version 0002'):
+        migrate(conn, migrations_dir)
+
+
+def test_lock_held_elsewhere(migrations_dir):
+    with pytest.raises(MigrationError, match='Another process'):
+        migrate(SchemaConnection(locked=True), migrations_dir)
@@ -0,0 +1,81 @@
+from datetime import datetime
+
+import pytest
+
+from app.routes import mothers
+from app.utils import etag
+from tests.conftest import AUTH_HEADERS, FakeCursor
+
+MOTHER = {'mother_id': 10, 'user_id': 3, 'full_name': 'Amina', 'email': 'amina@example.com', 'phone': None}
+
+
+class MotherCursor(FakeCursor):
+    def __init__(self, mother):
+        super().__init__()
+        self.mother = mother
+
+    def respond(self, sql, params):
+        if 'MAX(updated_at)' in sql:
+            # Nothing written recently: the ETag is computed normally
+            return [{'mothers': None, 'users': None, 'children': None, 'visits': None,
+                     'vaccinations': None, 'deleted': None, 'now': datetime(2026, 10, 17)}]
+        if 'FROM mothers m' in sql:
+            return [dict(self.mother)] if self.mother else []
+        if 'FROM children' in sql and 'FROM vaccinations' not in sql:
+            return [{'child_id': 5, 'mother_id': params[0]}]
+        if 'FROM visits' in sql:
+            return [{'visit_id': 7, 'mother_id': params[0]}]
+        return []
+
+
+@pytest.fixture
+def mother_client(use_db, login, make_client):
+    def mother_client(role='mother', mother=MOTHER):
+        cursor = MotherCursor(mother)
+        use_db(cursor, mothers, etag)
+        login(role)
+        return make_client(mothers), cursor
+    return mother_client
+
+
+def test_me_returns_the_callers_profile_only(mother_client):
+    client, cursor = mother_client()
+    response = client.get('/api/mothers/me', headers=AUTH_HEADERS)
+
+    assert response.status_code == 200
+    assert response.get_json()['data'] == MOTHER
+    assert 'ETag' in response.headers
+    # The ETag query and the profile lookup, nothing embedded
+    assert len(cursor.executed) == 2
+    sql, params = cursor.executed[1]
+    assert 'WHERE m.user_id = %s' in sql and params == (3,)
+
+
+def test_me_embeds_includes(mother_client):
+    client, cursor = mother_client()
+    response = client.get('/api/mothers/me?include=children,visits', headers=AUTH_HEADERS)
+
+    data = response.get_json()['data']
+    assert data['children'] == [{'child_id': 5, 'mother_id': 10}]
+    assert data['visits'] == [{'visit_id': 7, 'mother_id': 10}]
+    assert 'vaccinations' not in data
+
+    response = client.get('/api/mothers/me?include=children,payments', headers=AUTH_HEADERS)
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Unknown include: payments'
+
+
+def test_me_rejects_other_roles(mother_client):
+    client, cursor = mother_client(role='health_worker')
+    response = client.get('/api/mothers/me', headers=AUTH_HEADERS)
+
+    assert response.status_code == 403
+    assert cursor.executed == []
+
+
+def test_me_without_a_profile_is_404(mother_client):
+    client, _ = mother_client(mother=None)
+    response = client.get('/api/mothers/me', headers=AUTH_HEADERS)
+
+    assert response.status_code == 404
+    assert response.get_json()['message'] == 'Mother profile not found'
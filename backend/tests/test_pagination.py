@@ -0,0 +1,81 @@
+from datetime import date
+
+import pytest
+
+from app.utils.pagination import (
+    InvalidCursorError,
+    decode_cursor,
+    encode_cursor,
+    keyset_condition,
+    keyset_page,
+    parse_limit,
+)
+from tests.conftest import FakeCursor
+
+
+class LimitCursor(FakeCursor):
+    """Returns `rows` cut to the LIMIT, which keyset_page passes last"""
+
+    def respond(self, sql, params):
+        return self.rows[:params[-1]]
+
+
+def test_cursor_round_trip():
+    token = encode_cursor([date(2025, 1, 15), 42])
+    assert '=' not in token
+    assert decode_cursor(token, 2) == ['2025-01-15', 42]
+
+
+@pytest.mark.parametrize("token", ["not base64!", encode_cursor([1]), encode_cursor({'a': 1})])
+def test_decode_cursor_rejects_garbage(token):
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(token, 2)
+
+
+def test_parse_limit():
+    assert parse_limit(None, default=50, maximum=200) == 50
+    assert parse_limit("10", default=50, maximum=200) == 10
+    assert parse_limit("1000", default=50, maximum=200) == 200
+    for bad in ("0", "-3", "abc"):
+        with pytest.raises(ValueError):
+            parse_limit(bad, default=50, maximum=200)
+
+
+def test_keyset_condition_expands_composite_key():
+    sql, params = keyset_condition(['v.visit_date', 'v.visit_id'], ['2025-01-15', 7], descending=True)
+    assert sql == "((v.visit_date < %s) OR (v.visit_date = %s AND v.visit_id < %s))"
+    assert params == ['2025-01-15', '2025-01-15', 7]
+
+
+def test_keyset_page_returns_next_cursor_only_when_more_rows():
+    rows = [{'child_id': i} for i in range(1, 6)]
+
+    cursor = LimitCursor(rows)
+    page, next_cursor = keyset_page(cursor, "SELECT * FROM children", [],
+                                    keys=[('child_id', 'child_id')], limit=2)
+    assert page == rows[:2]
+    assert decode_cursor(next_cursor, 1) == [2]
+    sql, params = cursor.executed[0]
+    assert sql == "SELECT * FROM children ORDER BY child_id ASC LIMIT %s"
+    assert params == (3,)
+
+    cursor = LimitCursor(rows[:2])
+    page, next_cursor = keyset_page(cursor, "SELECT * FROM children", [],
+                                    keys=[('child_id', 'child_id')], limit=2,
+                                    cursor_token=encode_cursor([2]))
+    assert next_cursor is None
+    sql, params = cursor.executed[0]
+    assert "WHERE ((child_id > %s)) ORDER BY child_id ASC" in sql
+    assert params == (2, 3)
+
+
+def test_keyset_page_combines_filters_and_cursor():
+    cursor = LimitCursor([])
+    keyset_page(cursor, "SELECT * FROM visits v", ['scheduled'],
+                keys=[('v.visit_date', 'visit_date'), ('v.visit_id', 'visit_id')],
+                cursor_token=encode_cursor(['2025-01-15', 9]), limit=10,
+                descending=True, where=["v.status = %s"])
+    sql, params = cursor.executed[0]
+    assert sql.startswith("SELECT * FROM visits v WHERE v.status = %s AND ((v.visit_date < %s)")
+    assert sql.endswith("ORDER BY v.visit_date DESC, v.visit_id DESC LIMIT %s")
+    assert params == ('scheduled', '2025-01-15', '2025-01-15', 9, 11)
@@ -0,0 +1,59 @@
+import time
+
+import pytest
+from flask import Flask, jsonify
+
+from app.utils import profiling
+from app.utils.profiling import init_profiling, phase
+
+
+@pytest.fixture
+def app(monkeypatch, tmp_path):
+    monkeypatch.setattr(profiling.Config, 'PROFILE_SAMPLE_RATE', 0)
+    monkeypatch.setattr(profiling.Config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(profiling, '_sampler', profiling.Sampler(interval=1))
+    app = Flask(__name__)
+    init_profiling(app)
+
+    @app.route('/api/visits/<int:visit_id>')
+    def visit(visit_id):
+        with phase('auth'):
+            time.sleep(0.01)
+        time.sleep(0.03)
+        return jsonify({'success': True, 'data': list(range(100))})
+
+    return app
+
+
+def test_unprofiled_requests_get_no_timing(app):
+    response = app.test_client().get('/api/visits/1', headers={'X-Profile': '1'})
+    assert response.status_code == 200
+    assert 'Server-Timing' not in response.headers
+
+
+def test_admin_header_profiles_request(app, monkeypatch, tmp_path):
+    payloads = {'admin-token': {'role': 'admin'}, 'worker-token': {'role': 'health_worker'}}
+    monkeypatch.setattr('app.utils.auth.get_token_payload', payloads.get)
+    client = app.test_client()
+
+    response = client.get('/api/visits/1', headers={'X-Profile': '1', 'Authorization': 'Bearer worker-token'})
+    assert 'Server-Timing' not in response.headers
+
+    response = client.get('/api/visits/1', headers={'X-Profile': '1', 'Authorization': 'Bearer admin-token'})
+    timings = dict(part.split(';dur=') for part in response.headers['Server-Timing'].split(', '))
+    assert list(timings) == ['auth', 'db', 'serialize', 'app', 'total']
+    assert float(timings['auth']) >= 10
+    assert float(timings['total']) >= 40
+
+    folded = (tmp_path / 'GET_api_visits_int_visit_id.folded').read_text().splitlines()
+    assert folded
+    stack, count = folded[0].rsplit(' ', 1)
+    assert stack.startswith('GET /api/visits/<int:visit_id>;') and int(count) > 0
+    assert any(';auth;' in line for line in folded)
+    assert any('test_profiling:visit' in line for line in folded)
+
+
+def test_sample_rate_profiles_without_header(app, monkeypatch):
+    monkeypatch.setattr(profiling.Config, 'PROFILE_SAMPLE_RATE', 1.0)
+    response = app.test_client().get('/api/visits/2')
+    assert 'total;dur=' in response.headers['Server-Timing']
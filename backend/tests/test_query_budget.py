@@ -0,0 +1,93 @@
+import pytest
+from flask import Flask, g
+
+from app.routes import vaccinations, visits
+from app.utils import query_budget as detector
+from app.utils.query_budget import QueryBudgetExceeded, find_repeats, query_budget, record_statement
+from tests.conftest import AUTH_HEADERS, FakeCursor, FakeSession
+
+
+def test_find_repeats():
+    statements = [("SELECT * FROM children WHERE child_id = %s", (1,))] * 2
+    statements += [("SELECT * FROM vaccinations WHERE child_id = %s", (i,)) for i in range(5)]
+    repeats = find_repeats(statements, threshold=5)
+    assert repeats['duplicates'] == {"SELECT * FROM children WHERE child_id = ?": 2}
+    assert repeats['n_plus_one'] == {"SELECT * FROM vaccinations WHERE child_id = ?": 5}
+
+
+def test_budget_exceeded_fails_under_testing():
+    app = Flask(__name__)
+    app.testing = True
+
+    @app.route('/loop')
+    @query_budget(2)
+    def loop():
+        session = g.setdefault('db_session', FakeSession())
+        for child_id in range(3):
+            session.cursor().execute("SELECT * FROM children WHERE child_id = %s", (child_id,))
+        return ''
+
+    with pytest.raises(QueryBudgetExceeded, match='ran 3 SQL statements'):
+        app.test_client().get('/loop')
+    assert loop.query_budget == 2
+
+
+def test_update_visit_status_is_one_statement(use_db, login, make_client):
+    client = make_client(visits, testing=True)
+    login()
+
+    session = use_db(FakeCursor(rowcount=1), visits)
+    response = client.patch('/api/visits/7/status', json={'status': 'completed'}, headers=AUTH_HEADERS)
+    assert response.status_code == 200
+    assert session.query_count == 1
+
+    use_db(FakeCursor(rowcount=0), visits)
+    response = client.patch('/api/visits/8/status', json={'status': 'completed'}, headers=AUTH_HEADERS)
+    assert response.status_code == 404
+
+
+def test_create_vaccination_reads_child_once(monkeypatch, use_db, login, make_client):
+    client = make_client(vaccinations, testing=True)
+    login()
+    cursor = FakeCursor(rows=[{'mother_id': 10, 'full_name': 'Baby One'}])
+    use_db(cursor, vaccinations)
+    monkeypatch.setattr(vaccinations, 'refresh_children', lambda db, child_ids: None)
+
+    response = client.post('/api/vaccinations', headers=AUTH_HEADERS, json={
+        'child_id': 1, 'vaccine_name': 'OPV 1', 'date_given': '2026-03-01', 'next_due_date': '2026-03-29'})
+
+    assert response.status_code == 201
+    assert sum('FROM children' in sql for sql, _ in cursor.executed) == 1
+    assert len(cursor.executed) == 3
+
+
+def test_detector_reports_repeats(monkeypatch):
+    monkeypatch.setattr(detector.Config, 'QUERY_DETECTOR', False)
+    app = Flask(__name__)
+    detector.init_query_detector(app)
+    app.testing = True
+
+    @app.route('/children')
+    def children():
+        for child_id in [1, 2, 3, 4, 5, 5]:
+            record_statement(None, "SELECT * FROM vaccinations WHERE child_id = %s", (child_id,), 0.001, 1, None)
+        return ''
+
+    response = app.test_client().get('/children')
+    assert response.headers['X-Query-Count'] == '6'
+    assert response.headers['X-Query-Repeats'] == '1'
+
+
+@pytest.mark.parametrize('flag, testing, reported', [(False, False, False), (False, True, True), (True, False, True)])
+def test_detector_is_off_unless_testing_debug_or_flagged(monkeypatch, flag, testing, reported):
+    monkeypatch.setattr(detector.Config, 'QUERY_DETECTOR', flag)
+    app = Flask(__name__)
+    detector.init_query_detector(app)
+    app.testing = testing
+
+    @app.route('/children')
+    def children():
+        record_statement(None, "SELECT * FROM children", None, 0.001, 1, None)
+        return ''
+
+    assert ('X-Query-Count' in app.test_client().get('/children').headers) == reported
@@ -0,0 +1,180 @@
+import os
+import threading
+import time
+
+import pytest
+from flask import Flask, g
+
+from app.config import Config
+from app.utils import replicas as router
+from app.utils.auth import create_token
+from app.utils.replicas import ReplicaSet, mark_write, parse_replicas, primary_reads, route_connection
+from tests.conftest import FakeConnection, FakeCursor
+
+
+def status_connection(lag):
+    """A replica answering SHOW REPLICA STATUS with `lag` ('none': not replicating)"""
+    rows = [] if lag == 'none' else [{'Seconds_Behind_Source': lag}]
+    return FakeConnection(lambda conn: FakeCursor(rows=rows))
+
+
+class FakePool:
+    def __init__(self, name, fail=False):
+        self.name = name
+        self.fail = fail
+
+    def connection(self):
+        if self.fail:
+            raise ConnectionError(f'{self.name} is down')
+        return self.name
+
+    def stats(self):
+        return {}
+
+
+@pytest.fixture
+def replica_set(monkeypatch):
+    lags = {'replica-a': 1, 'replica-b': 60}
+    monkeypatch.setattr(Config, 'create_db_connection', lambda host=None, port=None, connect_timeout=None: status_connection(lags[host]))
+    replicas = ReplicaSet([('replica-a', 3306), ('replica-b', 3306)], max_lag=10,
+                          pool_factory=lambda connect: FakePool(None))
+    for replica in replicas.replicas:
+        replica.pool.name = replica.name
+    replicas.check()
+    monkeypatch.setattr(router, '_replicas', replicas)
+    monkeypatch.setattr(router, 'get_pool', lambda: FakePool('primary'))
+    monkeypatch.setattr(router, '_sticky', router.TTLCache(ttl=60))
+    return replicas
+
+
+def headers(user_id):
+    return {'Authorization': f'Bearer {create_token(user_id, "health_worker")}'}
+
+
+app = Flask(__name__)
+
+
+def test_parse_replicas():
+    assert parse_replicas(' db-r1:3307, db-r2 ') == [('db-r1', 3307), ('db-r2', Config.DB_PORT)]
+    assert parse_replicas('') == []
+
+
+def test_lagging_replica_leaves_rotation(replica_set):
+    assert [(r.name, r.healthy, r.lag) for r in replica_set.replicas] == [
+        ('replica-a:3306', True, 1), ('replica-b:3306', False, 60)]
+
+
+def test_reads_go_to_replicas_and_writes_to_primary(replica_set):
+    with app.test_request_context('/api/visits', method='GET', headers=headers(7)):
+        assert route_connection() == 'replica-a:3306'
+        assert g.db_route == 'replica-a:3306'
+    with app.test_request_context('/api/visits', method='POST', headers=headers(7)):
+        assert route_connection() == 'primary'
+
+
+def test_writer_sticks_to_primary(replica_set):
+    mark_write(7)
+    with app.test_request_context('/api/visits', headers=headers(7)):
+        assert route_connection() == 'primary'
+    with app.test_request_context('/api/visits', headers=headers(8)):
+        assert route_connection() == 'replica-a:3306'
+
+
+def test_stickiness_recorded_after_successful_write(replica_set, monkeypatch):
+    monkeypatch.setattr(Config, 'DB_REPLICAS', 'replica-a')
+    write_app = Flask(__name__)
+    router.init_replicas(write_app)
+
+    @write_app.route('/api/visits', methods=['POST'])
+    def create_visit():
+        return {'success': True}, 201
+
+    write_app.test_client().post('/api/visits', headers=headers(9))
+    with app.test_request_context('/api/visits', headers=headers(9)):
+        assert route_connection() == 'primary'
+
+
+def test_write_marker_sticks_across_workers(replica_set, monkeypatch):
+    monkeypatch.setattr(Config, 'DB_REPLICAS', 'replica-a')
+    write_app = Flask(__name__)
+    router.init_replicas(write_app)
+
+    @write_app.route('/api/visits', methods=['POST'])
+    def create_visit():
+        return {'success': True}, 201
+
+    marker = write_app.test_client().post('/api/visits', headers=headers(9)).headers[router.WRITE_HEADER]
+    # The read lands on another worker, which never saw the write
+    monkeypatch.setattr(router, '_sticky', router.TTLCache(ttl=60))
+
+    with app.test_request_context('/api/visits', headers={**headers(9), router.WRITE_HEADER: marker}):
+        assert route_connection() == 'primary'
+    with app.test_request_context('/api/visits', headers=headers(9)):
+        assert route_connection() == 'replica-a:3306'
+    # Another user's marker, a forged one, or an expired one does not count
+    for user_id, bad in ((8, marker), (9, marker[:-2] + 'xx')):
+        with app.test_request_context('/api/visits', headers={**headers(user_id), router.WRITE_HEADER: bad}):
+            assert route_connection() == 'replica-a:3306'
+    monkeypatch.setattr(Config, 'REPLICA_STICKY_SECONDS', -1)
+    with app.test_request_context('/api/visits', headers={**headers(9), router.WRITE_HEADER: marker}):
+        assert route_connection() == 'replica-a:3306'
+
+
+def test_primary_reads_and_failover(replica_set):
+    with app.test_request_context('/api/sync', headers=headers(7)):
+        primary_reads(lambda: None)()
+        assert route_connection() == 'primary'
+
+    replica_set.replicas[0].pool.fail = True
+    with app.test_request_context('/api/visits', headers=headers(7)):
+        assert route_connection() == 'primary'
+    assert not replica_set.replicas[0].healthy
+    assert replica_set.stats()['fallbacks'] == 1
+
+
+def test_monitor_starts_without_blocking(replica_set, monkeypatch):
+    reachable = threading.Event()
+
+    def slow_connect(host=None, port=None, connect_timeout=None):
+        assert connect_timeout == Config.DB_REPLICA_CONNECT_TIMEOUT
+        reachable.wait(5)
+        return status_connection(1)
+
+    monkeypatch.setattr(Config, 'create_db_connection', slow_connect)
+    replicas = ReplicaSet([('replica-a', 3306)], max_lag=10, check_interval=60,
+                          pool_factory=lambda connect: FakePool('replica-a:3306'))
+    monkeypatch.setattr(router, '_replicas', replicas)
+    replicas.start()
+
+    # Nothing checked yet: reads go to the primary meanwhile
+    with app.test_request_context('/api/visits', headers=headers(7)):
+        assert route_connection() == 'primary'
+    reachable.set()
+    deadline = time.monotonic() + 5
+    while not replicas.replicas[0].healthy and time.monotonic() < deadline:
+        time.sleep(0.01)
+    with app.test_request_context('/api/visits', headers=headers(7)):
+        assert route_connection() == 'replica-a:3306'
+
+
+@pytest.mark.skipif(not os.getenv('REPLICA_TEST_REPLICA'),
+                    reason='set REPLICA_TEST_REPLICA=host:port (a replica of DB_HOST) to run')
+def test_against_local_replica():
+    """Two local MySQL instances, the second replicating from the first (DB_* points at the primary)"""
+    replicas = ReplicaSet(parse_replicas(os.environ['REPLICA_TEST_REPLICA']))
+    replicas.check()
+    [replica] = replicas.replicas
+    assert replica.healthy, replica.error
+
+    def server_id(conn):
+        cursor = conn.cursor()
+        cursor.execute("SELECT @@server_id AS id")
+        return cursor.fetchone()['id']
+
+    primary = Config.create_db_connection()
+    _, conn = replicas.connection()
+    try:
+        assert server_id(conn) != server_id(primary)
+    finally:
+        conn.close()
+        primary.close()
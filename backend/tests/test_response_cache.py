@@ -0,0 +1,157 @@
+from datetime import datetime
+
+import pytest
+from flask import Flask, g, jsonify, request
+
+from app.config import Config
+from app.utils import etag
+from app.utils import replicas as router
+from app.utils import response_cache
+from app.utils.response_cache import MemoryBackend, cache_tags, cached, init_response_cache, invalidate
+from tests.conftest import VersionsCursor
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = MemoryBackend(max_entries=2, max_bytes=10000)
+    cache.set('a', 1, 10)
+    cache.set('b', 2, 10)
+    assert cache.get('a') == 1
+    cache.set('c', 3, 10)
+    # 'b' was least recently used
+    assert cache.get('b') is None and cache.get('a') == 1
+
+    small = MemoryBackend(max_entries=100, max_bytes=1000)
+    small.set('x', 'x', 400)
+    small.set('y', 'y', 400)
+    assert small.stats()['entries'] == 1 and small.get('y') == 'y'
+    assert not small.set('huge', 'z', 5000)
+
+
+def test_expired_entries_are_misses():
+    cache = MemoryBackend(max_entries=10, max_bytes=10000)
+    cache.set('a', 1, 10, ttl=-1)
+    assert cache.get('a') is None
+    stats = cache.stats()
+    assert stats['expirations'] == 1 and stats['misses'] == 1 and stats['entries'] == 0
+
+
+def test_invalidation_by_tag_and_stale_renders_are_rejected():
+    cache = MemoryBackend(max_entries=10, max_bytes=10000)
+    cache.set('mother-1', 1, 10, tags={'mother:1'})
+    cache.set('children-1', 2, 10, tags={'mother:1:children', 'child:5'})
+    cache.set('mother-2', 3, 10, tags={'mother:2'})
+
+    assert cache.invalidate(['child:5']) == 1
+    assert cache.get('children-1') is None and cache.get('mother-1') == 1
+
+    # A render that started before the invalidation must not be stored
+    started = cache.clock()
+    cache.invalidate(['mother:2'])
+    assert not cache.set('mother-2', 'old', 10, tags={'mother:2'}, started=started)
+    assert cache.set('mother-2', 'new', 10, tags={'mother:2'}, started=cache.clock())
+    assert cache.stats()['stale_rejected'] == 1
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(response_cache, '_backend', MemoryBackend(max_entries=100, max_bytes=100000))
+    calls = []
+    app = Flask(__name__)
+    init_response_cache(app)
+
+    @app.before_request
+    def fake_auth():
+        request.user_id = int(request.headers.get('X-User', 1))
+        request.user_role = request.headers.get('X-Role', 'health_worker')
+        g.db_route = request.headers.get('X-Route', 'primary')
+
+    @app.route('/mothers/<int:mother_id>/children')
+    @cached('mother:{mother_id}:children')
+    def children(mother_id):
+        calls.append(mother_id)
+        cache_tags('child:7')
+        response = jsonify({'success': True, 'data': [{'child_id': 7}]})
+        response.headers['ETag'] = 'W/"abc"'
+        return response
+
+    @app.route('/children/<int:child_id>', methods=['PUT'])
+    def update_child(child_id):
+        invalidate(f'child:{child_id}')
+        return jsonify({'success': True})
+
+    return app.test_client(), calls
+
+
+def test_repeat_reads_are_served_from_cache_per_role(client):
+    client, calls = client
+    assert client.get('/mothers/1/children').headers['X-Cache'] == 'MISS'
+    hit = client.get('/mothers/1/children')
+    assert hit.headers['X-Cache'] == 'HIT' and hit.get_json()['data'] == [{'child_id': 7}]
+    assert hit.headers['ETag'] == 'W/"abc"'
+    assert client.get('/mothers/1/children', headers={'If-None-Match': 'W/"abc"'}).status_code == 304
+    assert len(calls) == 1
+
+    # Other roles, other mothers and other parameters are separate entries
+    client.get('/mothers/1/children', headers={'X-Role': 'mother', 'X-User': 9})
+    client.get('/mothers/1/children', headers={'X-Role': 'mother', 'X-User': 10})
+    client.get('/mothers/1/children?limit=5')
+    assert len(calls) == 4
+
+
+def test_write_invalidates_lists_containing_the_row(client):
+    client, calls = client
+    client.get('/mothers/1/children')
+    client.put('/children/7')
+    assert client.get('/mothers/1/children').headers['X-Cache'] == 'MISS'
+    assert len(calls) == 2
+    stats = response_cache.get_cache().stats()
+    assert stats['hits'] == 0 and stats['invalidations'] == 1
+
+
+def test_replica_reads_keep_read_your_writes(client, monkeypatch):
+    client, calls = client
+    monkeypatch.setattr(Config, 'DB_REPLICAS', 'replica-a')
+    monkeypatch.setattr(router, '_sticky', router.TTLCache(ttl=60))
+    replica = {'X-Route': 'replica-a:3306', 'X-User': 2}
+
+    client.get('/mothers/1/children', headers=replica)
+    client.put('/children/7')
+    # The replica may not have the write yet: its render is not stored
+    assert client.get('/mothers/1/children', headers=replica).headers['X-Cache'] == 'MISS'
+    assert client.get('/mothers/1/children', headers=replica).headers['X-Cache'] == 'MISS'
+    assert response_cache.get_cache().stats()['stale_rejected'] == 2
+
+    # A primary render is stored, but the writer does not read it back from the cache
+    client.get('/mothers/1/children')
+    assert client.get('/mothers/1/children', headers={'X-User': 2}).headers['X-Cache'] == 'HIT'
+    router.mark_write(2)
+    assert client.get('/mothers/1/children', headers={'X-User': 2}).headers['X-Cache'] == 'MISS'
+    assert len(calls) == 5
+
+
+def test_hits_are_tagged_for_the_caller(client, use_db):
+    client, calls = client
+    cursor = VersionsCursor({'children': datetime(2026, 10, 1), 'deleted': 4, 'now': datetime(2026, 10, 17)})
+    use_db(cursor, etag)
+    app = client.application
+
+    @app.route('/children')
+    @cached('children')
+    @etag.conditional('children')
+    def all_children():
+        calls.append('all')
+        return jsonify({'success': True, 'data': [{'child_id': 7}]})
+
+    first = client.get('/children', headers={'X-User': 1})
+    hit = client.get('/children', headers={'X-User': 2})
+    assert hit.headers['X-Cache'] == 'HIT' and len(cursor.executed) == 1
+    # User 2 gets their own tag, the one @conditional computes for them
+    assert hit.headers['ETag'] != first.headers['ETag']
+    with app.test_request_context('/children'):
+        request.user_id, request.user_role = 2, 'health_worker'
+        assert etag.compute_etag(cursor, ['children']) == hit.headers['ETag']
+
+    revalidated = client.get('/children', headers={'X-User': 2, 'If-None-Match': hit.headers['ETag']})
+    assert revalidated.status_code == 304 and revalidated.headers['X-Cache'] == 'HIT'
+    assert client.get('/children', headers={'X-User': 2, 'If-None-Match': first.headers['ETag']}).status_code == 200
+    assert calls == ['all']
@@ -0,0 +1,54 @@
+import pytest
+
+from app.utils.search import build_boolean_query, search_records
+from tests.conftest import FakeCursor
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("jane", '+"jane"'),
+        ("  Jane   Doe ", '+"Jane" +"Doe"'),
+        ('jane* -doe "x"', '+"jane" +"doe"'),
+        ("jane@example.com", '+"jane" +"example.com"'),
+        ("a", None),
+        ("", None),
+        ("+-()", None),
+    ],
+)
+def test_build_boolean_query(text, expected):
+    assert build_boolean_query(text) == expected
+
+
+class SearchCursor(FakeCursor):
+    """Returns the given result sets in order, one per execute()"""
+
+    def __init__(self, *result_sets):
+        super().__init__()
+        self.result_sets = list(result_sets)
+
+    @property
+    def calls(self):
+        return [params for _, params in self.executed]
+
+    def respond(self, sql, params):
+        rows = self.result_sets.pop(0)
+        return [dict(row) for row in rows][:params['limit']]
+
+
+def test_single_type_pushes_offset_into_sql():
+    cursor = SearchCursor([{'child_id': 1, 'score': 2.5}])
+    hits = search_records(cursor, '+"ann"', ['child'], limit=10, offset=20)
+    assert cursor.calls == [{'q': '+"ann"', 'limit': 11, 'offset': 20}]
+    assert hits == [{'child_id': 1, 'score': 2.5, 'type': 'child'}]
+
+
+def test_multiple_types_are_merged_by_score():
+    cursor = SearchCursor(
+        [{'mother_id': 1, 'score': 1.0}, {'mother_id': 2, 'score': 0.5}],
+        [{'child_id': 7, 'score': 3.0}],
+    )
+    hits = search_records(cursor, '+"ann"', ['mother', 'child'], limit=1, offset=1)
+    assert [call['limit'] for call in cursor.calls] == [3, 3]
+    assert [call['offset'] for call in cursor.calls] == [0, 0]
+    assert [(h['type'], h['score']) for h in hits] == [('mother', 1.0), ('mother', 0.5)]
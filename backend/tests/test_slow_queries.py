@@ -0,0 +1,84 @@
+import json
+
+from flask import Flask
+
+from app.utils.slow_queries import SlowQueryLog, explainable, normalize_params
+from tests.conftest import FakeConnection, FakeCursor
+
+
+class MogrifyCursor(FakeCursor):
+    def mogrify(self, sql, params):
+        return sql % tuple(repr(p) for p in params)
+
+
+EXPLAIN_ROW = {'EXPLAIN': json.dumps({'query_block': {'table': {'access_type': 'ALL'}}})}
+
+
+def explained(conn):
+    """Statements the log ran on its own connection"""
+    return [sql for cursor in conn.cursors for sql, _ in cursor.executed]
+
+
+def make_log(**kwargs):
+    conn = FakeConnection(lambda conn: FakeCursor(rows=[EXPLAIN_ROW]))
+    options = dict(threshold_ms=100, sample_rate=1, max_per_minute=10, buffer_size=5, explain=True)
+    options.update(kwargs)
+    return SlowQueryLog(connect=lambda: conn, **options), conn
+
+
+def test_normalize_params_hides_text():
+    assert normalize_params(('0712345678', 7, None, 2.5)) == ['<str:10>', 7, None, 2.5]
+    assert normalize_params({'phone': 'abc'}) == {'phone': '<str:3>'}
+    assert normalize_params(list(range(25)))[-1] == '... 5 more'
+
+
+def test_explainable():
+    assert explainable("  SELECT * FROM users")
+    assert explainable("(SELECT 1) UNION (SELECT 2)")
+    assert not explainable("INSERT INTO users VALUES (1)")
+    assert not explainable("")
+
+
+def test_slow_select_is_explained_and_buffered():
+    log, conn = make_log()
+    app = Flask(__name__)
+
+    @app.route('/api/auth/login', methods=['POST'])
+    def login():
+        return ''
+
+    with app.test_request_context('/api/auth/login', method='POST'):
+        app.preprocess_request()
+        entry = log.capture(MogrifyCursor(), "SELECT * FROM users WHERE phone = %s", ('0712345678',), 0.25, 1, None)
+    log.process(entry)
+
+    assert explained(conn) == ["EXPLAIN FORMAT=JSON SELECT * FROM users WHERE phone = '0712345678'"]
+    [stored] = log.entries()
+    assert stored['endpoint'] == 'POST /api/auth/login'
+    assert stored['statement'] == 'SELECT * FROM users WHERE phone = ?'
+    assert stored['params'] == ['<str:10>']
+    assert stored['duration_ms'] == 250.0
+    assert stored['plan']['query_block']['table']['access_type'] == 'ALL'
+    assert '_literal' not in stored
+
+
+def test_fast_queries_ignored_and_capture_rate_limited():
+    log, _ = make_log(max_per_minute=2)
+    log(MogrifyCursor(), "SELECT 1", (), 0.01, 1, None)
+    assert log.stats()['slow'] == 0
+
+    entries = [log.capture(MogrifyCursor(), "SELECT %s", (i,), 0.5, 1, None) for i in range(4)]
+    assert [entry is not None for entry in entries] == [True, True, False, False]
+    assert log.stats()['rate_limited'] == 2
+
+
+def test_sampling_and_failed_statements():
+    log, conn = make_log(sample_rate=0)
+    assert log.capture(MogrifyCursor(), "SELECT 1", (), 0.5, 1, None) is None
+    assert log.stats()['sampled_out'] == 1
+
+    log, conn = make_log()
+    entry = log.capture(MogrifyCursor(), "SELECT 1", (), 0.5, None, RuntimeError('Lock wait timeout'))
+    log.process(entry)
+    assert explained(conn) == []
+    assert log.entries()[0]['error'] == 'RuntimeError: Lock wait timeout'
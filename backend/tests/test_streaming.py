@@ -0,0 +1,78 @@
+import json
+from datetime import date
+from decimal import Decimal
+
+import pytest
+from flask import Flask
+
+from app.config import Config
+from app.utils.streaming import stream_query
+from tests.conftest import FakeConnection, FakeCursor
+
+
+class PooledConnection(FakeConnection):
+    """A pooled connection serving `rows`: close() releases it back, invalidate() drops it"""
+
+    def __init__(self, rows):
+        super().__init__(lambda conn: FakeCursor(rows))
+        self.invalidated = False
+
+    @property
+    def released(self):
+        return self.closed
+
+    @property
+    def ss_cursor(self):
+        return self.cursors[-1]
+
+    def invalidate(self):
+        self.invalidated = True
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_rows_are_streamed_as_json_array(app, monkeypatch):
+    rows = [{'visit_id': i, 'visit_date': date(2025, 1, i), 'weight': Decimal('60.5')} for i in range(1, 6)]
+    conn = PooledConnection(rows)
+    monkeypatch.setattr(Config, 'get_db_connection', staticmethod(lambda: conn))
+
+    with app.test_request_context():
+        response = stream_query("SELECT * FROM visits", batch_size=2)
+        chunks = list(response.response)
+        response.close()
+
+    body = json.loads(''.join(chunks))
+    assert body['success'] is True
+    assert [row['visit_id'] for row in body['data']] == [1, 2, 3, 4, 5]
+    assert len(chunks) == 5  # opening, three batches, closing
+    assert conn.released and conn.ss_cursor.closed
+    assert not conn.invalidated
+
+
+def test_empty_result_is_valid_json(app, monkeypatch):
+    conn = PooledConnection([])
+    monkeypatch.setattr(Config, 'get_db_connection', staticmethod(lambda: conn))
+
+    with app.test_request_context():
+        response = stream_query("SELECT * FROM visits")
+        body = json.loads(''.join(response.response))
+        response.close()
+
+    assert body == {'success': True, 'data': []}
+
+
+def test_abandoned_stream_discards_connection(app, monkeypatch):
+    conn = PooledConnection([{'visit_id': i} for i in range(10)])
+    monkeypatch.setattr(Config, 'get_db_connection', staticmethod(lambda: conn))
+
+    with app.test_request_context():
+        response = stream_query("SELECT * FROM visits", batch_size=2)
+        iterator = iter(response.response)
+        next(iterator)
+        response.close()
+
+    assert conn.invalidated
+    assert not conn.released
@@ -0,0 +1,120 @@
+from datetime import datetime
+
+import pymysql
+import pytest
+from flask import Flask
+
+from app.utils import sync
+from app.utils.pagination import InvalidCursorError, encode_cursor
+from app.utils.sync import collect_changes, decode_watermark, encode_watermark, sync_cutoff
+from tests.conftest import FakeCursor
+
+CUTOFF = datetime(2026, 5, 1, 12, 0, 0)
+
+
+class SyncCursor(FakeCursor):
+    """Serves canned rows per table, honouring LIMIT"""
+
+    def __init__(self, tables):
+        super().__init__()
+        self.tables = tables
+
+    def respond(self, sql, params):
+        table = 'sync_tombstones' if 'sync_tombstones' in sql else sql.split('FROM')[1].split()[0]
+        return self.tables.get(table, [])[:params[-1]]
+
+
+def row(id_field, id_value, second, **extra):
+    return dict({id_field: id_value, 'updated_at': datetime(2026, 5, 1, 11, 0, second), 'notes': None}, **extra)
+
+
+def test_watermark_round_trip():
+    state = decode_watermark(None)
+    assert state['tombstones'] is None
+    state['positions']['visits'] = ['2026-05-01 11:00:03', 7]
+    state['tombstones'] = ['2026-05-01 11:00:04', 12]
+    state['cutoff'] = '2026-05-01 12:00:00'
+    assert decode_watermark(encode_watermark(state)) == state
+
+
+def test_invalid_watermark_is_rejected():
+    with pytest.raises(InvalidCursorError):
+        decode_watermark('garbage')
+    with pytest.raises(InvalidCursorError):
+        decode_watermark(encode_cursor([None, 'x', None, None, None, None]))
+
+
+def test_batch_is_filled_across_entities_and_resumes():
+    cursor = SyncCursor({
+        'mothers': [row('mother_id', 1, 1)],
+        'children': [row('child_id', 4, 2), row('child_id', 5, 3), row('child_id', 6, 4)],
+    })
+
+    changes, deleted, state, has_more = collect_changes(cursor, decode_watermark(None), CUTOFF, limit=3)
+
+    assert has_more
+    assert [r['mother_id'] for r in changes['mothers']] == [1]
+    assert [r['child_id'] for r in changes['children']] == [4, 5]
+    assert 'notes' not in changes['children'][0]
+    assert state['positions']['mothers'] == ['2026-05-01 11:00:01', 1]
+    assert state['positions']['children'] == ['2026-05-01 11:00:03', 5]
+    assert state['positions']['visits'] is None
+    # Visits were never queried; children fetched one extra row to detect more
+    assert len(cursor.executed) == 2
+    assert cursor.executed[1][1][-1] == 3
+
+    # The next call continues after the last child sent
+    cursor = SyncCursor({'sync_tombstones': [
+        {'tombstone_id': 9, 'entity': 'visits', 'entity_id': 30, 'deleted_at': CUTOFF},
+    ]})
+    changes, deleted, state, has_more = collect_changes(cursor, state, CUTOFF, limit=3)
+    children_sql, children_params = cursor.executed[1]
+    assert '((c.updated_at > %s) OR (c.updated_at = %s AND c.child_id > %s))' in children_sql
+    assert children_params[1:4] == ('2026-05-01 11:00:03', '2026-05-01 11:00:03', 5)
+    assert deleted['visits'] == [30]
+    assert state['tombstones'] == [str(CUTOFF), 9]
+    assert not has_more
+
+    # Tombstones resume in (deleted_at, id) order, not by id alone
+    cursor = SyncCursor({})
+    collect_changes(cursor, state, CUTOFF, limit=3)
+    tombstone_sql, tombstone_params = cursor.executed[-1]
+    assert '((t.deleted_at > %s) OR (t.deleted_at = %s AND t.tombstone_id > %s))' in tombstone_sql
+    assert 'ORDER BY t.deleted_at, t.tombstone_id' in tombstone_sql
+    assert tombstone_params[1:4] == (str(CUTOFF), str(CUTOFF), 9)
+
+
+def test_mother_scope_filters_every_query():
+    cursor = SyncCursor({})
+    collect_changes(cursor, decode_watermark(None), CUTOFF, limit=10, mother_id=42)
+    assert len(cursor.executed) == 5
+    for sql, params in cursor.executed:
+        assert 'mother_id = %s' in sql
+        assert params[:2] == (CUTOFF, 42)
+
+
+class CutoffCursor(FakeCursor):
+    def __init__(self, denied=False):
+        super().__init__([{'cutoff': CUTOFF}])
+        self.denied = denied
+
+    def respond(self, sql, params):
+        if self.denied and 'innodb_trx' in sql:
+            raise pymysql.err.OperationalError(1227, 'Access denied; you need the PROCESS privilege')
+        return self.rows
+
+
+def test_cutoff_stays_before_open_transactions(monkeypatch):
+    monkeypatch.setattr(sync, '_open_transactions_visible', True)
+    cursor = CutoffCursor()
+    assert sync_cutoff(cursor) == CUTOFF
+    sql, _ = cursor.executed[0]
+    assert 'MIN(trx_started)' in sql and 'trx_rows_modified > 0' in sql
+
+    # Without PROCESS only the safety window applies, and innodb_trx is not tried again
+    cursor = CutoffCursor(denied=True)
+    with Flask(__name__).app_context():
+        assert sync_cutoff(cursor) == CUTOFF
+        assert sync_cutoff(cursor) == CUTOFF
+    assert sum('innodb_trx' in sql for sql, _ in cursor.executed) == 1
+    assert cursor.executed[-1][0].startswith('SELECT NOW() - INTERVAL')
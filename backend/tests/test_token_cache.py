@@ -0,0 +1,86 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from app.utils import auth, db_pool
+from app.utils.auth import create_token, get_token_payload
+from app.utils.revocation import RevocationList
+from tests.conftest import FakeConnection, FakeCursor
+
+
+class RevocationCursor(FakeCursor):
+    """Answers the revoked-jti query, then the per-user cutoff query"""
+
+    def __init__(self, jtis=(), cutoffs=()):
+        super().__init__()
+        self.results = [[{'jti': j} for j in jtis], list(cutoffs)]
+
+    def respond(self, sql, params):
+        return self.results.pop(0)
+
+
+@pytest.fixture(autouse=True)
+def fresh_state(monkeypatch):
+    auth._token_cache.clear()
+    revocations = RevocationList(refresh_interval=3600)
+    revocations.mark_refreshed()
+    monkeypatch.setattr(auth, 'revocation_list', revocations)
+    return revocations
+
+
+def test_valid_token_is_decoded_once(monkeypatch):
+    token = create_token(7, 'mother')
+    calls = []
+    real_verify = auth.verify_token
+    monkeypatch.setattr(auth, 'verify_token', lambda t: calls.append(t) or real_verify(t))
+
+    first = get_token_payload(token)
+    second = get_token_payload(token)
+    assert first['user_id'] == 7 and first['jti']
+    assert second is first
+    assert len(calls) == 1
+
+
+def test_invalid_token_is_rejected():
+    assert get_token_payload('not.a.jwt') is None
+
+
+def test_revoked_token_is_rejected_even_when_cached(fresh_state):
+    token = create_token(7, 'mother')
+    payload = get_token_payload(token)
+    fresh_state.revoke_token(RevocationCursor(), payload)
+    assert get_token_payload(token) is None
+    assert get_token_payload(create_token(7, 'mother')) is not None
+
+
+def test_user_cutoff_revokes_older_tokens(fresh_state):
+    payload = get_token_payload(create_token(9, 'health_worker'))
+    payload = dict(payload, iat=payload['iat'] - 1)
+    fresh_state.revoke_user(RevocationCursor(), 9)
+    assert fresh_state.is_revoked(payload)
+    assert not fresh_state.is_revoked({'user_id': 9, 'iat': int(time.time()) + 5})
+
+
+def test_login_right_after_revocation_is_valid(fresh_state):
+    fresh_state.revoke_user(RevocationCursor(), 9)
+    assert get_token_payload(create_token(9, 'health_worker')) is not None
+
+
+def test_refresh_loads_revocations_from_database():
+    revocations = RevocationList(refresh_interval=30)
+    assert revocations.needs_refresh()
+    cursor = RevocationCursor(jtis=['abc'], cutoffs=[{'user_id': 3, 'not_before': datetime(2030, 1, 1)}])
+    revocations.refresh(cursor)
+    assert not revocations.needs_refresh()
+    assert revocations.is_revoked({'jti': 'abc', 'user_id': 1, 'iat': 0})
+    assert revocations.is_revoked({'jti': 'other', 'user_id': 3, 'iat': 0})
+    assert not revocations.is_revoked({'jti': 'other', 'user_id': 4, 'iat': 0})
+
+
+def test_refresh_reads_the_primary_pool(fresh_state, monkeypatch):
+    conn = FakeConnection(lambda conn: RevocationCursor(jtis=['abc']))
+    monkeypatch.setattr(db_pool, 'get_pool', lambda: type('Pool', (), {'connection': lambda self: conn})())
+    auth._refresh_revocations()
+    assert fresh_state.is_revoked({'jti': 'abc', 'user_id': 1, 'iat': 0})
+    assert conn.closed
@@ -0,0 +1,102 @@
+import pytest
+
+from app.routes import vaccinations
+from tests.conftest import AUTH_HEADERS, FakeCursor
+
+
+class BatchCursor(FakeCursor):
+    """Answers the children lookup and hands out auto-increment ids"""
+
+    def __init__(self, children):
+        super().__init__(lastrowid=None)
+        self.children = children
+        self.next_id = {'vaccinations': 100, 'visits': 500}
+        self.refreshed = []
+
+    def respond(self, sql, params):
+        if 'auto_increment_increment' in sql:
+            return [{'step': 1}]
+        if 'FROM children' in sql:
+            return [self.children[int(i)] for i in params if int(i) in self.children]
+        if sql.startswith('INSERT INTO'):
+            table = sql.split()[2]
+            self.lastrowid = self.next_id[table]
+            self.next_id[table] += sql.count('(%s')
+        return []
+
+
+@pytest.fixture
+def cursor(monkeypatch, use_db, login):
+    cursor = BatchCursor({
+        1: {'child_id': 1, 'mother_id': 10, 'full_name': 'Baby One'},
+        2: {'child_id': 2, 'mother_id': 20, 'full_name': 'Baby Two'},
+    })
+    use_db(cursor, vaccinations)
+    monkeypatch.setattr(vaccinations, 'refresh_children', lambda db, child_ids: cursor.refreshed.append(child_ids))
+    login()
+    return cursor
+
+
+@pytest.fixture
+def client(make_client):
+    return make_client(vaccinations)
+
+
+def post(client, items):
+    return client.post('/api/vaccinations/batch', json={'vaccinations': items},
+                       headers=AUTH_HEADERS)
+
+
+def test_batch_uses_one_lookup_and_one_insert_per_table(client, cursor):
+    response = post(client, [
+        {'child_id': 1, 'vaccine_name': 'OPV 1', 'date_given': '2026-03-01', 'next_due_date': '2026-03-29'},
+        {'child_id': 2, 'vaccine_name': 'OPV 1', 'date_given': '2026-03-01'},
+        {'child_id': 1, 'vaccine_name': 'PCV 1', 'date_given': '2026-03-01', 'next_due_date': '2026-03-29'},
+    ])
+
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body['recorded'] == 3 and body['failed'] == 0
+    assert [r['vaccine_id'] for r in body['results']] == [100, 101, 102]
+    assert body['results'][0]['visit_id'] == 500
+    assert 'visit_id' not in body['results'][1]
+    assert body['results'][2]['visit_id'] == 501
+
+    statements = [sql for sql, _ in cursor.executed]
+    assert sum('FROM children' in sql for sql in statements) == 1
+    assert sum(sql.startswith('INSERT INTO vaccinations') for sql in statements) == 1
+    assert sum(sql.startswith('INSERT INTO visits') for sql in statements) == 1
+    # Same visit_type as the single endpoint and the stored ENUM value
+    [visit_params] = [params for sql, params in cursor.executed if sql.startswith('INSERT INTO visits')]
+    assert visit_params[3::5] == ['postnatal', 'postnatal']
+    # One due-dose refresh for the whole batch
+    assert cursor.refreshed == [[1, 2, 1]]
+
+
+def test_invalid_and_unknown_items_are_reported_per_item(client, cursor):
+    response = post(client, [
+        {'child_id': 1, 'vaccine_name': 'BCG', 'date_given': '2026-03-01'},
+        {'child_id': 1, 'vaccine_name': 'BCG', 'date_given': '01/03/2026'},
+        {'child_id': 99, 'vaccine_name': 'BCG', 'date_given': '2026-03-01'},
+        {'vaccine_name': 'BCG'},
+    ])
+
+    assert response.status_code == 207
+    results = response.get_json()['results']
+    assert results[0]['success'] and results[0]['vaccine_id'] == 100
+    assert results[1] == {'index': 1, 'success': False, 'message': 'Invalid date_given format. Use YYYY-MM-DD'}
+    assert results[2]['message'] == 'Child not found'
+    assert results[3]['message'].startswith('Missing required fields')
+
+
+def test_batch_with_nothing_valid_is_rejected(client, cursor):
+    response = post(client, [{'child_id': 99, 'vaccine_name': 'BCG', 'date_given': '2026-03-01'}])
+    assert response.status_code == 400
+    assert not any(sql.startswith('INSERT') for sql, _ in cursor.executed)
+
+
+def test_empty_or_oversized_batch_is_rejected(client, cursor, monkeypatch):
+    assert post(client, []).status_code == 400
+    monkeypatch.setattr(vaccinations.Config, 'VACCINATION_BATCH_MAX', 2)
+    item = {'child_id': 1, 'vaccine_name': 'BCG', 'date_given': '2026-03-01'}
+    assert post(client, [item] * 3).status_code == 400
@@ -0,0 +1,132 @@
+from datetime import date
+
+import numpy as np
+import pytest
+
+from app.routes import vaccinations
+from app.utils.vaccine_schedule import ScheduleEngine, SCHEDULES, get_engine
+from tests.conftest import AUTH_HEADERS, FakeCursor
+
+TODAY = date(2026, 10, 16)
+
+
+def arrays(engine, dobs, given=None, last=None):
+    n = len(dobs)
+    child_ids = np.arange(1, n + 1, dtype=np.int64)
+    dob = np.array(dobs, dtype='datetime64[D]')
+    given_mask = np.zeros(n, dtype=np.uint64)
+    series_last = np.full((n, len(engine.series)), np.datetime64('NaT'), dtype='datetime64[D]')
+    for child, names in (given or {}).items():
+        for name in names:
+            given_mask[child - 1] |= np.uint64(1 << engine.dose_index(name))
+    for (child, series), day in (last or {}).items():
+        series_last[child - 1, engine.series.index(series)] = np.datetime64(day)
+    return child_ids, dob, given_mask, series_last
+
+
+def as_set(rows):
+    return {(row['child_id'], row['vaccine_name'], row['status']) for row in rows}
+
+
+def test_aliases_match_common_spellings():
+    engine = get_engine('KE')
+    assert engine.dose_index('OPV 0') == engine.dose_index('bOPV-0') == engine.names.index('OPV 0')
+    assert engine.dose_index('DTP 2') == engine.names.index('Pentavalent 2')
+    assert engine.dose_index('Measles 1') == engine.dose_index('MR1') == engine.names.index('Measles-Rubella 1')
+    assert engine.dose_index('Vitamin A') is None
+
+
+def test_next_dose_per_series_and_status():
+    engine = get_engine('KE')
+    alerts = engine.compute(*arrays(engine, ['2026-10-10', '2026-08-20'], given={
+        2: ['BCG', 'OPV 0', 'OPV 1'],
+    }, last={
+        (2, 'OPV'): '2026-10-10',
+    }), today=TODAY)
+    rows, last_key = alerts.page(50)
+
+    assert last_key is None
+    # Newborn: birth doses are due (within the 14 day grace)
+    assert {('BCG', 'due'), ('OPV 0', 'due')} <= {(r['vaccine_name'], r['status']) for r in rows if r['child_id'] == 1}
+    # Eight weeks old: 6-week doses overdue; OPV 2 waits 28 days after OPV 1
+    second = as_set(r for r in rows if r['child_id'] == 2)
+    assert second == {
+        (2, 'Pentavalent 1', 'overdue'),
+        (2, 'PCV 1', 'overdue'),
+        (2, 'Rotavirus 1', 'overdue'),
+    }
+    assert alerts.counts() == {'overdue': 3, 'due': 2, 'upcoming': 0}
+    assert [r['status'] for r in rows] == ['overdue'] * 3 + ['due'] * 2
+
+
+def test_expired_doses_do_not_block_the_series():
+    engine = get_engine('KE')
+    # Two years old with nothing given: OPV 0 and the rotavirus doses are past their latest age
+    alerts = engine.compute(*arrays(engine, ['2024-10-01']), today=TODAY)
+    names = {row['vaccine_name'] for row in alerts.page(50)[0]}
+    assert 'OPV 0' not in names and 'OPV 1' not in names
+    assert not any(name.startswith('Rotavirus') for name in names)
+    assert 'Measles-Rubella 1' in names
+
+
+def test_upcoming_window():
+    engine = get_engine('KE')
+    alerts = engine.compute(*arrays(engine, ['2026-09-10'], given={1: ['BCG', 'OPV 0']}), today=TODAY)
+    rows = alerts.page(50, status='upcoming')[0]
+    assert {row['vaccine_name'] for row in rows} == {'OPV 1', 'Pentavalent 1', 'PCV 1', 'Rotavirus 1'}
+    assert all(row['due_date'] == '2026-10-22' and row['days_overdue'] == 0 for row in rows)
+
+
+def test_pages_resume_after_last_key():
+    engine = ScheduleEngine(SCHEDULES['RW'])
+    dobs = [str(np.datetime64('2026-01-01') + np.timedelta64(i, 'D')) for i in range(40)]
+    alerts = engine.compute(*arrays(engine, dobs), today=TODAY)
+
+    seen, key = [], None
+    while True:
+        rows, key = alerts.page(7, after=key)
+        seen.extend(rows)
+        if key is None:
+            break
+    assert len(seen) == len(alerts)
+    assert as_set(seen) == as_set(alerts.page(len(alerts))[0])
+
+
+class AlertsCursor(FakeCursor):
+    def respond(self, sql, params):
+        if 'FROM mothers WHERE user_id' in sql:
+            return [{'mother_id': 10}]
+        if 'c.dob FROM children' in sql:
+            return [(5, date(2026, 10, 10))]
+        if 'JOIN users' in sql:
+            return [{'child_id': 5, 'child_name': 'Baby Five', 'mother_id': 10,
+                     'mother_name': 'Jane', 'mother_phone': '0700000000'}]
+        return []
+
+
+@pytest.fixture
+def client(monkeypatch, use_db, login, make_client):
+    cursor = AlertsCursor()
+    use_db(cursor, vaccinations)
+    login('mother')
+    monkeypatch.setattr(vaccinations, 'date', type('FixedDate', (), {'today': staticmethod(lambda: TODAY)}))
+    return make_client(vaccinations), cursor
+
+
+def test_alerts_endpoint_scopes_mothers_to_their_children(client):
+    client, cursor = client
+    response = client.get('/api/vaccinations/alerts', headers=AUTH_HEADERS)
+    body = response.get_json()
+
+    assert response.status_code == 200
+    assert body['counts'] == {'overdue': 0, 'due': 2, 'upcoming': 0}
+    assert {row['vaccine_name'] for row in body['data']} == {'BCG', 'OPV 0'}
+    assert body['data'][0]['mother_name'] == 'Jane' and body['next_cursor'] is None
+    children_sql, children_params = cursor.executed[1]
+    assert 'mother_id = %s' in children_sql and children_params[-1] == 10
+
+
+def test_alerts_endpoint_rejects_bad_status(client):
+    client, _ = client
+    response = client.get('/api/vaccinations/alerts?status=late', headers=AUTH_HEADERS)
+    assert response.status_code == 400
@@ -6,8 +6,6 @@ import Card from "../components/Card";
 import Button from "../components/Button";
 import Loader from "../components/Loader";
 import { motherService } from "../services/motherService";
-import { childService } from "../services/childService";
-import { visitService } from "../services/visitService";
 import { getUser } from "../utils/auth";
 import {
   calculatePregnancyWeek,
@@ -32,25 +30,17 @@ const MotherDashboard = () => {
     try {
       setLoading(true);
 
-      // Get all mothers and find current user's mother profile
-      const allMothers = await motherService.getMothers();
-      const currentMother = allMothers.find(
-        (m: any) => m.user_id === user.user_id
-      );
+      // Profile, children and visits in one round trip
+      const currentMother = await motherService.getMyProfile([
+        "children",
+        "visits",
+      ]);
 
       if (currentMother) {
         setMotherData(currentMother);
 
-        // Fetch children for this mother
-        const childrenData = await childService.getChildrenByMother(
-          currentMother.mother_id
-        );
-        setChildren(childrenData);
-
-        // Fetch visits for this mother
-        const visitsData = await visitService.getVisitsByMother(
-          currentMother.mother_id
-        );
+        setChildren(currentMother.children);
+        const visitsData = currentMother.visits;
 
         // Create today's date at midnight
         const today = new Date();
@@ -4,11 +4,9 @@ import Sidebar from "../components/Sidebar";
 import Card from "../components/Card";
 import Loader from "../components/Loader";
 import { motherService } from "../services/motherService";
-import { getUser } from "../utils/auth";
 import { formatDate, calculatePregnancyWeek } from "../utils/formatters";
 
 const MotherProfile = () => {
-  const user = getUser();
   const [loading, setLoading] = useState(true);
   const [motherData, setMotherData] = useState<any>(null);
 
@@ -19,10 +17,7 @@ const MotherProfile = () => {
   const fetchMotherProfile = async () => {
     try {
       setLoading(true);
-      const allMothers = await motherService.getMothers();
-      const currentMother = allMothers.find(
-        (m: any) => m.user_id === user.user_id
-      );
+      const currentMother = await motherService.getMyProfile();
       setMotherData(currentMother);
     } catch (err) {
       console.error("Error fetching mother profile:", err);
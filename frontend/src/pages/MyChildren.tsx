@@ -9,11 +9,9 @@ import Input from "../components/Input";
 import Loader from "../components/Loader";
 import { motherService } from "../services/motherService";
 import { childService } from "../services/childService";
-import { getUser } from "../utils/auth";
 import { calculateAge, formatDate } from "../utils/formatters";
 
 const MyChildren = () => {
-  const user = getUser();
   const [loading, setLoading] = useState(true);
   const [saving, setSaving] = useState(false);
   const [children, setChildren] = useState<any[]>([]);
@@ -35,17 +33,11 @@ const MyChildren = () => {
   const fetchData = async () => {
     try {
       setLoading(true);
-      const allMothers = await motherService.getMothers();
-      const currentMother = allMothers.find(
-        (m: any) => m.user_id === user.user_id
-      );
+      const currentMother = await motherService.getMyProfile(["children"]);
 
       if (currentMother) {
         setMotherData(currentMother);
-        const childrenData = await childService.getChildrenByMother(
-          currentMother.mother_id
-        );
-        setChildren(childrenData);
+        setChildren(currentMother.children);
       }
     } catch (err) {
       console.error("Error fetching data:", err);
@@ -6,7 +6,6 @@ import Card from "../components/Card";
 import Button from "../components/Button";
 import Loader from "../components/Loader";
 import { motherService } from "../services/motherService";
-import { getUser } from "../utils/auth";
 import { calculatePregnancyWeek } from "../utils/formatters";
 
 interface TipCategory {
@@ -25,7 +24,6 @@ const PregnancyTips = () => {
   const navigate = useNavigate();
   const [loading, setLoading] = useState(true);
   const [motherData, setMotherData] = useState<any>(null);
-  const user = getUser();
 
   useEffect(() => {
     fetchMotherData();
@@ -34,10 +32,7 @@ const PregnancyTips = () => {
   const fetchMotherData = async () => {
     try {
       setLoading(true);
-      const allMothers = await motherService.getMothers();
-      const currentMother = allMothers.find(
-        (m: any) => m.user_id === user.user_id
-      );
+      const currentMother = await motherService.getMyProfile();
       setMotherData(currentMother);
     } catch (error) {
       console.error("Error fetching mother data:", error);
@@ -6,10 +6,7 @@ import Card from "../components/Card";
 import Input from "../components/Input";
 import Button from "../components/Button";
 import Loader from "../components/Loader";
-import { motherService } from "../services/motherService";
-import { childService } from "../services/childService";
-import { visitService } from "../services/visitService";
-import { vaccinationService } from "../services/vaccinationService";
+import { searchService, SearchType } from "../services/searchService";
 import { formatDate } from "../utils/formatters";
 
 const SearchRecords = () => {
@@ -18,6 +15,8 @@ const SearchRecords = () => {
   const [searchType, setSearchType] = useState("mother");
   const [results, setResults] = useState<any[]>([]);
   const [hasSearched, setHasSearched] = useState(false);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   const handleSearch = async (e: React.FormEvent) => {
     e.preventDefault();
@@ -25,46 +24,14 @@ const SearchRecords = () => {
 
     setLoading(true);
     setHasSearched(true);
+    setNextCursor(null);
 
     try {
-      let data: any[] = [];
-
-      switch (searchType) {
-        case "mother":
-          const mothers = await motherService.getMothers();
-          data = mothers.filter(
-            (m: any) =>
-              m.full_name.toLowerCase().includes(searchTerm.toLowerCase()) ||
-              m.email.toLowerCase().includes(searchTerm.toLowerCase())
-          );
-          break;
-
-        case "child":
-          const children = await childService.getChildren();
-          data = children.filter((c: any) =>
-            c.full_name.toLowerCase().includes(searchTerm.toLowerCase())
-          );
-          break;
-
-        case "visit":
-          const visits = await visitService.getVisits();
-          data = visits.filter(
-            (v: any) =>
-              v.mother_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-              v.visit_type.toLowerCase().includes(searchTerm.toLowerCase())
-          );
-          break;
-
-        case "vaccination":
-          const vaccinations = await vaccinationService.getVaccinations();
-          data = vaccinations.filter(
-            (v: any) =>
-              v.child_name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-              v.vaccine_name.toLowerCase().includes(searchTerm.toLowerCase())
-          );
-          break;
-      }
-
+      const { data, nextCursor } = await searchService.search(
+        searchTerm.trim(),
+        searchType as SearchType
+      );
+      setNextCursor(nextCursor);
       setResults(data);
     } catch (error) {
       console.error("Search error:", error);
@@ -73,6 +40,25 @@ const SearchRecords = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    if (!nextCursor) return;
+
+    setLoadingMore(true);
+    try {
+      const { data, nextCursor: cursor } = await searchService.search(
+        searchTerm.trim(),
+        searchType as SearchType,
+        nextCursor
+      );
+      setResults((previous) => [...previous, ...data]);
+      setNextCursor(cursor);
+    } catch (error) {
+      console.error("Search error:", error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   return (
     <div className="min-h-screen bg-gray-50">
       <Navbar role="health_worker" />
@@ -132,7 +118,8 @@ const SearchRecords = () => {
             {hasSearched && (
               <Card>
                 <h2 className="text-xl font-bold text-gray-900 mb-4">
-                  Search Results ({results.length})
+                  Search Results ({results.length}
+                  {nextCursor ? "+" : ""})
                 </h2>
 
                 {loading ? (
@@ -233,6 +220,17 @@ const SearchRecords = () => {
                           )}
                         </div>
                       ))}
+
+                    {nextCursor && (
+                      <Button
+                        type="button"
+                        className="bg-blue-100 hover:bg-blue-200 text-blue-600"
+                        onClick={handleLoadMore}
+                        disabled={loadingMore}
+                      >
+                        {loadingMore ? <Loader /> : "Load more"}
+                      </Button>
+                    )}
                   </div>
                 )}
               </Card>
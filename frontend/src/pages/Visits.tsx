@@ -3,13 +3,10 @@ import Navbar from "../components/Navbar";
 import Sidebar from "../components/Sidebar";
 import Card from "../components/Card";
 import Loader from "../components/Loader";
-import { visitService } from "../services/visitService";
 import { motherService } from "../services/motherService";
-import { getUser } from "../utils/auth";
 import { formatDate } from "../utils/formatters";
 
 const Visits = () => {
-  const user = getUser();
   const [loading, setLoading] = useState(true);
   const [visits, setVisits] = useState<any[]>([]);
   const [selectedVisit, setSelectedVisit] = useState<any>(null);
@@ -22,17 +19,11 @@ const Visits = () => {
   const fetchVisits = async () => {
     try {
       setLoading(true);
-      const allMothers = await motherService.getMothers();
-      const currentMother = allMothers.find(
-        (m: any) => m.user_id === user.user_id
-      );
+      const currentMother = await motherService.getMyProfile(["visits"]);
 
       if (currentMother) {
-        const visitsData = await visitService.getVisitsByMother(
-          currentMother.mother_id
-        );
         setVisits(
-          visitsData.sort(
+          currentMother.visits.sort(
             (a: any, b: any) =>
               new Date(b.visit_date).getTime() -
               new Date(a.visit_date).getTime()
@@ -5,9 +5,7 @@ import Sidebar from "../components/Sidebar";
 import Card from "../components/Card";
 import Button from "../components/Button";
 import Loader from "../components/Loader";
-import { visitService } from "../services/visitService";
-import { motherService } from "../services/motherService";
-import { vaccinationService } from "../services/vaccinationService";
+import { dashboardService } from "../services/dashboardService";
 import { formatDate, calculatePregnancyWeek } from "../utils/formatters";
 
 const WorkerDashboard = () => {
@@ -29,49 +27,20 @@ const WorkerDashboard = () => {
     try {
       setLoading(true);
 
-      // Fetch all data
-      const [allVisits, allMothers, allVaccinations] = await Promise.all([
-        visitService.getVisits(),
-        motherService.getMothers(),
-        vaccinationService.getVaccinations(),
-      ]);
-
-      const today = new Date();
-      const todayStr = today.toLocaleDateString("en-CA"); // YYYY-MM-DD local
-      const tomorrow = new Date(today);
-      tomorrow.setDate(tomorrow.getDate() + 1);
-
-      // Today's visits
-      const visitsToday = allVisits.filter((v: any) => {
-        const visitDateStr = new Date(v.visit_date).toLocaleDateString("en-CA");
-        return visitDateStr === todayStr && v.status !== "completed";
-      });
-
-      // Upcoming visits (after today)
-      const upcoming = allVisits
-        .filter(
-          (v: any) => new Date(v.visit_date) > today && v.status !== "completed"
-        )
-        .sort(
-          (a: any, b: any) =>
-            new Date(a.visit_date).getTime() - new Date(b.visit_date).getTime()
-        );
-
-      // Decide which visits to display: today if available, else nearest upcoming
-      const displayedVisits =
-        visitsToday.length > 0 ? visitsToday : upcoming.slice(0, 6);
+      // Counts and top rows are computed server-side
+      const dashboard = await dashboardService.getWorkerDashboard();
 
       setStats({
-        todaysVisits: visitsToday.length,
-        upcomingVisits: upcoming.length,
-        totalPatients: allMothers.length,
-        totalVaccinations: allVaccinations.length,
+        todaysVisits: dashboard.stats.todays_visits,
+        upcomingVisits: dashboard.stats.upcoming_visits,
+        totalPatients: dashboard.stats.total_patients,
+        totalVaccinations: dashboard.stats.total_vaccinations,
       });
 
-      setUpcomingVisits(displayedVisits);
+      setUpcomingVisits(dashboard.visits);
 
       // Recent patients
-      const recentMothers = allMothers
+      const recentMothers = dashboard.recent_patients
         .slice(0, 4)
         .map((mother: any, idx: number) => {
           const colors = [
@@ -8,18 +8,31 @@ const api = axios.create({
   },
 });
 
+// Echo the marker from our last write so any API worker reads it back from the primary
+const LAST_WRITE_HEADER = 'X-Last-Write';
+
 // Add token to requests
 api.interceptors.request.use((config) => {
   const token = getToken();
   if (token) {
     config.headers.Authorization = `Bearer ${token}`;
   }
+  const lastWrite = sessionStorage.getItem('lastWrite');
+  if (lastWrite) {
+    config.headers[LAST_WRITE_HEADER] = lastWrite;
+  }
   return config;
 });
 
 // Handle response errors
 api.interceptors.response.use(
-  (response) => response,
+  (response) => {
+    const lastWrite = response.headers[LAST_WRITE_HEADER.toLowerCase()];
+    if (lastWrite) {
+      sessionStorage.setItem('lastWrite', lastWrite);
+    }
+    return response;
+  },
   (error) => {
     // Only redirect on 401 if it's NOT a login or register request
     const isAuthEndpoint = error.config?.url?.includes('/auth/login') || 
@@ -35,4 +48,18 @@ api.interceptors.response.use(
   }
 );
 
+// Follow next_cursor until a paginated list endpoint has returned every page
+export async function getAllPages(url: string, params: Record<string, any> = {}) {
+  const items: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const response: any = await api.get(url, {
+      params: { ...params, limit: 200, cursor: cursor || undefined },
+    });
+    items.push(...response.data.data);
+    cursor = response.data.next_cursor;
+  } while (cursor);
+  return items;
+}
+
 export default api;
\ No newline at end of file
@@ -48,7 +48,13 @@ export const authService = {
     }
   },
 
-  logout() {
+  async logout() {
+    try {
+      // Revoke the token server-side so it cannot be reused
+      await api.post('/auth/logout');
+    } catch (error) {
+      console.error('Logout error:', error);
+    }
     localStorage.removeItem('token');
     localStorage.removeItem('user');
     window.location.href = '/login';
@@ -1,9 +1,8 @@
-import api from './api';
+import api, { getAllPages } from './api';
 
 export const childService = {
   async getChildren() {
-    const response = await api.get('/children');
-    return response.data.data;
+    return getAllPages('/children');
   },
 
   async getChild(id: number) {
@@ -0,0 +1,8 @@
+import api from './api';
+
+export const dashboardService = {
+  async getWorkerDashboard() {
+    const response = await api.get('/dashboard/worker');
+    return response.data.data;
+  },
+};
@@ -1,9 +1,24 @@
-import api from './api';
+import api, { getAllPages } from './api';
 
 export const motherService = {
   async getMothers() {
-    const response = await api.get('/mothers');
-    return response.data.data;
+    return getAllPages('/mothers');
+  },
+
+  // Logged-in mother's profile (null if she has none yet).
+  // include embeds related records: 'children', 'visits', 'vaccinations'
+  async getMyProfile(include: string[] = []) {
+    try {
+      const response = await api.get('/mothers/me', {
+        params: include.length ? { include: include.join(',') } : {},
+      });
+      return response.data.data;
+    } catch (error: any) {
+      if (error.response?.status === 404) {
+        return null;
+      }
+      throw error;
+    }
   },
 
   async getMother(id: number) {
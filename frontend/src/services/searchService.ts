@@ -0,0 +1,15 @@
+import api from './api';
+
+export type SearchType = 'mother' | 'child' | 'visit' | 'vaccination';
+
+export const searchService = {
+  async search(q: string, type?: SearchType, cursor?: string | null) {
+    const response = await api.get('/search', {
+      params: { q, type, cursor: cursor || undefined },
+    });
+    return {
+      data: response.data.data,
+      nextCursor: response.data.next_cursor as string | null,
+    };
+  },
+};
@@ -1,9 +1,8 @@
-import api from './api';
+import api, { getAllPages } from './api';
 
 export const vaccinationService = {
   async getVaccinations() {
-    const response = await api.get('/vaccinations');
-    return response.data.data;
+    return getAllPages('/vaccinations');
   },
 
   async getVaccination(id: number) {
@@ -16,8 +15,28 @@ export const vaccinationService = {
     return response.data.data;
   },
 
+  // One page of schedule alerts; pass back next_cursor for the following page
+  async getVaccinationAlerts(params: { status?: string; limit?: number; cursor?: string } = {}) {
+    const response = await api.get('/vaccinations/alerts', { params });
+    return response.data;
+  },
+
+  // Staff work list from the due-dose queue (defaults to overdue, own clinic)
+  async getDueDoses(params: { status?: string; clinic_id?: number; limit?: number; cursor?: string } = {}) {
+    const response = await api.get('/vaccinations/due', { params });
+    return response.data;
+  },
+
   async createVaccination(data: any) {
     const response = await api.post('/vaccinations', data);
     return response.data;
   },
+
+  // Campaign sync: one request for many doses, results come back per item
+  async createVaccinationsBatch(vaccinations: any[]) {
+    const response = await api.post('/vaccinations/batch', { vaccinations }, {
+      validateStatus: (status) => status === 201 || status === 207 || status === 400,
+    });
+    return response.data;
+  },
 };
\ No newline at end of file
@@ -1,9 +1,8 @@
-import api from './api';
+import api, { getAllPages } from './api';
 
 export const visitService = {
   async getVisits() {
-    const response = await api.get('/visits');
-    return response.data.data;
+    return getAllPages('/visits');
   },
 
   async getVisit(id: number) {